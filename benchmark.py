@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the WebScrape MCP server internals.
+
+Run with: python benchmark.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+
+ENTRY_COUNT = 500
+READS_PER_PROCESS = 2000
+READER_PROCESSES = 4
+CRAWL_PAGES = 200
+CRAWL_PARAGRAPHS = 150
+OVERHEAD_ROUNDS = 50
+STORE_ROUNDS = 5
+STORES_PER_ROUND = 10000
+LARGE_CRAWL_PAGES = 20000
+LARGE_CRAWL_BLOCK = 5000
+LARGE_BATCH_URLS = 20000
+LARGE_BATCH_BLOCK = 5000
+
+
+def _percentiles(samples):
+    """Return (p50, p95, p99) of latency samples in microseconds."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1e6
+    return pick(0.50), pick(0.95), pick(0.99)
+
+
+def _shared_cache_reader(path, scrape_ids, queue):
+    """Read random entries and bodies written by the parent process."""
+    from webscrape_mcp import SharedScrapeCache
+
+    cache = SharedScrapeCache(path)
+    samples = []
+    for _ in range(READS_PER_PROCESS):
+        scrape_id = random.choice(scrape_ids)
+        start = time.perf_counter()
+        entry = cache.get(scrape_id)
+        cache.read_body(entry["content_hash"], 0, 10000)
+        samples.append(time.perf_counter() - start)
+    queue.put(samples)
+
+
+def bench_shared_cache_reads():
+    """Cross-process read latency of the SQLite shared cache."""
+    import webscrape_mcp
+    from webscrape_mcp import SharedScrapeCache, _store_in_cache
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_shared.sqlite")
+    webscrape_mcp.SHARED_CACHE = SharedScrapeCache(path)
+    scrape_ids = [f"bench{i}" for i in range(ENTRY_COUNT)]
+    for i, scrape_id in enumerate(scrape_ids):
+        _store_in_cache(scrape_id=scrape_id, url=f"https://bench.test/{i}", content=f"page {i}\n" * 5000)
+
+    ctx = get_context("spawn")
+    queue = ctx.Queue()
+    readers = [ctx.Process(target=_shared_cache_reader, args=(path, scrape_ids, queue)) for _ in range(READER_PROCESSES)]
+    for reader in readers:
+        reader.start()
+    samples = [s for _ in readers for s in queue.get()]
+    for reader in readers:
+        reader.join()
+
+    p50, p95, p99 = _percentiles(samples)
+    print(f"shared cache cross-process read ({READER_PROCESSES} readers, {len(samples)} reads): "
+          f"p50={p50:.0f}us p95={p95:.0f}us p99={p99:.0f}us mean={statistics.mean(samples) * 1e6:.0f}us")
+
+
+def _serve_crawl_site():
+    """Serve CRAWL_PAGES large, densely linked pages from a local thread; returns (server, base URL)."""
+    filler = "".join(f"<p>Paragraph {i} with <b>some</b> <a href='#'>markup</a>.</p>" for i in range(CRAWL_PARAGRAPHS))
+
+    class Site(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = int(self.path.strip("/p") or 0)
+            links = "".join(f'<a href="/p{(page * 3 + i) % CRAWL_PAGES}">next</a>' for i in range(1, 4))
+            body = f"<html><head><title>Page {page}</title></head><body>{filler}{links}</body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def bench_distributed_crawl():
+    """
+    Crawl throughput of one process versus a distributed crawl with one worker per core.
+
+    Workers only help with free cores to run on; with a single core (at
+    least 2 workers are always started) the distributed run measures its
+    overhead.
+    """
+    import asyncio
+    import logging
+    import webscrape_mcp
+    from webscrape_mcp import SharedFrontier, StartCrawlJobInput, _run_crawl, _run_distributed_crawl
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server, base = _serve_crawl_site()
+    workers = max(2, os.cpu_count() or 1)
+    webscrape_mcp.RESULT_LOG_DIR = tempfile.mkdtemp()
+    try:
+        for label, count in (("1 process", 1), (f"{workers} workers", workers)):
+            params = StartCrawlJobInput(
+                url=f"{base}/p0", max_depth=20, max_pages=CRAWL_PAGES, workers=count, per_host_limit=20
+            )
+
+            async def on_result(result):
+                return True
+
+            start = time.perf_counter()
+            if count == 1:
+                pages, _ = asyncio.run(_run_crawl(params, on_result))
+            else:
+                frontier = SharedFrontier(os.path.join(webscrape_mcp.RESULT_LOG_DIR, "bench.frontier.sqlite"), params)
+                pages, _ = asyncio.run(_run_distributed_crawl(params, on_result, frontier))
+            elapsed = time.perf_counter() - start
+            print(f"crawl {label}: {pages} pages in {elapsed:.2f}s ({pages / elapsed:.0f} pages/s)")
+    finally:
+        server.shutdown()
+
+
+def bench_scrape_overhead():
+    """Per-URL cost of a 20-URL batch scrape with fetching stubbed out, and the per-URL work it no longer does."""
+    import asyncio
+    import json
+    import webscrape_mcp
+    from webscrape_mcp import ScrapeMultipleUrlsInput, ScrapeUrlInput, scrape_multiple_urls, _render_scrape, ScrapeOptions
+
+    html = "<html><head><title>Bench</title></head><body><p>Short page</p></body></html>"
+
+    async def fake_fetch(url, timeout=None, client=None, **kwargs):
+        return html, 200, {}
+
+    webscrape_mcp._fetch_url = fake_fetch
+    params = ScrapeMultipleUrlsInput(urls=[f"https://bench.test/{i}" for i in range(20)])
+
+    samples = []
+    for _ in range(OVERHEAD_ROUNDS):
+        start = time.perf_counter()
+        asyncio.run(scrape_multiple_urls(params))
+        samples.append((time.perf_counter() - start) / len(params.urls))
+    p50, p95, p99 = _percentiles(samples)
+    print(f"batch scrape per URL (fetch stubbed, {OVERHEAD_ROUNDS} x 20 URLs): p50={p50:.0f}us p95={p95:.0f}us p99={p99:.0f}us")
+
+    # What each URL used to pay on top: a validated ScrapeUrlInput and a JSON encode/decode of its response
+    result = _render_scrape(params.urls[0], ScrapeOptions.from_params(params), html, 200)
+    samples = []
+    for url in params.urls * OVERHEAD_ROUNDS:
+        start = time.perf_counter()
+        ScrapeUrlInput(url=url, include_metadata=True)
+        json.loads(json.dumps(result, indent=2))
+        samples.append(time.perf_counter() - start)
+    p50, p95, p99 = _percentiles(samples)
+    print(f"avoided per-URL validation + JSON round-trip: p50={p50:.1f}us p95={p95:.1f}us p99={p99:.1f}us")
+
+
+def bench_cache_store():
+    """Per-store cost of the scrape cache as it grows, which should stay flat."""
+    from webscrape_mcp import _store_in_cache
+
+    for round_index in range(STORE_ROUNDS):
+        start = time.perf_counter()
+        for i in range(STORES_PER_ROUND):
+            n = round_index * STORES_PER_ROUND + i
+            _store_in_cache(scrape_id=f"store{n}", url=f"https://bench.test/{n}", content=f"page {n}\n" * 50)
+        elapsed = time.perf_counter() - start
+        print(f"cache stores {round_index * STORES_PER_ROUND}-{(round_index + 1) * STORES_PER_ROUND}: "
+              f"{elapsed / STORES_PER_ROUND * 1e6:.1f}us per store")
+
+
+def bench_large_crawl():
+    """Per-page cost of a LARGE_CRAWL_PAGES crawl with fetching stubbed out, per block of pages, which should stay flat."""
+    import asyncio
+    import webscrape_mcp
+    from webscrape_mcp import CrawlSiteInput, _run_crawl
+
+    async def fake_fetch(url, timeout=None, client=None, **kwargs):
+        page = int(url.rsplit("/p", 1)[1])
+        links = "".join(f'<a href="/p{(page * 2 + i) % LARGE_CRAWL_PAGES}">next</a>' for i in range(1, 3))
+        return f"<html><head><title>Page {page}</title></head><body><p>Body {page}</p>{links}</body></html>", 200, {}
+
+    webscrape_mcp._fetch_url = fake_fetch
+    webscrape_mcp.RESULT_LOG_DIR = tempfile.mkdtemp()
+    params = CrawlSiteInput(
+        url="https://bench.test/p0", max_depth=20, max_pages=LARGE_CRAWL_PAGES, link_graph=False
+    )
+    marks = [time.perf_counter()]
+
+    pages = 0
+
+    async def on_result(result):
+        nonlocal pages
+        pages += 1
+        if pages % LARGE_CRAWL_BLOCK == 0:
+            marks.append(time.perf_counter())
+        return True
+
+    asyncio.run(_run_crawl(params, on_result))
+    for block, (start, end) in enumerate(zip(marks, marks[1:])):
+        print(f"crawl pages {block * LARGE_CRAWL_BLOCK}-{(block + 1) * LARGE_CRAWL_BLOCK}: "
+              f"{(end - start) / LARGE_CRAWL_BLOCK * 1e6:.0f}us per page")
+
+
+def bench_large_batch():
+    """Per-URL cost of a LARGE_BATCH_URLS batch job run with fetching stubbed out, per block of URLs, which should stay flat."""
+    import asyncio
+    import webscrape_mcp
+    from webscrape_mcp import StartBatchJobInput, _create_http_client, _run_batch
+
+    async def fake_fetch(url, timeout=None, client=None, **kwargs):
+        return f"<html><head><title>{url}</title></head><body><p>Body of {url}</p></body></html>", 200, {}
+
+    webscrape_mcp._fetch_url = fake_fetch
+    urls = [f"https://bench{i % 10}.test/p{i}" for i in range(LARGE_BATCH_URLS)]
+    params = StartBatchJobInput(urls=urls, concurrency=20)
+    marks = [time.perf_counter()]
+    done = 0
+
+    async def on_result(result):
+        nonlocal done
+        done += 1
+        if done % LARGE_BATCH_BLOCK == 0:
+            marks.append(time.perf_counter())
+        return True
+
+    async def run():
+        async with _create_http_client() as client:
+            await _run_batch(params, iter(urls), on_result, client)
+
+    asyncio.run(run())
+    for block, (start, end) in enumerate(zip(marks, marks[1:])):
+        print(f"batch URLs {block * LARGE_BATCH_BLOCK}-{(block + 1) * LARGE_BATCH_BLOCK}: "
+              f"{LARGE_BATCH_BLOCK / (end - start):.0f} URLs/s")
+
+
+BENCHMARKS = [
+    bench_cache_store,
+    bench_large_crawl,
+    bench_large_batch,
+    bench_shared_cache_reads,
+    bench_distributed_crawl,
+    bench_scrape_overhead,
+]
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:]
+    for bench in BENCHMARKS:
+        if not selected or bench.__name__ in selected:
+            bench()
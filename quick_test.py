@@ -14,7 +14,9 @@ try:
         PREVIEW_LENGTH,
         _generate_scrape_id,
         _clean_expired_cache,
-        _store_in_cache
+        _store_in_cache,
+        _get_cached_content,
+        _evict_from_cache
     )
     print("[OK] All cache infrastructure imported successfully")
 except Exception as e:
@@ -37,7 +39,7 @@ try:
         metadata={"title": "Test Page"}
     )
     assert "test123" in SCRAPE_CACHE
-    assert SCRAPE_CACHE["test123"]["content"] == "Test content here"
+    assert _get_cached_content(SCRAPE_CACHE["test123"]) == "Test content here"
     print("[OK] Cache storage works")
 
     # Test cleanup
@@ -45,7 +47,7 @@ try:
     print("[OK] Cache cleanup works")
 
     # Clean up test
-    del SCRAPE_CACHE["test123"]
+    _evict_from_cache("test123")
 except Exception as e:
     print(f"[FAIL] Cache function error: {e}")
     import traceback
@@ -60,13 +62,13 @@ try:
 
     # Count tools
     tool_count = content.count('@mcp.tool(')
-    assert tool_count == 8, f"Expected 8 tools, found {tool_count}"
-    print(f"[OK] Found 8 tools")
+    assert tool_count == 18, f"Expected 18 tools, found {tool_count}"
+    print(f"[OK] Found 18 tools")
 
     # Count resources
     resource_count = content.count('@mcp.resource(')
-    assert resource_count == 2, f"Expected 2 resources, found {resource_count}"
-    print(f"[OK] Found 2 resources")
+    assert resource_count == 12, f"Expected 12 resources, found {resource_count}"
+    print(f"[OK] Found 12 resources")
 
     # Check for resource_uri in responses
     uri_count = content.count('resource_uri')
@@ -114,8 +116,8 @@ except AssertionError as e:
 print("\n" + "=" * 60)
 print("Refactoring Metrics")
 print("=" * 60)
-print(f"Total tools: 8 (6 scraping + 2 discovery)")
-print(f"Total resources: 2 (content + metadata)")
+print(f"Total tools: 18 (6 scraping + 2 discovery + 10 cache/crawl)")
+print(f"Total resources: 12 (content, metadata and paged views)")
 print(f"Cache TTL: {CACHE_TTL_SECONDS} seconds ({CACHE_TTL_SECONDS//60} minutes)")
 print(f"Preview length: {PREVIEW_LENGTH} characters")
 print(f"File size: {len(content):,} characters")
@@ -28,7 +28,10 @@ def test_cache_functions():
     """Test cache management functions."""
     print("\nTesting cache functions...")
     try:
-        from webscrape_mcp import _generate_scrape_id, _store_in_cache, _clean_expired_cache, SCRAPE_CACHE
+        from webscrape_mcp import (
+            _generate_scrape_id, _store_in_cache, _clean_expired_cache,
+            _get_cached_content, _evict_from_cache, SCRAPE_CACHE
+        )
 
         # Test ID generation
         scrape_id1 = _generate_scrape_id("https://example.com", "markdown")
@@ -45,11 +48,11 @@ def test_cache_functions():
             metadata={"title": "Test"}
         )
         assert "test123" in SCRAPE_CACHE, "Cache entry should exist"
-        assert SCRAPE_CACHE["test123"]["content"] == "Test content"
+        assert _get_cached_content(SCRAPE_CACHE["test123"]) == "Test content"
         print("  [OK] Cache storage works")
 
         # Clean test entry
-        del SCRAPE_CACHE["test123"]
+        _evict_from_cache("test123")
 
         # Test cleanup
         _clean_expired_cache()
@@ -62,6 +65,1654 @@ def test_cache_functions():
         traceback.print_exc()
         return False
 
+def test_cache_expiry():
+    """Test heap-based cache expiry and that stores no longer scan the cache."""
+    print("\nTesting cache expiry...")
+    import webscrape_mcp
+    original_ttl = webscrape_mcp.CACHE_TTL_SECONDS
+    try:
+        import time
+        from webscrape_mcp import SCRAPE_CACHE, _store_in_cache, _clean_expired_cache, _get_cache_entry
+
+        webscrape_mcp.CACHE_TTL_SECONDS = -1
+        _store_in_cache(scrape_id="expired1", url="https://expiry.test/1", content="Old content")
+        _store_in_cache(scrape_id="expired2", url="https://expiry.test/4", content="Unread content")
+        webscrape_mcp.CACHE_TTL_SECONDS = original_ttl
+        _store_in_cache(scrape_id="live1", url="https://expiry.test/2", content="New content")
+        try:
+            _get_cache_entry("expired1")
+            raise AssertionError("Expired entries must not be served between sweeps")
+        except Exception as e:
+            assert "expired" in str(e), e
+        assert "expired2" in SCRAPE_CACHE, "Stores do not sweep"
+        _clean_expired_cache(force=True)
+        assert "expired1" not in SCRAPE_CACHE and "expired2" not in SCRAPE_CACHE and "live1" in SCRAPE_CACHE
+        print("  [OK] Sweeps evict only due entries; reads check expiry themselves")
+
+        def store_batch(prefix, count):
+            start = time.perf_counter()
+            for i in range(count):
+                _store_in_cache(scrape_id=f"{prefix}{i}", url=f"https://expiry.test/{prefix}/{i}", content=f"Page {prefix} {i}")
+            return (time.perf_counter() - start) / count
+
+        first = store_batch("grow_a", 1000)
+        store_batch("grow_b", 8000)
+        last = store_batch("grow_c", 1000)
+        assert last < first * 3 + 50e-6, (first, last)
+        print(f"  [OK] Store cost stays flat as the cache grows ({first * 1e6:.0f}us -> {last * 1e6:.0f}us)")
+
+        for prefix, count in (("grow_a", 1000), ("grow_b", 8000), ("grow_c", 1000)):
+            for i in range(count):
+                webscrape_mcp._evict_from_cache(f"{prefix}{i}")
+        webscrape_mcp._evict_from_cache("live1")
+        return True
+    except Exception as e:
+        print(f"[FAIL] Cache expiry error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp.CACHE_TTL_SECONDS = original_ttl
+
+def test_content_dedup():
+    """Test that identical bodies are stored once and reference counted."""
+    print("\nTesting content-addressed dedup...")
+    try:
+        from webscrape_mcp import _store_in_cache, _evict_from_cache, SCRAPE_CACHE, CONTENT_STORE
+
+        _store_in_cache(scrape_id="dup1", url="https://a.test", content="Same body")
+        _store_in_cache(scrape_id="dup2", url="https://b.test", content="Same body")
+        content_hash = SCRAPE_CACHE["dup1"]["content_hash"]
+        assert SCRAPE_CACHE["dup2"]["content_hash"] == content_hash, "Identical bodies should share a hash"
+        assert CONTENT_STORE[content_hash]["scrape_ids"] == {"dup1", "dup2"}
+        print("  [OK] Identical bodies share one stored copy")
+
+        _evict_from_cache("dup1")
+        assert content_hash in CONTENT_STORE, "Body should survive while referenced"
+        _evict_from_cache("dup2")
+        assert content_hash not in CONTENT_STORE, "Body should be freed when unreferenced"
+        print("  [OK] Bodies are released with their last reference")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Dedup error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_content_ranges():
+    """Test ranged reads over cached content."""
+    print("\nTesting ranged content reads...")
+    try:
+        from webscrape_mcp import _store_in_cache, _evict_from_cache, _read_content_range
+
+        body = "line one\nline two\n# Heading\nline four\n"
+        _store_in_cache(scrape_id="range1", url="https://range.test", content=body)
+
+        page = _read_content_range("range1", 0, 15, "line")
+        assert page["content"] == "line one\n", "Page should end on a line boundary"
+        assert page["total_length"] == len(body)
+        assert page["next_cursor"] == "9"
+        print("  [OK] Pages align to line boundaries")
+
+        page = _read_content_range("range1", 0, 25, "heading")
+        assert page["content"] == "line one\nline two\n", "Page should stop before a heading"
+        print("  [OK] Pages align to heading boundaries")
+
+        offset, parts = 0, []
+        while offset is not None:
+            page = _read_content_range("range1", offset, 10, "none")
+            parts.append(page["content"])
+            offset = int(page["next_cursor"]) if page["next_cursor"] else None
+        assert "".join(parts) == body, "Following next_cursor should cover the whole body"
+        print("  [OK] Cursor iteration reassembles the full body")
+
+        _evict_from_cache("range1")
+        return True
+    except Exception as e:
+        print(f"[FAIL] Range read error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_binary_screenshot_storage():
+    """Test that binary captures are cached as bytes and served as blobs."""
+    print("\nTesting binary screenshot storage...")
+    try:
+        import asyncio
+        from webscrape_mcp import (
+            _store_in_cache, _evict_from_cache, _read_content_range,
+            get_scrape_content, get_scrape_screenshot, CONTENT_STORE, SCRAPE_CACHE
+        )
+
+        png = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+        _store_in_cache(scrape_id="shot1", url="https://shot.test", content=png, mime_type="image/png")
+        assert CONTENT_STORE[SCRAPE_CACHE["shot1"]["content_hash"]]["content"] == png, "Screenshot should be stored as raw bytes"
+        assert asyncio.run(get_scrape_screenshot("shot1")) == png
+        print("  [OK] Screenshot stored and served as raw PNG bytes")
+
+        assert asyncio.run(get_scrape_content("shot1")).startswith("data:image/png;base64,")
+        page = _read_content_range("shot1", 0, 8)
+        assert page["encoding"] == "base64" and page["total_length"] == len(png)
+        print("  [OK] Base64 produced only when text content is requested")
+
+        _evict_from_cache("shot1")
+        return True
+    except Exception as e:
+        print(f"[FAIL] Binary storage error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_metadata_and_list_pages():
+    """Test precomputed metadata and paginated link lists."""
+    print("\nTesting metadata and list pages...")
+    try:
+        import asyncio
+        from webscrape_mcp import (
+            _store_in_cache, _evict_from_cache, get_scrape_metadata, get_scrape_links, LIST_PAGE_SIZE
+        )
+
+        links = [f"https://list.test/{i}" for i in range(LIST_PAGE_SIZE + 5)]
+        _store_in_cache(scrape_id="meta1", url="https://list.test", content="x" * 1000, links=links)
+
+        meta = json.loads(asyncio.run(get_scrape_metadata("meta1")))
+        assert meta["link_count"] == len(links) and meta["content_length"] == 1000
+        assert "links" not in meta, "Metadata should not inline the link list"
+        print("  [OK] Metadata reports precomputed counts without lists")
+
+        first = json.loads(asyncio.run(get_scrape_links("meta1", "0")))
+        assert len(first["links"]) == LIST_PAGE_SIZE and first["next_cursor"] == str(LIST_PAGE_SIZE)
+        rest = json.loads(asyncio.run(get_scrape_links("meta1", first["next_cursor"])))
+        assert first["links"] + rest["links"] == links and rest["next_cursor"] is None
+        print("  [OK] Links are paged with next_cursor")
+
+        _evict_from_cache("meta1")
+        return True
+    except Exception as e:
+        print(f"[FAIL] Metadata error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_get_scrapes():
+    """Test fetching several cached scrapes in one call."""
+    print("\nTesting multi-get...")
+    try:
+        import asyncio
+        from webscrape_mcp import _store_in_cache, _evict_from_cache, get_scrapes, GetScrapesInput
+
+        _store_in_cache(scrape_id="multi1", url="https://m.test/1", content="first page body")
+        _store_in_cache(scrape_id="multi2", url="https://m.test/2", content="second page body")
+
+        result = json.loads(asyncio.run(get_scrapes(GetScrapesInput(
+            scrape_ids=["multi1", "nope", "multi2"],
+            fields=["url", "content"],
+            max_chars_per_item=5
+        ))))
+        assert [r["scrape_id"] for r in result["results"]] == ["multi1", "multi2"]
+        assert result["results"][0]["content"] == "first" and result["results"][0]["next_cursor"] == "5"
+        assert "metadata" not in result["results"][0], "Only projected fields should be returned"
+        assert result["missing"][0]["scrape_id"] == "nope"
+        print("  [OK] Multi-get projects fields, limits content and reports missing IDs")
+
+        from webscrape_mcp import CHARACTER_LIMIT
+        _store_in_cache(scrape_id="multibig", url="https://m.test/big", content='é"\n' * CHARACTER_LIMIT)
+        raw = asyncio.run(get_scrapes(GetScrapesInput(scrape_ids=["multibig", "multi2"], fields=["content"])))
+        result = json.loads(raw)
+        first = result["results"][0]
+        assert len(raw) <= CHARACTER_LIMIT, len(raw)
+        assert first["scrape_id"] == "multibig" and 0 < len(first["content"]) < CHARACTER_LIMIT
+        assert first["next_cursor"] == str(len(first["content"])) 
+        assert [r["scrape_id"] for r in result["results"][1:]] + result["deferred"] == ["multi2"]
+        print(f"  [OK] Oversized first item shortened to {len(first['content'])} chars; response {len(raw)} chars")
+
+        links = [f"https://m.test/link/{i:05d}" for i in range(2000)]
+        _store_in_cache(scrape_id="multilinks", url="https://m.test/links", content="x", links=links)
+        raw = asyncio.run(get_scrapes(GetScrapesInput(scrape_ids=["multilinks", "multilinks"], fields=["url", "links"])))
+        result = json.loads(raw)
+        first = result["results"][0]
+        kept = len(first["links"])
+        assert len(raw) <= CHARACTER_LIMIT and 0 < kept < 2000 and first["links"] == links[:kept]
+        assert first["truncated"] == {"links": f"scrape://multilinks/links/{kept}"}
+        assert result["returned"] == 1 and result["deferred"] == ["multilinks"], "The returned item is never deferred"
+        print(f"  [OK] Oversized link list cut to {kept} with a cursor into the links resource")
+
+        raw = asyncio.run(get_scrapes(GetScrapesInput(
+            scrape_ids=["multi2"] + [f"unknown-scrape-{i:03d}" for i in range(199)], fields=["url"]
+        )))
+        result = json.loads(raw)
+        assert len(raw) <= CHARACTER_LIMIT, len(raw)
+        assert result["returned"] == 1 and len(result["missing"]) + len(result["deferred"]) == 199
+        assert result["deferred"], "Missing entries are charged to the budget"
+        print(f"  [OK] 199 unknown IDs fit the limit: {len(result['missing'])} missing, {len(result['deferred'])} deferred")
+
+        _evict_from_cache("multilinks")
+        _evict_from_cache("multibig")
+        _evict_from_cache("multi1")
+        _evict_from_cache("multi2")
+        return True
+    except Exception as e:
+        print(f"[FAIL] Multi-get error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_sharded_cache_threads():
+    """Test the sharded cache under concurrent writers."""
+    print("\nTesting sharded cache concurrency...")
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        from webscrape_mcp import ShardedCache, _store_in_cache, _evict_from_cache, CONTENT_STORE, SCRAPE_CACHE
+
+        cache = ShardedCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            values = list(pool.map(lambda _: cache.get_or_compute("key", compute), range(200)))
+        assert set(values) == {"value"} and len(calls) == 1, "get_or_compute should compute once"
+        print("  [OK] get_or_compute is atomic")
+
+        def churn(i):
+            scrape_id = f"thread{i % 10}"
+            _store_in_cache(scrape_id=scrape_id, url="https://t.test", content=f"body {i % 3}")
+            if i % 2:
+                _evict_from_cache(scrape_id)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(churn, range(500)))
+        for i in range(10):
+            _evict_from_cache(f"thread{i}")
+        leaked = [h for h, body in CONTENT_STORE.items() if any(sid.startswith("thread") for sid in body["scrape_ids"])]
+        assert not leaked, "All body references should be released"
+        assert not any(sid.startswith("thread") for sid, _ in SCRAPE_CACHE.items())
+        print("  [OK] Concurrent store/evict keeps reference counts consistent")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Sharded cache error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_shared_cache():
+    """Test resolving scrapes written by another process through the shared cache."""
+    print("\nTesting shared SQLite cache...")
+    import os
+    import tempfile
+    from datetime import datetime, timedelta
+    import webscrape_mcp
+    original = webscrape_mcp.SHARED_CACHE
+    try:
+        from webscrape_mcp import SharedScrapeCache, _store_in_cache, _evict_from_cache, _read_content_range, SCRAPE_CACHE, CONTENT_STORE
+
+        path = os.path.join(tempfile.mkdtemp(), "shared.sqlite")
+        webscrape_mcp.SHARED_CACHE = SharedScrapeCache(path)
+        _store_in_cache(scrape_id="shared1", url="https://s.test", content="shared line\n" * 100)
+
+        # Drop the in-process copy, as if another worker had stored it
+        entry = SCRAPE_CACHE.pop("shared1")
+        CONTENT_STORE.pop(entry["content_hash"])
+
+        other = SharedScrapeCache(path)
+        assert other.get("shared1")["url"] == "https://s.test"
+        page = _read_content_range("shared1", 12, 30)
+        assert page["content"] == "shared line\n" * 2 and page["total_length"] == 1200
+        print("  [OK] Entries and ranged reads resolve from the shared cache")
+
+        _evict_from_cache("shared1")
+        assert other.get("shared1") is None
+        assert other.read_body(entry["content_hash"]) is None, "Unreferenced body should be deleted"
+        print("  [OK] Eviction removes shared entries and orphaned bodies")
+
+        # Expiry: only the expired entry's body goes, and only when it is unreferenced
+        now = datetime.utcnow()
+        live = {"url": "https://s.test/live", "content_hash": "h_shared", "created_at": now, "expires_at": now + timedelta(hours=1)}
+        dead = dict(live, url="https://s.test/dead", expires_at=now - timedelta(seconds=1))
+        other.put("live", live, "shared body")
+        other.put("dead_shared", dead, "shared body")
+        other.put("dead_alone", dict(dead, content_hash="h_alone"), "lonely body")
+        other.expire(force=True)
+        assert other.get("live") is not None and other.read_body("h_shared") == "shared body"
+        assert other.read_body("h_alone") is None, "Body of an expired entry should be deleted"
+        other.put("dead_again", dict(dead, content_hash="h_again"), "later body")
+        other.expire()
+        assert other.read_body("h_again") == "later body", "Expiry runs at most once per interval"
+        print("  [OK] Expiry is throttled and deletes only bodies of removed entries")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Shared cache error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp.SHARED_CACHE = original
+
+def _fake_site(page_count=40, fanout=4):
+    """Build a synthetic site and a network-free stand-in for _fetch_url."""
+    import asyncio
+    import random
+
+    def html(i):
+        links = "".join(f'<a href="/p{(i * fanout + k) % page_count}">p</a>' for k in range(1, fanout + 1))
+        return f"<html><head><title>Page {i}</title></head><body><p>Body {i}</p>{links}</body></html>"
+
+    pages = {f"https://site.test/p{i}": html(i) for i in range(page_count)}
+
+    async def fake_fetch(url, timeout=None, client=None, **kwargs):
+        await asyncio.sleep(random.random() * 0.005)
+        if url not in pages:
+            raise Exception(f"HTTP 404: {url}")
+        return pages[url], 200, {}
+
+    return pages, fake_fetch
+
+def _collect_crawl(params):
+    """Run a crawl and collect its streamed results."""
+    import asyncio
+    from webscrape_mcp import _run_crawl
+
+    results = []
+
+    async def on_result(result):
+        results.append(result)
+
+    visited, stats = asyncio.run(_run_crawl(params, on_result))
+    return results, visited, stats
+
+def test_concurrent_crawl_order():
+    """Test that concurrent crawls visit and order pages exactly like sequential BFS."""
+    print("\nTesting concurrent crawl engine...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        from webscrape_mcp import CrawlSiteInput
+
+        _, webscrape_mcp._fetch_url = _fake_site()
+        runs = {}
+        for concurrency in (1, 8):
+            params = CrawlSiteInput(url="https://site.test/p0", max_depth=3, max_pages=25, concurrency=concurrency)
+            results, visited, _ = _collect_crawl(params)
+            runs[concurrency] = [(r["url"], r["depth"]) for r in results]
+            assert visited == 25 and len(results) == 25, "max_pages should be honoured exactly"
+        assert runs[1] == runs[8], "Concurrent crawl should match sequential BFS order"
+        assert [d for _, d in runs[8]] == sorted(d for _, d in runs[8]), "Results should be ordered by depth"
+        print("  [OK] Concurrent crawl matches sequential BFS order and page cap")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Crawl engine error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_frontier_dedup():
+    """Test enqueue-time frontier dedup with exact and Bloom seen-sets."""
+    print("\nTesting frontier dedup...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        from webscrape_mcp import BloomFilter, CrawlSiteInput
+
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"https://b.test/{i}")
+        assert all(f"https://b.test/{i}" in bloom for i in range(1000)), "Bloom filter must not give false negatives"
+        false_positives = sum(f"https://other.test/{i}" in bloom for i in range(10000))
+        assert false_positives < 300, f"False-positive rate too high: {false_positives}/10000"
+        print(f"  [OK] Bloom filter has no false negatives ({false_positives}/10000 false positives)")
+
+        _, webscrape_mcp._fetch_url = _fake_site()
+        runs = {}
+        for dedup_filter in ("exact", "bloom"):
+            params = CrawlSiteInput(url="https://site.test/p0", max_depth=3, max_pages=30, dedup_filter=dedup_filter)
+            results, _, stats = _collect_crawl(params)
+            runs[dedup_filter] = [r["url"] for r in results]
+            assert stats["duplicates_skipped"] > 0, "Duplicate links should be dropped at enqueue time"
+            assert stats["urls_enqueued"] <= 40, "Each URL should be enqueued at most once"
+        assert runs["exact"] == runs["bloom"]
+        print(f"  [OK] Frontier dedups at enqueue time ({stats['duplicates_skipped']} duplicates skipped)")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Frontier dedup error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_streamed_crawl_results():
+    """Test that crawl results stream to a paged results resource."""
+    print("\nTesting streamed crawl results...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        from webscrape_mcp import CHARACTER_LIMIT, crawl_site, get_crawl_results, CrawlSiteInput
+
+        _, webscrape_mcp._fetch_url = _fake_site(page_count=300, fanout=6)
+        params = CrawlSiteInput(url="https://site.test/p0", max_depth=6, max_pages=250, concurrency=10)
+        raw = asyncio.run(crawl_site(params))
+        output = json.loads(raw)
+        assert output["pages_crawled"] == 250
+        assert output["results_inlined"] < 250 and "note" in output, "Large crawls should not inline every result"
+        assert len(raw) <= CHARACTER_LIMIT, len(raw)
+        for response_format in ("text", "json"):
+            other = asyncio.run(crawl_site(CrawlSiteInput(**{**params.model_dump(), "response_format": response_format})))
+            assert len(other) <= CHARACTER_LIMIT, (response_format, len(other))
+        print(f"  [OK] Response inlines {output['results_inlined']} results in {len(raw)} chars without truncating JSON")
+
+        cursor, streamed = "0", []
+        while cursor is not None:
+            page = json.loads(asyncio.run(get_crawl_results(output["crawl_id"], cursor)))
+            streamed.extend(page["results"])
+            cursor = page["next_cursor"]
+        assert len(streamed) == 250 and page["complete"]
+        assert streamed[:output["results_inlined"]] == output["results"]
+        print("  [OK] All results are readable from the results resource")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Streamed crawl error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_crawl_jobs():
+    """Test background crawl jobs with status polling and cancellation."""
+    print("\nTesting background crawl jobs...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        from webscrape_mcp import (
+            start_crawl_job, get_job_status, cancel_job, get_crawl_results,
+            StartCrawlJobInput, JobIdInput
+        )
+
+        _, webscrape_mcp._fetch_url = _fake_site(page_count=200, fanout=5)
+
+        async def scenario():
+            started = json.loads(await start_crawl_job(StartCrawlJobInput(
+                url="https://site.test/p0", max_depth=6, max_pages=60, concurrency=4
+            )))
+            assert started["status"] == "running", "Start should return before the crawl finishes"
+            job_id = started["job_id"]
+            while True:
+                status = json.loads(await get_job_status(JobIdInput(job_id=job_id)))
+                if status["status"] != "running":
+                    break
+                await asyncio.sleep(0.01)
+            assert status["status"] == "completed"
+            assert status["progress"]["pages_crawled"] == 60
+            page = json.loads(await get_crawl_results(job_id, "0"))
+            assert page["results_written"] == 60 and page["complete"]
+            print("  [OK] Job runs in the background and completes")
+
+            started = json.loads(await start_crawl_job(StartCrawlJobInput(
+                url="https://site.test/p0", max_depth=6, max_pages=2000, concurrency=2
+            )))
+            await asyncio.sleep(0.05)
+            cancelled = json.loads(await cancel_job(JobIdInput(job_id=started["job_id"])))
+            assert cancelled["status"] == "cancelled"
+            assert cancelled["progress"]["pages_crawled"] < 200
+            page = json.loads(await get_crawl_results(started["job_id"], "0"))
+            assert page["complete"] and page["results_written"] == cancelled["progress"]["pages_crawled"]
+            print(f"  [OK] Cancelled job kept {page['results_written']} partial results")
+
+        asyncio.run(scenario())
+        return True
+    except Exception as e:
+        print(f"[FAIL] Crawl job error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_batch_jobs():
+    """Test bulk batch jobs reading URLs from files and resources."""
+    print("\nTesting batch jobs...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        import os
+        import tempfile
+        from webscrape_mcp import (
+            StartBatchJobInput, JobIdInput, ExportResultsInput,
+            start_batch_job, get_job_status, get_batch_results, get_scrape_content, export_results,
+            _register_result_log, _finish_result_log
+        )
+
+        pages, webscrape_mcp._fetch_url = _fake_site(page_count=300)
+        missing = [f"https://site.test/missing{i}" for i in range(20)]
+        path = os.path.join(tempfile.mkdtemp(), "urls.txt")
+        with open(path, "w") as f:
+            f.write("# batch input\n\n" + "\n".join(list(pages) + missing + ["ftp://site.test/x"]) + "\n")
+
+        async def run(params):
+            started = json.loads(await start_batch_job(params))
+            assert started["status"] == "running", started
+            while True:
+                status = json.loads(await get_job_status(JobIdInput(job_id=started["job_id"])))
+                if status["status"] != "running":
+                    break
+                await asyncio.sleep(0.01)
+            results, cursor = [], "0"
+            while True:
+                page = json.loads(await get_batch_results(started["job_id"], cursor))
+                results.extend(page["results"])
+                if page["next_cursor"] is None:
+                    break
+                cursor = str(page["next_cursor"])
+            return status, results
+
+        status, results = asyncio.run(run(StartBatchJobInput(url_file=path, concurrency=8)))
+        progress = status["progress"]
+        assert status["status"] == "completed" and progress["urls_done"] == 321 == progress["urls_total"]
+        assert progress["urls_failed"] == 21 and progress["errors_by_type"] == {"http_404": 20, "invalid_url": 1}
+        assert sorted(r["index"] for r in results) == list(range(321)), "Every source line is reported once"
+        assert status["throughput"]["urls_per_second"] > 0
+        ok = next(r for r in results if r["success"])
+        assert "Body" in asyncio.run(get_scrape_content(ok["scrape_id"]))
+        print(f"  [OK] File batch of 321 URLs: {progress['urls_succeeded']} scraped, errors {progress['errors_by_type']}")
+
+        discovery = _register_result_log("discovery")
+        for url in list(pages)[:50]:
+            discovery.append({"url": url, "lastmod": None, "priority": None})
+        _finish_result_log(discovery, {})
+        status, results = asyncio.run(run(StartBatchJobInput(source_uri=f"sitemap://{discovery.run_id}", max_memory_mb=1)))
+        assert status["status"] == "completed" and len(results) == 50 and all(r["success"] for r in results)
+        export = json.loads(asyncio.run(export_results(ExportResultsInput(crawl_id=status["job_id"]))))
+        assert export["rows"] == 50
+        print("  [OK] Batch from a sitemap discovery resource exports like a crawl")
+
+        from webscrape_mcp import _cached_bytes, _evict_from_cache, _store_in_cache
+        _store_in_cache(scrape_id="bytes1", url="https://site.test/utf8", content="页" * 1000)
+        assert _cached_bytes({"scrape_id": "bytes1"}) == 3000, "Memory limits count UTF-8 bytes, not characters"
+        assert _cached_bytes({"url": "https://site.test/failed", "error": "HTTP 500"}) == 0
+        _evict_from_cache("bytes1")
+        print("  [OK] Job memory accounting counts encoded bytes")
+
+        invalid = asyncio.run(start_batch_job(StartBatchJobInput(url_file=path + ".missing")))
+        assert invalid.startswith("Error") and "not found" in invalid
+        print("  [OK] Missing URL sources are rejected up front")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Batch job error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+
+def test_resume_crawl():
+    """Test that an interrupted crawl resumes from its checkpoint without refetching."""
+    print("\nTesting resumable crawls...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        from webscrape_mcp import (
+            start_crawl_job, get_job_status, cancel_job, resume_crawl, get_crawl_results,
+            CrawlSiteInput, StartCrawlJobInput, JobIdInput, ResumeCrawlInput, RESULT_LOGS, JOBS
+        )
+
+        _, fake_fetch = _fake_site(page_count=200, fanout=5)
+        fetched = []
+
+        async def recording_fetch(url, timeout=None, client=None, **kwargs):
+            fetched.append(url)
+            return await fake_fetch(url, timeout, client)
+
+        webscrape_mcp._fetch_url = recording_fetch
+        settings = dict(url="https://site.test/p0", max_depth=6, max_pages=80, concurrency=4)
+        expected = [r["url"] for r in _collect_crawl(CrawlSiteInput(**settings))[0]]
+
+        async def wait_for(job_id, condition):
+            while True:
+                status = json.loads(await get_job_status(JobIdInput(job_id=job_id)))
+                if condition(status):
+                    return status
+                await asyncio.sleep(0.005)
+
+        async def scenario():
+            job_id = json.loads(await start_crawl_job(StartCrawlJobInput(**settings)))["job_id"]
+            await wait_for(job_id, lambda st: st["progress"]["pages_crawled"] >= 20)
+            await cancel_job(JobIdInput(job_id=job_id))
+
+            # Simulate a server restart: all in-memory state is gone
+            RESULT_LOGS.pop(job_id)
+            JOBS.pop(job_id)
+            fetched.clear()
+
+            resumed = json.loads(await resume_crawl(ResumeCrawlInput(crawl_id=job_id)))
+            assert resumed["success"], resumed
+            done = resumed["pages_completed"]
+            assert 20 <= done < 80
+            status = await wait_for(job_id, lambda st: st["status"] != "running")
+            assert status["status"] == "completed"
+
+            cursor, urls = "0", []
+            while cursor is not None:
+                page = json.loads(await get_crawl_results(job_id, cursor))
+                urls.extend(r["url"] for r in page["results"])
+                cursor = page["next_cursor"]
+            assert urls == expected, "Resumed crawl should match an uninterrupted crawl"
+            assert not set(fetched) & set(expected[:done]), "Completed pages should not be refetched"
+            print(f"  [OK] Resumed after {done} pages without refetching them")
+
+            again = json.loads(await resume_crawl(ResumeCrawlInput(crawl_id=job_id)))
+            assert not again["success"], "Completed crawls cannot be resumed"
+            print("  [OK] Completed crawls are not resumed again")
+
+        asyncio.run(scenario())
+        return True
+    except Exception as e:
+        print(f"[FAIL] Resume crawl error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def _sitemap_site():
+    """Build a mock site with robots.txt, a sitemap index and a gzipped sitemap."""
+    import gzip
+    import logging
+    import httpx
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+    def urlset(ids, lastmod):
+        entries = "".join(f"<url><loc>https://site.test/p{i}</loc><lastmod>{lastmod}</lastmod></url>" for i in ids)
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset {ns}>{entries}</urlset>'.encode()
+
+    files = {
+        "/robots.txt": b"User-agent: *\nSitemap: https://site.test/sitemap_index.xml\n",
+        "/sitemap_index.xml": (
+            f'<?xml version="1.0"?><sitemapindex {ns}>'
+            "<sitemap><loc>https://site.test/new.xml</loc><lastmod>2024-06-01</lastmod></sitemap>"
+            "<sitemap><loc>https://site.test/more.xml.gz</loc></sitemap>"
+            "<sitemap><loc>https://site.test/old.xml</loc><lastmod>2019-01-01</lastmod></sitemap>"
+            "</sitemapindex>"
+        ).encode(),
+        "/new.xml": urlset(range(0, 30), "2024-06-01T12:00:00Z"),
+        "/more.xml.gz": gzip.compress(urlset(range(30, 3000), "2024-05-01")[:-len("</urlset>")]
+                                      + b"<url><loc>https://other.test/x</loc></url></urlset>"),
+        "/old.xml": urlset(range(5000, 5010), "2019-01-01"),
+    }
+
+    def handler(request):
+        path = request.url.path
+        if path in files:
+            return httpx.Response(200, content=files[path])
+        if path.startswith("/p"):
+            return httpx.Response(200, text=f"<html><head><title>{path}</title></head><body><a href='/p9999'>x</a></body></html>")
+        return httpx.Response(404)
+
+    return lambda timeout=None, warc=None, http2=False: httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+
+def test_sitemap_discovery():
+    """Test sitemap discovery through robots.txt, nested indexes, gzip and lastmod filtering."""
+    print("\nTesting sitemap discovery...")
+    import webscrape_mcp
+    original = webscrape_mcp._create_http_client
+    try:
+        import asyncio
+        from webscrape_mcp import (
+            discover_sitemap, get_sitemap_urls, crawl_site, DiscoverSitemapInput, CrawlSiteInput
+        )
+
+        webscrape_mcp._create_http_client = _sitemap_site()
+
+        raw = asyncio.run(discover_sitemap(DiscoverSitemapInput(
+            url="https://site.test/", modified_since="2024-01-01", max_urls=50000
+        )))
+        assert len(raw) <= webscrape_mcp.CHARACTER_LIMIT, len(raw)
+        output = json.loads(raw)
+        assert output["urls_inlined"] < 3000 and output["urls"] and "note" in output
+        assert output["sitemap_count"] == 3, output["sitemaps_read"]
+        assert output["urls_found"] == 3000, "Gzipped sitemap URLs should be found, off-domain URLs skipped"
+        assert output["skipped_by_lastmod"] == 1, "The stale child sitemap should be skipped"
+        print(f"  [OK] Found {output['urls_found']} URLs across {output['sitemap_count']} sitemaps")
+
+        cursor, urls = "0", []
+        while cursor is not None:
+            page = json.loads(asyncio.run(get_sitemap_urls(output["discovery_id"], cursor)))
+            urls.extend(entry["url"] for entry in page["results"])
+            cursor = page["next_cursor"]
+        assert len(urls) == 3000 and len(set(urls)) == 3000
+        print("  [OK] All URLs readable from the sitemap resource")
+
+        recent = json.loads(asyncio.run(discover_sitemap(DiscoverSitemapInput(
+            url="https://site.test/", modified_since="2024-05-15"
+        ))))
+        assert recent["urls_found"] == 30, "Only URLs modified after the cutoff should remain"
+        print("  [OK] lastmod filter keeps only recently modified URLs")
+
+        crawl = json.loads(asyncio.run(crawl_site(CrawlSiteInput(
+            url="https://site.test/", discovery="sitemap", max_pages=40, sitemap_modified_since="2024-01-01"
+        ))))
+        crawled = [r["url"] for r in crawl["results"]]
+        assert crawl["pages_crawled"] == 40
+        assert "https://site.test/p9999" not in crawled, "Sitemap mode should not follow page links"
+        assert crawl["frontier_stats"]["sitemap"]["urls_seeded"] == 40
+        print("  [OK] Sitemap crawl mode seeds the frontier from sitemaps")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Sitemap discovery error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._create_http_client = original
+
+def test_incremental_recrawl():
+    """Test that incremental crawls use validators and report added, changed and removed pages."""
+    print("\nTesting incremental recrawl...")
+    import webscrape_mcp
+    original_client = webscrape_mcp._create_http_client
+    original_store = webscrape_mcp.RECRAWL_STORE
+    try:
+        import asyncio
+        import logging
+        import os
+        import tempfile
+        import httpx
+        from webscrape_mcp import crawl_site, CrawlSiteInput, RecrawlStore
+
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        tmpdir = tempfile.mkdtemp()
+        webscrape_mcp.RECRAWL_STORE = RecrawlStore(os.path.join(tmpdir, "recrawl.sqlite"))
+
+        # p0 links to p1..p4; odd pages support ETags, even pages do not
+        pages = {f"/p{i}": f"<html><body>Page {i}</body></html>" for i in range(1, 5)}
+        pages["/p0"] = "<html><body>" + "".join(f'<a href="/p{i}">p</a>' for i in range(1, 5)) + "</body></html>"
+        requests = {"full": 0, "not_modified": 0}
+        failures = {}
+
+        def handler(request):
+            if request.url.path in failures:
+                return httpx.Response(failures[request.url.path])
+            body = pages.get(request.url.path)
+            if body is None:
+                return httpx.Response(404)
+            number = int(request.url.path[2:])
+            etag = f'"{hash(body)}"' if number % 2 else None
+            if etag and request.headers.get("if-none-match") == etag:
+                requests["not_modified"] += 1
+                return httpx.Response(304, headers={"ETag": etag})
+            requests["full"] += 1
+            return httpx.Response(200, text=body, headers={"ETag": etag} if etag else {})
+
+        webscrape_mcp._create_http_client = lambda timeout=None, warc=None, http2=False: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        params = CrawlSiteInput(url="https://docs.test/p0", max_depth=2, max_pages=50, incremental=True)
+
+        def run():
+            return json.loads(asyncio.run(crawl_site(params)))["frontier_stats"]["incremental"]
+
+        first = run()
+        assert first["added"] == 5 and first["removed"] == 0, first
+        print("  [OK] First crawl records every page as added")
+
+        requests.update(full=0, not_modified=0)
+        second = run()
+        assert second["unchanged"] == 5 and second["added"] == second["changed"] == 0, second
+        assert requests["not_modified"] == 2, "Pages with ETags should answer 304"
+        print("  [OK] Unchanged recrawl uses conditional requests and skips conversion")
+
+        pages["/p2"] = "<html><body>Page 2, edited</body></html>"
+        pages["/p3"] = "<html><body>Page 3, edited</body></html>"
+        del pages["/p4"]
+        pages["/p0"] = pages["/p0"].replace('<a href="/p4">p</a>', '<a href="/p5">p</a>')
+        pages["/p5"] = "<html><body>Page 5</body></html>"
+        third = run()
+        assert third["changed"] == 3 and third["added"] == 1 and third["unchanged"] == 1, third
+        assert third["removed"] == 1 and third["removed_urls"] == ["https://docs.test/p4"], third
+        print("  [OK] Changed, added and removed pages are reported")
+
+        failures.update({"/p0": 503, "/p1": 500})
+        outage = run()
+        assert outage["removed"] == 0 and outage["unchanged"] == 3, outage
+        failures.clear()
+        assert run()["unchanged"] == 5, "Records survive a transient outage"
+        print("  [OK] 5xx pages keep their record and their stored links are followed")
+
+        failures["/p1"] = 410
+        gone = run()
+        assert gone["removed"] == 1 and gone["removed_urls"] == ["https://docs.test/p1"], gone
+        print("  [OK] 410 pages are reported removed")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Incremental recrawl error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._create_http_client = original_client
+        webscrape_mcp.RECRAWL_STORE = original_store
+
+def test_url_rules_and_priority():
+    """Test include/exclude URL rules and the priority frontier."""
+    print("\nTesting URL rules and priority frontier...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        from webscrape_mcp import CrawlSiteInput, CrawlFrontier, _create_frontier
+
+        # Noise URLs sort (and so are enqueued) before the docs
+        noise = [f"/archive/tag/t{i}" for i in range(10)] + ["/account/login", "/assets/report.pdf"]
+        docs = [f"/docs/page{i}" for i in range(5)]
+        home = "".join(f'<a href="{path}">{path}</a>' for path in noise)
+        home += "".join(f'<a href="{path}">Guide {i}</a>' for i, path in enumerate(docs))
+
+        async def fake_fetch(url, timeout=None, client=None, **kwargs):
+            path = url.replace("https://blog.test", "")
+            body = home if path == "/" else f"<html><body>{path}</body></html>"
+            return body, 200, {}
+
+        webscrape_mcp._fetch_url = fake_fetch
+        base = dict(url="https://blog.test/", max_depth=1, concurrency=3)
+
+        results, _, stats = _collect_crawl(CrawlSiteInput(
+            **base, max_pages=50, exclude_patterns=["*/tag/*", "*.pdf", "re:/login$"]
+        ))
+        crawled = {r["url"].replace("https://blog.test", "") for r in results}
+        assert crawled == {"/"} | set(docs), crawled
+        assert stats["excluded_by_rules"] == 12
+        print("  [OK] Exclude rules drop tag, login and asset URLs at enqueue time")
+
+        results, _, _ = _collect_crawl(CrawlSiteInput(**base, max_pages=50, include_patterns=["*/docs/*"]))
+        assert len(results) == 6, "Include rules should keep only docs pages (plus the start URL)"
+        print("  [OK] Include rules restrict the crawl")
+
+        results, _, _ = _collect_crawl(CrawlSiteInput(**base, max_pages=6))
+        assert not any("/docs/" in r["url"] for r in results), "Breadth-first order reaches noise pages first"
+        for scorers, extra in [
+            ({"path_prefix": 1.0}, {"priority_path_prefixes": ["/docs/"]}),
+            ({"anchor_keywords": 1.0, "depth": 0.1}, {"priority_keywords": ["guide"]}),
+        ]:
+            results, _, stats = _collect_crawl(CrawlSiteInput(**base, max_pages=6, priority_scorers=scorers, **extra))
+            assert sorted(r["url"] for r in results[1:]) == sorted(f"https://blog.test{d}" for d in docs), scorers
+            assert stats["ordering"] == "priority"
+        print("  [OK] Priority scorers reach the wanted pages first under a small max_pages")
+
+        params = CrawlSiteInput(**base, priority_scorers={"path_prefix": 1.0}, priority_path_prefixes=["/docs/"])
+        frontier = _create_frontier(params)
+        entries = [frontier.push(f"https://blog.test{p}", 1) for p in noise + docs]
+        restored = _create_frontier(params)
+        restored.restore(entries, [f"https://blog.test{docs[0]}"])
+        assert [restored.pop()[0] for _ in range(4)] == [f"https://blog.test{d}" for d in docs[1:]]
+        print("  [OK] Checkpointed scores restore the priority order")
+
+        try:
+            CrawlSiteInput(**base, priority_scorers={"popularity": 1.0})
+            raise AssertionError("Unknown scorers should be rejected")
+        except ValueError:
+            pass
+        print("  [OK] Unknown scorers are rejected")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] URL rules error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_near_duplicates():
+    """Test SimHash near-duplicate flagging and suppression during crawls."""
+    print("\nTesting near-duplicate detection...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import random
+        from webscrape_mcp import CrawlSiteInput, _simhash
+
+        rng = random.Random(7)
+        vocabulary = [f"word{i}" for i in range(2000)]
+
+        def article():
+            return " ".join(rng.choice(vocabulary) for _ in range(1500))
+
+        articles = {f"/a{i}": article() for i in range(4)}
+        listing = article()
+
+        def page(path):
+            # Every listing variant links to two more variants, forming an endless duplicate region
+            if path.startswith("/list"):
+                n = int(path.split("=")[1])
+                links = f'<a href="/list?v={2 * n + 1}">x</a><a href="/list?v={2 * n + 2}">y</a>'
+                return f"<html><body><p>Variant {n}</p><p>{listing}</p>{links}</body></html>"
+            if path == "/":
+                links = "".join(f'<a href="{a}">a</a>' for a in articles) + '<a href="/list?v=0">list</a>'
+                return f"<html><body>{links}</body></html>"
+            return f"<html><body><p>{articles[path]}</p></body></html>"
+
+        async def fake_fetch(url, timeout=None, client=None, **kwargs):
+            return page(url.replace("https://shop.test", "")), 200, {}
+
+        webscrape_mcp._fetch_url = fake_fetch
+
+        near = _simhash(f"Variant 1 {listing}") ^ _simhash(f"Variant 2 {listing}")
+        far = _simhash(articles["/a0"]) ^ _simhash(articles["/a1"])
+        assert near.bit_count() <= 3 < far.bit_count(), (near.bit_count(), far.bit_count())
+        print(f"  [OK] SimHash distance: variants {near.bit_count()} bits, distinct pages {far.bit_count()} bits")
+
+        base = dict(url="https://shop.test/", max_depth=10, max_pages=60, concurrency=4)
+        plain, _, _ = _collect_crawl(CrawlSiteInput(**base))
+        assert len(plain) == 60, "Without detection the duplicate region consumes the budget"
+
+        flagged, _, stats = _collect_crawl(CrawlSiteInput(**base, near_duplicates="flag"))
+        marked = [r for r in flagged if "near_duplicate_of" in r]
+        variants = [r for r in flagged if "/list" in r["url"]]
+        assert len(flagged) == 60 and stats["near_duplicates"]["flagged"] == len(marked)
+        assert len(marked) >= 0.8 * len(variants), f"{len(marked)} of {len(variants)} variants flagged"
+        assert all("/list" in r["near_duplicate_of"] and r["similarity"] >= 0.95 for r in marked)
+        assert not any("near_duplicate_of" in r for r in flagged if "/a" in r["url"])
+        print(f"  [OK] Flag mode marks {len(marked)} of {len(variants)} listing variants")
+
+        suppressed, _, stats = _collect_crawl(CrawlSiteInput(**base, near_duplicates="suppress"))
+        dropped = [r for r in suppressed if r.get("suppressed")]
+        assert len(suppressed) < 20, "Suppressed pages should not expand the duplicate region"
+        assert dropped and all("scrape_id" not in r for r in dropped)
+        assert all(r.get("scrape_id") for r in suppressed if "/a" in r["url"])
+        print(f"  [OK] Suppress mode stops after {len(suppressed)} pages instead of exhausting max_pages")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Near-duplicate error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_crawler_traps():
+    """Test that calendar, repeating-path and query-explosion traps are cut off and logged."""
+    print("\nTesting crawler trap detection...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        from webscrape_mcp import CrawlSiteInput, TrapDetector, crawl_site, get_crawl_traps
+
+        def page(path):
+            if path == "/":
+                links = '<a href="/calendar/2024/1">cal</a><a href="/loop/">loop</a><a href="/shop?page=1">shop</a>'
+            elif path.startswith("/calendar/"):
+                # Every month links to the next one, forever
+                year, month = (int(part) for part in path.split("/")[2:4])
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                links = f'<a href="/calendar/{year}/{month}">next</a>'
+            elif path.startswith("/loop/"):
+                links = '<a href="loop/">deeper</a>'  # Relative link that nests endlessly
+            else:
+                n = int(path.split("=")[1])
+                links = f'<a href="/shop?page={n + 1}">more</a><a href="/shop?page={n}&sort=a&view=b&c=1&d=2&e=3&f=4&g=5&h=6&i=7&j=8">filter</a>'
+            return f"<html><body><p>{path}</p>{links}</body></html>"
+
+        async def fake_fetch(url, timeout=None, client=None, **kwargs):
+            return page(url.replace("https://trap.test", "")), 200, {}
+
+        webscrape_mcp._fetch_url = fake_fetch
+
+        params = dict(url="https://trap.test/", max_depth=20, max_pages=500, concurrency=4,
+                      trap_template_budget=20, trap_max_query_variants=15,
+                      trap_template_budgets={"/calendar/*/*": 12})
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(**params))))
+        stats = output["frontier_stats"]
+        urls = [r["url"] for r in output["results"]]
+        assert sum("/calendar/" in u for u in urls) == 12, "Calendar should stop at its explicit budget"
+        assert sum("/loop/" in u for u in urls) == 3, "Repeating segments should stop at the repeat limit"
+        assert sum("/shop" in u for u in urls) == 15, "Query variants should stop at the per-path limit"
+        assert output["pages_crawled"] < 40, output["pages_crawled"]
+        reasons = stats["trap_reasons"]
+        assert {"template_budget", "segment_repeat", "query_params", "query_variants"} <= set(reasons), reasons
+        print(f"  [OK] Traps stopped a 500-page budget after {output['pages_crawled']} pages: {reasons}")
+
+        traps = json.loads(asyncio.run(get_crawl_traps(output["crawl_id"], "0")))
+        assert traps["complete"] and traps["results_written"] == stats["trapped_urls"]
+        assert all(entry["url"] and entry["reason"] and entry["detail"] for entry in traps["results"])
+        assert output["traps_uri"] == f"crawl://{output['crawl_id']}/traps/0"
+        print(f"  [OK] Trap log lists all {stats['trapped_urls']} suppressed URLs with reasons")
+
+        detector = TrapDetector(CrawlSiteInput(url="https://trap.test/"))
+        assert all(detector.check(f"https://trap.test/product/{i}?page={i}") is None for i in range(2000))
+        assert detector.check("https://trap.test/a/b/a/b/a/b/a/b") == "segment_repeat"
+        print("  [OK] Template and query-variant budgets are off by default; structural rules stay on")
+
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(**{**params, "trap_detection": False, "max_pages": 60}))))
+        assert output["pages_crawled"] == 60 and output["traps_uri"] is None
+        print("  [OK] Without trap detection the traps consume the page budget")
+
+        try:
+            CrawlSiteInput(url="https://trap.test/", trap_template_budgets={"calendar/*": 5})
+            raise AssertionError("Relative template glob should be rejected")
+        except ValueError:
+            print("  [OK] Template globs must be absolute paths")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Crawler trap error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_link_graph():
+    """Test the crawl link graph: degrees, orphans, broken links and PageRank."""
+    print("\nTesting crawl link graph...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        import random
+        import time
+        from webscrape_mcp import CrawlSiteInput, LinkGraph, crawl_site, get_crawl_graph, get_crawl_graph_view
+
+        site = {
+            "/": ["/hub", "/a", "/b"],
+            "/hub": ["/a", "/b", "/c", "/missing"],
+            "/a": ["/hub"],
+            "/b": ["/hub", "/missing"],
+            "/c": ["/hub", "/deep"],
+            "/deep": ["/hub", "/leaf"],
+        }
+
+        async def fake_fetch(url, timeout=None, client=None, **kwargs):
+            path = url.replace("https://graph.test", "")
+            if path not in site:
+                raise Exception(f"HTTP 404: {url}")
+            links = "".join(f'<a href="{link}">x</a>' for link in site[path] + [path])
+            return f"<html><body><p>{path}</p>{links}</body></html>", 200, {}
+
+        webscrape_mcp._fetch_url = fake_fetch
+
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(url="https://graph.test/", max_depth=3))))
+        crawl_id = output["crawl_id"]
+        assert output["graph_uri"] == f"crawl://{crawl_id}/graph"
+        summary = json.loads(asyncio.run(get_crawl_graph(crawl_id)))
+        assert summary["pages_crawled"] == 7 and summary["uncrawled_targets"] == 1, summary
+        assert summary["edges"] == 14, "Self-links are dropped"
+        assert summary["top_pages"][0]["url"] == "https://graph.test/hub"
+        assert abs(sum(p["pagerank"] for p in summary["top_pages"]) - 1.0) < 1e-6
+        print(f"  [OK] Graph of {summary['nodes']} nodes / {summary['edges']} edges, hub ranked first")
+
+        pages = json.loads(asyncio.run(get_crawl_graph_view(crawl_id, "pages", "0")))["pages"]
+        hub = next(p for p in pages if p["url"].endswith("/hub"))
+        assert (hub["in_degree"], hub["out_degree"]) == (5, 4)
+        deep = next(p for p in pages if p["url"].endswith("/deep"))
+        assert deep["out_degree"] == 2, "Pages at max_depth still record their out-links"
+        broken = json.loads(asyncio.run(get_crawl_graph_view(crawl_id, "broken", "0")))
+        assert sorted(b["source"] for b in broken["broken"]) == ["https://graph.test/b", "https://graph.test/hub"]
+        assert all("404" in b["error"] for b in broken["broken"])
+        print("  [OK] Degrees and broken links are reported per page")
+
+        graph = LinkGraph("https://s.test/")
+        graph.add_page("https://s.test/", ["https://s.test/x"])
+        graph.add_page("https://s.test/x", ["https://s.test/"])
+        graph.add_page("https://s.test/sitemap-only", [])
+        assert [graph.urls[n] for n in graph.analyze()["orphans"]] == ["https://s.test/sitemap-only"]
+        print("  [OK] Pages nothing links to are orphans")
+
+        rng = random.Random(3)
+        big = LinkGraph("https://big.test/p0")
+        for i in range(10000):
+            big.add_page(f"https://big.test/p{i}", [f"https://big.test/p{rng.randrange(12000)}" for _ in range(10)])
+        started = time.perf_counter()
+        analysis = big.analyze()
+        elapsed = time.perf_counter() - started
+        assert len(analysis["pages"]) == 10000 and abs(sum(analysis["rank"].values()) - 1.0) < 1e-6
+        assert elapsed < 5.0
+        print(f"  [OK] 10k-page graph ({len(big.targets)} edges, {len(big.targets) * 4 // 1024} KB) analyzed in {elapsed * 1000:.0f} ms")
+
+        if webscrape_mcp.numpy is not None:
+            numpy_module, webscrape_mcp.numpy = webscrape_mcp.numpy, None
+            try:
+                python_analysis = big.snapshot()
+                python_analysis._analysis = None
+                python_analysis = python_analysis.analyze()
+            finally:
+                webscrape_mcp.numpy = numpy_module
+            assert all(abs(python_analysis["rank"][n] - analysis["rank"][n]) < 1e-9 for n in analysis["rank"])
+            assert python_analysis["orphans"] == analysis["orphans"]
+            assert all(python_analysis["in_degree"][n] == analysis["in_degree"][n] for n in analysis["rank"])
+            print("  [OK] numpy and pure-Python PageRank agree")
+
+        big.add_page("https://big.test/p0", ["https://big.test/p1"])
+
+        async def read_while_crawling():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            reading = asyncio.create_task(big.analyze_async())
+            await asyncio.sleep(0)
+            big.add_page("https://big.test/late", ["https://big.test/p0"])
+            snapshot = await reading
+            ticker.cancel()
+            return ticks, snapshot
+
+        ticks, snapshot = asyncio.run(read_while_crawling())
+        assert ticks > 0, "Analysis runs off the event loop"
+        assert "https://big.test/late" not in snapshot.ids and snapshot._analysis is not None
+        assert big._analysis is None, "A stale analysis is not cached on the live graph"
+        print(f"  [OK] Analysis ran in a thread while the loop ticked {ticks} times; stale result not cached")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Link graph error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_export_results():
+    """Test streaming crawl exports to JSONL, gzip JSONL and Parquet."""
+    print("\nTesting crawl export...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        import gzip
+        import importlib.util
+        from webscrape_mcp import CrawlSiteInput, ExportResultsInput, crawl_site, export_results
+
+        _, webscrape_mcp._fetch_url = _fake_site()
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(url="https://site.test/p0", max_depth=3, max_pages=30))))
+        crawl_id = output["crawl_id"]
+
+        export = json.loads(asyncio.run(export_results(ExportResultsInput(crawl_id=crawl_id))))
+        assert export["success"] and export["complete"] and export["rows"] == 30
+        with open(export["path"], encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        assert [r["url"] for r in rows] == [r["url"] for r in output["results"]]
+        assert all(r["title"] and r["metadata"]["title"] == r["title"] and "Body" in r["content"] for r in rows)
+        print(f"  [OK] JSONL export wrote {export['rows']} pages with metadata and content")
+
+        gz = json.loads(asyncio.run(export_results(ExportResultsInput(
+            crawl_id=crawl_id, compression="gzip", include_content=False, filename="slim.jsonl.gz"
+        ))))
+        with gzip.open(gz["path"], "rt", encoding="utf-8") as f:
+            slim = [json.loads(line) for line in f]
+        assert gz["path"].endswith("slim.jsonl.gz") and len(slim) == 30
+        assert all(r["content"] is None and r["metadata"] for r in slim)
+        print(f"  [OK] Gzip export without content is {gz['file_bytes']} bytes vs {export['file_bytes']}")
+
+        result = asyncio.run(export_results(ExportResultsInput(crawl_id=crawl_id, compression="zstd")))
+        assert result.startswith("Error") and "gzip" in result
+        try:
+            ExportResultsInput(crawl_id=crawl_id, filename="../escape.jsonl")
+            raise AssertionError("Paths outside the export directory should be rejected")
+        except ValueError:
+            pass
+        print("  [OK] Invalid compression and file names are rejected")
+
+        result = asyncio.run(export_results(ExportResultsInput(crawl_id=crawl_id, format="parquet", compression="zstd")))
+        if importlib.util.find_spec("pyarrow") is None:
+            assert result.startswith("Error") and "pip install pyarrow" in result
+            print("  [OK] Parquet export reports the missing pyarrow dependency")
+        else:
+            import pyarrow.parquet as pq
+            table = pq.read_table(json.loads(result)["path"])
+            assert table.num_rows == 30 and table.column("url").to_pylist() == [r["url"] for r in rows]
+            print("  [OK] Parquet export round-trips through pyarrow")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Export error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+def test_warc_archive():
+    """Test WARC capture of crawls and batches and offline replay."""
+    print("\nTesting WARC archives...")
+    import webscrape_mcp
+    original = webscrape_mcp._create_http_client
+    try:
+        import asyncio
+        import base64
+        import gzip
+        import hashlib
+        import logging
+        import httpx
+        from webscrape_mcp import (
+            CrawlSiteInput, ScrapeMultipleUrlsInput, ReplayWarcInput, WarcRecordingTransport,
+            crawl_site, scrape_multiple_urls, replay_warc, _iter_warc_records, _parse_http_response, get_scrape_content
+        )
+
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        article = gzip.compress(b"<html><head><title>Article</title></head><body><p>Archived words</p></body></html>")
+
+        def handler(request):
+            path = request.url.path
+            if path == "/":
+                return httpx.Response(200, html='<a href="/a">a</a><a href="/old">old</a><a href="/missing">m</a>')
+            if path == "/a":
+                return httpx.Response(200, content=article, headers={"Content-Encoding": "gzip", "Content-Type": "text/html"})
+            if path == "/old":
+                return httpx.Response(301, headers={"Location": "/b"})
+            if path == "/b":
+                return httpx.Response(200, html="<html><head><title>B</title></head><body>Moved here</body></html>")
+            return httpx.Response(404, text="gone")
+
+        def client_factory(timeout=None, warc=None, http2=False):
+            transport = httpx.MockTransport(handler)
+            if warc is not None:
+                transport = WarcRecordingTransport(warc, transport)
+            return httpx.AsyncClient(transport=transport, follow_redirects=True)
+
+        webscrape_mcp._create_http_client = client_factory
+
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(url="https://warc.test/", max_depth=1, warc=True))))
+        warc_id = output["warc_id"]
+        assert warc_id == output["crawl_id"]
+        path = f"{webscrape_mcp.WARC_DIR}/{warc_id}.warc.gz"
+        records = list(_iter_warc_records(path))
+        types = [h["warc-type"] for h, _ in records]
+        assert types[0] == "warcinfo" and types.count("response") == types.count("request") == 5, types
+        stored = next(b for h, b in records if h.get("warc-target-uri") == "https://warc.test/a" and h["warc-type"] == "response")
+        status, headers, body = _parse_http_response(stored)
+        assert status == 200 and body == article, "Body is archived as received, still gzip-encoded"
+        digest = next(h["warc-payload-digest"] for h, b in records if b is stored)
+        assert digest == "sha1:" + base64.b32encode(hashlib.sha1(article).digest()).decode()
+        print(f"  [OK] Crawl archived {types.count('response')} exchanges (incl. redirect and 404) byte-exact")
+
+        webscrape_mcp._create_http_client = None  # Replay must not touch the network
+        replay = json.loads(asyncio.run(replay_warc(ReplayWarcInput(warc_id=warc_id, response_format="text"))))
+        by_url = {r["url"]: r for r in replay["results"]}
+        assert set(by_url) == {"https://warc.test/", "https://warc.test/a", "https://warc.test/b", "https://warc.test/missing"}
+        assert not by_url["https://warc.test/missing"]["success"]
+        replayed = asyncio.run(get_scrape_content(by_url["https://warc.test/a"]["scrape_id"]))
+        assert "Archived words" in replayed and "<p>" not in replayed
+        print("  [OK] Replay re-extracts archived pages in a new format without network access")
+
+        webscrape_mcp._create_http_client = client_factory
+        batch = json.loads(asyncio.run(scrape_multiple_urls(ScrapeMultipleUrlsInput(
+            urls=["https://warc.test/a", "https://warc.test/b"], warc=True
+        ))))
+        assert batch["warc_records"] == 5 and all(r["success"] for r in batch["results"])
+        with open(f"{webscrape_mcp.WARC_DIR}/{batch['warc_id']}.warc.gz", "ab") as f:
+            f.write(gzip.compress(b"WARC/1.1\r\nContent-Length: 999\r\n\r\ntorn")[:-6])
+        replay = json.loads(asyncio.run(replay_warc(ReplayWarcInput(warc_id=batch["warc_id"], urls=["https://warc.test/b"]))))
+        assert replay["records_replayed"] == 1 and replay["results"][0]["metadata_uri"]
+        print("  [OK] Batch archive replays by URL and tolerates a torn final record")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] WARC error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._create_http_client = original
+
+def test_distributed_crawl():
+    """Test multi-process crawl jobs sharing a SQLite frontier."""
+    print("\nTesting distributed crawls...")
+    import webscrape_mcp
+    original_cache = webscrape_mcp.SHARED_CACHE
+    server = None
+    try:
+        import asyncio
+        import os
+        import tempfile
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from webscrape_mcp import (
+            StartCrawlJobInput, JobIdInput, SharedFrontier,
+            start_crawl_job, get_job_status, get_crawl_results, get_scrape_content
+        )
+
+        hits = {}
+        active = [0, 0]  # Requests in flight, peak
+        lock = threading.Lock()
+
+        class Site(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with lock:
+                    hits[self.path] = hits.get(self.path, 0) + 1
+                    active[0] += 1
+                    active[1] = max(active)
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+                page = int(self.path.strip("/p") or 0)
+                links = "".join(f'<a href="/p{(page * 4 + i) % 80}">x</a>' for i in range(1, 5))
+                body = f"<html><head><title>Page {page}</title></head><body><p>Words of page {page}</p>{links}</body></html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        async def run_job():
+            started = json.loads(await start_crawl_job(StartCrawlJobInput(
+                url=f"{base}/p0", max_depth=6, max_pages=50, workers=3, concurrency=4, per_host_limit=3
+            )))
+            job_id = started["job_id"]
+            deadline = time.monotonic() + 90
+            while time.monotonic() < deadline:
+                status = json.loads(await get_job_status(JobIdInput(job_id=job_id)))
+                if status["status"] != "running":
+                    break
+                await asyncio.sleep(0.1)
+            results = json.loads(await get_crawl_results(job_id, "0"))["results"]
+            content = await get_scrape_content(results[-1]["scrape_id"])
+            return status, results, content
+
+        status, results, content = asyncio.run(run_job())
+        assert status["status"] == "completed", status
+        assert status["progress"]["pages_crawled"] == 50 and len(results) == 50
+        urls = [r["url"] for r in results]
+        assert len(set(urls)) == 50 and all(hits[u[len(base):]] == 1 for u in urls), "Each page is fetched once"
+        assert status["frontier_stats"]["workers"] == 3 and status["frontier_stats"]["seen_filter"] == "sqlite"
+        assert results[-1]["title"] in content or "Words of page" in content
+        assert webscrape_mcp.SHARED_CACHE is original_cache, "Distributed jobs must not install a global shared cache"
+        print("  [OK] 3 worker processes crawled 50 distinct pages exactly once; content readable in the parent")
+        assert active[1] <= 3, f"per_host_limit=3 across 3 workers, peak {active[1]}"
+        print(f"  [OK] Workers share per_host_limit (peak {active[1]} requests in flight)")
+
+        params = StartCrawlJobInput(url="https://lease.test/")
+        path = os.path.join(tempfile.mkdtemp(), "frontier.sqlite")
+        frontier = SharedFrontier(path, params, lease_seconds=0.05)
+        frontier.push("https://lease.test/", 0, ignore_rules=True)
+        assert frontier.lease("a", 10) == [("https://lease.test/", 0)]
+        assert frontier.lease("b", 10) == [] and not frontier.finished()
+        time.sleep(0.1)
+        assert frontier.lease("b", 10) == [("https://lease.test/", 0)], "Expired lease is taken over"
+        page = {"url": "https://lease.test/", "depth": 0}
+        assert not frontier.complete("a", page, ["https://lease.test/x"]), "Stale commit is discarded"
+        assert frontier.complete("b", page, ["https://lease.test/x"])
+        assert len(frontier.read_results(0)) == 1 and len(frontier) == 1
+        assert frontier.stats()["lease_expiries"] == 1
+        print("  [OK] Expired leases are re-issued and stale commits ignored")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Distributed crawl error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp.SHARED_CACHE = original_cache
+        if server is not None:
+            server.shutdown()
+
+
+def test_scrape_core():
+    """Test the shared scrape core used by the single and batch scrape tools."""
+    print("\nTesting shared scrape core...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    original_input = webscrape_mcp.ScrapeUrlInput
+    try:
+        import asyncio
+        from webscrape_mcp import (
+            ScrapeOptions, ScrapeUrlInput, ScrapeMultipleUrlsInput, ResponseFormat,
+            scrape_url, scrape_multiple_urls, _scrape_result
+        )
+
+        pages, webscrape_mcp._fetch_url = _fake_site(page_count=5)
+        options = ScrapeOptions.from_params(ScrapeMultipleUrlsInput(urls=["https://site.test/p0"], response_format="text"))
+        assert options == ScrapeOptions(response_format=ResponseFormat.TEXT), "Batch inputs carry no link/image options"
+
+        result = asyncio.run(_scrape_result("https://site.test/p1", options))
+        assert isinstance(result, dict) and result["success"] and result["format"] == "text"
+        single = json.loads(asyncio.run(scrape_url(ScrapeUrlInput(url="https://site.test/p1", response_format="text"))))
+        assert set(single) == set(result), "Single and batch scrapes return the same response shape"
+        print("  [OK] Scrape core returns plain dicts shared by both tools")
+
+        def no_per_url_input(*args, **kwargs):
+            raise AssertionError("Batch scrapes must not validate a ScrapeUrlInput per URL")
+
+        webscrape_mcp.ScrapeUrlInput = no_per_url_input
+        urls = list(pages) + ["https://site.test/missing"]
+        output = json.loads(asyncio.run(scrape_multiple_urls(ScrapeMultipleUrlsInput(urls=urls))))
+        assert [r["url"] for r in output["results"]] == urls, "Results keep input order"
+        assert [r["success"] for r in output["results"]] == [True] * 5 + [False]
+        assert output["results"][-1]["error"] == "HTTP 404: https://site.test/missing"
+        print("  [OK] Batch scrapes skip per-URL validation and JSON round-trips")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Scrape core error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+        webscrape_mcp.ScrapeUrlInput = original_input
+
+
+def test_batch_deadlines():
+    """Test completion-ordered batch results with overall and per-URL deadlines."""
+    print("\nTesting batch deadlines...")
+    import webscrape_mcp
+    original = webscrape_mcp._fetch_url
+    try:
+        import asyncio
+        from webscrape_mcp import ScrapeMultipleUrlsInput, scrape_multiple_urls, get_batch_results
+
+        delays = {"https://slow.test/a": 0.3, "https://slow.test/b": 0.05, "https://slow.test/c": 5.0, "https://slow.test/d": 0.0}
+
+        async def fake_fetch(url, timeout=None, client=None, **kwargs):
+            await asyncio.sleep(delays[url])
+            return f"<html><head><title>{url}</title></head><body>Body</body></html>", 200, {}
+
+        class Context:
+            def __init__(self):
+                self.events = []
+
+            async def report_progress(self, progress, total, message):
+                self.events.append(json.loads(message)["url"])
+
+        webscrape_mcp._fetch_url = fake_fetch
+        urls = list(delays)
+        ctx = Context()
+        output = json.loads(asyncio.run(scrape_multiple_urls(
+            ScrapeMultipleUrlsInput(urls=urls, deadline_seconds=0.6, url_timeout_seconds=1.0), ctx
+        )))
+        assert ctx.events == ["https://slow.test/d", "https://slow.test/b", "https://slow.test/a"], ctx.events
+        assert [r["url"] for r in output["results"]] == urls, "Response keeps input order"
+        assert output["results"][2]["status"] == "pending" and output["deadline_hit"]
+        assert output["finished"] == 3 and output["pending"] == 1 and output["elapsed_seconds"] < 1.0
+        assert output["first_result_seconds"] < 0.3
+        streamed = json.loads(asyncio.run(get_batch_results(output["batch_id"], "0")))
+        assert [r["index"] for r in streamed["results"]] == [3, 1, 0] and streamed["complete"]
+        print("  [OK] Results stream in completion order; deadline returns partial results with pending markers")
+
+        output = json.loads(asyncio.run(scrape_multiple_urls(
+            ScrapeMultipleUrlsInput(urls=urls, url_timeout_seconds=0.1)
+        )))
+        statuses = [r.get("status") for r in output["results"]]
+        assert statuses == ["timed_out", None, "timed_out", None] and output["timed_out"] == 2
+        assert not output["deadline_hit"] and output["elapsed_seconds"] < 1.0
+        print("  [OK] Per-URL deadline marks slow URLs timed out")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Batch deadline error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        webscrape_mcp._fetch_url = original
+
+
+def test_host_scheduling():
+    """Test per-origin scheduling and connection reuse in batches and crawls."""
+    print("\nTesting host-grouped scheduling...")
+    server = None
+    try:
+        import asyncio
+        import importlib.util
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import webscrape_mcp
+        from webscrape_mcp import (
+            HostScheduler, ConnectionStats, ScrapeMultipleUrlsInput, StartBatchJobInput, CrawlSiteInput,
+            scrape_multiple_urls, crawl_site
+        )
+
+        active = {}
+        peaks = {}
+        overlap = [0]  # Peak requests in flight across all origins
+        lock = threading.Lock()
+
+        class Site(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so connections can be reused
+
+            def do_GET(self):
+                host = self.headers["Host"].split(":")[0]
+                with lock:
+                    active[host] = active.get(host, 0) + 1
+                    peaks[host] = max(peaks.get(host, 0), active[host])
+                    overlap[0] = max(overlap[0], sum(active.values()))
+                time.sleep(0.05)
+                if self.path == "/mix":
+                    # Links to one origin, then to another served by this server
+                    links = "".join(
+                        f'<a href="http://{host}:{self.server.server_address[1]}/p{i}">x</a>'
+                        for host in ("127.0.0.1", "localhost") for i in range(1, 7)
+                    )
+                    page = "mix"
+                else:
+                    page = int(self.path.strip("/p") or 0)
+                    links = "".join(f'<a href="/p{(page * 3 + i) % 30}">x</a>' for i in range(1, 4))
+                body = f"<html><head><title>Page {page}</title></head><body>{links}</body></html>".encode()
+                with lock:
+                    active[host] -= 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        scheduler = HostScheduler(
+            iter(enumerate(["https://a.test/1", "https://a.test/2", "https://a.test/3", "https://b.test/1"])), 2, 10
+        )
+        order = [scheduler.next() for _ in range(4)]
+        assert [item[1] for item in order[:3]] == ["https://a.test/1", "https://b.test/1", "https://a.test/2"]
+        sorted_source = [f"https://a.test/{i}" for i in range(10)] + ["https://b.test/1", "https://b.test/2"]
+        scheduler_sorted = HostScheduler(iter(enumerate(sorted_source)), 2, 3, 20)
+        taken = [scheduler_sorted.next()[1] for _ in range(4)]
+        assert taken == ["https://a.test/0", "https://a.test/1", "https://b.test/1", "https://b.test/2"], taken
+        assert order[3] is None, "a.test is at its limit and b.test has nothing left"
+        scheduler.release("https://a.test")
+        assert scheduler.next() == (2, "https://a.test/3", "https://a.test") and scheduler.next() is None
+        print("  [OK] Scheduler takes origins in turn and holds back origins at their limit")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        urls = [f"http://127.0.0.1:{port}/p{i}" for i in range(16)] + [f"http://localhost:{port}/p{i}" for i in range(4)]
+
+        output = json.loads(asyncio.run(scrape_multiple_urls(ScrapeMultipleUrlsInput(urls=urls, per_host_limit=2))))
+        assert output["finished"] == 20 and all(r["success"] for r in output["results"])
+        assert peaks == {"127.0.0.1": 2, "localhost": 2}, peaks
+        connections = output["connections"]
+        assert connections["requests"] == 20 and connections["connections_opened"] <= 4, connections
+        print(f"  [OK] 20 URLs over 2 origins used {connections['connections_opened']} connections, at most 2 per origin")
+
+        async def run_batch():
+            results = []
+
+            async def on_result(result):
+                results.append(result)
+
+            stats = ConnectionStats()
+            async with webscrape_mcp._create_http_client() as client:
+                stats.attach(client)
+                await webscrape_mcp._run_batch(
+                    StartBatchJobInput(urls=urls, concurrency=8, per_host_limit=3), iter(urls), on_result, client
+                )
+            return results, stats.summary()
+
+        peaks.clear()
+        results, connections = asyncio.run(run_batch())
+        assert sorted(r["index"] for r in results) == list(range(20)) and peaks == {"127.0.0.1": 3, "localhost": 3}, peaks
+        assert connections["connections_opened"] <= 6 and connections["requests_per_connection"] >= 3, connections
+        print("  [OK] Batch jobs share the per-origin limit and connection accounting")
+
+        peaks.clear()
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(
+            url=f"http://127.0.0.1:{port}/p0", max_pages=12, concurrency=5, per_host_limit=3
+        ))))
+        assert output["pages_crawled"] == 12 and peaks == {"127.0.0.1": 3}, (output.get("pages_crawled"), peaks)
+        assert output["frontier_stats"]["connections"]["connections_opened"] <= 3
+        print("  [OK] Crawls cap pages in flight per origin and reuse connections")
+
+        peaks.clear()
+        overlap[0] = 0
+        output = json.loads(asyncio.run(crawl_site(CrawlSiteInput(
+            url=f"http://127.0.0.1:{port}/mix", max_depth=1, max_pages=13, concurrency=4,
+            per_host_limit=1, same_domain_only=False
+        ))))
+        depths = [r["depth"] for r in output["results"]]
+        assert output["pages_crawled"] == 13 and depths == sorted(depths), depths
+        assert peaks == {"127.0.0.1": 1, "localhost": 1} and overlap[0] == 2, (peaks, overlap)
+        print("  [OK] A saturated origin does not block the others; results keep BFS order")
+
+        assert webscrape_mcp._host_limit(CrawlSiteInput(url="https://a.test/", concurrency=12)) == 12
+
+        if importlib.util.find_spec("h2") is None:
+            output = asyncio.run(scrape_multiple_urls(ScrapeMultipleUrlsInput(urls=urls[:1], http2=True)))
+            assert "requires the h2 package" in output, output
+            print("  [OK] HTTP/2 without h2 reports how to install it")
+
+        return True
+    except Exception as e:
+        print(f"[FAIL] Host scheduling error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
 def test_tool_count():
     """Count the number of tools registered."""
     print("\nTesting tool count...")
@@ -75,11 +1726,11 @@ def test_tool_count():
         print(f"  Found {tool_count} tools")
         print(f"  Found {resource_count} resources")
 
-        # Should have 8 tools (6 original + 2 discovery)
-        assert tool_count == 8, f"Expected 8 tools, found {tool_count}"
+        # Should have 18 tools (6 original + 2 discovery + 10 cache/crawl)
+        assert tool_count == 18, f"Expected 18 tools, found {tool_count}"
 
-        # Should have 2 resources
-        assert resource_count == 2, f"Expected 2 resources, found {resource_count}"
+        # Should have 12 resources
+        assert resource_count == 12, f"Expected 12 resources, found {resource_count}"
 
         print("[OK] Correct number of tools and resources")
         return True
@@ -200,6 +1851,32 @@ def run_all_tests():
     tests = [
         ("Imports", test_imports),
         ("Cache Functions", test_cache_functions),
+        ("Cache Expiry", test_cache_expiry),
+        ("Content Dedup", test_content_dedup),
+        ("Content Ranges", test_content_ranges),
+        ("Binary Screenshots", test_binary_screenshot_storage),
+        ("Metadata Pages", test_metadata_and_list_pages),
+        ("Multi-Get", test_get_scrapes),
+        ("Sharded Cache", test_sharded_cache_threads),
+        ("Shared Cache", test_shared_cache),
+        ("Concurrent Crawl", test_concurrent_crawl_order),
+        ("Frontier Dedup", test_frontier_dedup),
+        ("Streamed Crawl", test_streamed_crawl_results),
+        ("Crawl Jobs", test_crawl_jobs),
+        ("Batch Jobs", test_batch_jobs),
+        ("Resume Crawl", test_resume_crawl),
+        ("Sitemap Discovery", test_sitemap_discovery),
+        ("Incremental Recrawl", test_incremental_recrawl),
+        ("URL Rules", test_url_rules_and_priority),
+        ("Near Duplicates", test_near_duplicates),
+        ("Crawler Traps", test_crawler_traps),
+        ("Link Graph", test_link_graph),
+        ("Export Results", test_export_results),
+        ("WARC Archive", test_warc_archive),
+        ("Distributed Crawl", test_distributed_crawl),
+        ("Scrape Core", test_scrape_core),
+        ("Batch Deadlines", test_batch_deadlines),
+        ("Host Scheduling", test_host_scheduling),
         ("Tool Count", test_tool_count),
         ("Resource URIs", test_resource_uri_in_tools),
         ("Discovery Tools", test_discovery_tools),
@@ -0,0 +1,18 @@
+/**
+ * Cancel a running background crawl or batch job
+ *
+ * Results written before cancellation stay readable from the job's
+ * results resource. Cancelling a finished job has no effect.
+ *
+ * @category jobs
+ * @returns_resource false
+ */
+import type { GetJobStatusResult } from './get_job_status';
+
+export interface CancelJobParams {
+  /** Job ID returned by webscrape_start_crawl_job or webscrape_start_batch_job */
+  job_id: string;
+}
+
+/** Final status of the job after cancellation */
+export type CancelJobResult = GetJobStatusResult;
@@ -13,16 +13,88 @@ export interface CrawlSiteParams {
   url: string;
 
   /** Maximum crawl depth (0 = only start URL, 1 = start + direct links, etc.) */
-  max_depth?: number; // 0-5, default 2
+  max_depth?: number; // 0-20, default 2
 
   /** Maximum number of pages to crawl */
-  max_pages?: number; // 1-100, default 20
+  max_pages?: number; // 1-50000, default 20
 
   /** Only crawl URLs from the same domain */
   same_domain_only?: boolean;
 
   /** Output format for crawled pages */
   response_format?: "markdown" | "html" | "text" | "json";
+
+  /** Number of pages fetched in parallel */
+  concurrency?: number; // 1-20, default 5
+
+  /** Seen-URL filter: exact set, or Bloom filter for bounded memory */
+  dedup_filter?: "exact" | "bloom";
+
+  /** Target false-positive rate when dedup_filter is "bloom" */
+  bloom_false_positive_rate?: number; // default 0.001
+
+  /** How to find pages: follow links, seed from sitemaps only, or both */
+  discovery?: "links" | "sitemap" | "both"; // default "links"
+
+  /** Only seed sitemap URLs whose lastmod is on or after this ISO date/time */
+  sitemap_modified_since?: string;
+
+  /** Only refetch and convert pages changed since the last crawl from this URL */
+  incremental?: boolean;
+
+  /** Only enqueue URLs matching a pattern: glob over the full URL, or regex prefixed with "re:" */
+  include_patterns?: string[];
+
+  /** Never enqueue URLs matching any of these patterns */
+  exclude_patterns?: string[];
+
+  /** Crawl highest-scoring URLs first; empty keeps breadth-first order */
+  priority_scorers?: Partial<Record<"depth" | "path_prefix" | "anchor_keywords" | "sitemap_priority", number>>;
+
+  /** URL path prefixes favoured by the path_prefix scorer */
+  priority_path_prefixes?: string[];
+
+  /** Words favoured by the anchor_keywords scorer */
+  priority_keywords?: string[];
+
+  /** Flag or suppress pages whose text nearly matches an earlier page */
+  near_duplicates?: "off" | "flag" | "suppress"; // default "off"
+
+  /** SimHash similarity at or above which a page is a near-duplicate */
+  near_duplicate_threshold?: number; // 0.85-1.0, default 0.95
+
+  /** Reject likely crawler-trap URLs at enqueue time */
+  trap_detection?: boolean; // default true
+
+  /** Max path segments per URL */
+  trap_max_path_depth?: number; // default 15
+
+  /** Max occurrences of one path segment */
+  trap_max_segment_repeats?: number; // default 3
+
+  /** Max URLs per numeric path template (digit-bearing segments generalized) */
+  trap_template_budget?: number; // default off
+
+  /** Explicit URL budgets keyed by path glob */
+  trap_template_budgets?: Record<string, number>;
+
+  /** Max query parameters per URL */
+  trap_max_query_params?: number; // default 10
+
+  /** Max distinct query strings per path */
+  trap_max_query_variants?: number; // default off
+
+  /** Record links between pages for the graph resources */
+  link_graph?: boolean; // default true
+
+  /** Archive raw requests and responses to a WARC file */
+  warc?: boolean; // default false
+
+  /** Maximum pages in flight to one origin (scheme, host and port) */
+  per_host_limit?: number; // 1-20, default: concurrency
+
+  /** Multiplex requests to HTTP/2 origins over one connection each (requires h2) */
+  http2?: boolean; // default false
 }
 
 export interface CrawlSiteResult {
@@ -32,6 +104,21 @@ export interface CrawlSiteResult {
   /** Starting URL */
   start_url: string;
 
+  /** Identifier of this crawl's result log */
+  crawl_id: string;
+
+  /** Resource URI of the full, paged result log */
+  results_uri: string;
+
+  /** Resource URI of the log of URLs rejected as traps (null when trap detection is off) */
+  traps_uri: string | null;
+
+  /** Resource URI of the link graph summary (null when link_graph is off) */
+  graph_uri: string | null;
+
+  /** WARC archive ID for webscrape_replay_warc (null when warc is off) */
+  warc_id: string | null;
+
   /** Number of pages successfully crawled */
   pages_crawled: number;
 
@@ -41,10 +128,68 @@ export interface CrawlSiteResult {
   /** Maximum pages configured */
   max_pages: number;
 
+  /** Parallel page fetches used */
+  concurrency: number;
+
+  /** Frontier deduplication statistics */
+  frontier_stats: {
+    urls_enqueued: number;
+    duplicates_skipped: number;
+    excluded_by_rules: number;
+    peak_frontier_size: number;
+    remaining_frontier_size: number;
+    ordering: "breadth_first" | "priority";
+    trapped_urls: number;
+    trap_reasons: Partial<Record<
+      "path_depth" | "segment_repeat" | "template_budget" | "query_params" | "query_variants",
+      number
+    >>;
+    seen_filter: "exact" | "bloom";
+    bloom_size_bytes?: number;
+    bloom_false_positive_rate?: number;
+    sitemap?: {
+      files_read: number;
+      urls_seeded: number;
+      skipped_by_lastmod: number;
+      error_count: number;
+      errors: Array<{ sitemap: string; error: string }>; // first 10
+    };
+    near_duplicates?: {
+      mode: "flag" | "suppress";
+      threshold: number;
+      flagged: number;
+      suppressed: number;
+    };
+    incremental?: {
+      added: number;
+      changed: number;
+      unchanged: number;
+      /** null when the crawl stopped before its frontier was exhausted */
+      removed: number | null;
+      removed_urls?: string[];
+      note?: string;
+    };
+    /** Requests made against connections opened */
+    connections: {
+      requests: number;
+      connections_opened: number;
+      tls_handshakes: number;
+      http2_connections: number;
+      /** null when no connection was opened */
+      requests_per_connection: number | null;
+    };
+  };
+
   /** When crawl was performed */
   crawled_at: string;
 
-  /** Array of crawled pages with resource references */
+  /** Number of results inlined in this response */
+  results_inlined: number;
+
+  /** Present when some results are only available from results_uri */
+  note?: string;
+
+  /** Leading crawled pages with resource references */
   results: Array<{
     url: string;
     depth: number;
@@ -54,6 +199,15 @@ export interface CrawlSiteResult {
     status_code?: number;
     content_length?: number;
     preview?: string;
+    /** Set by incremental crawls */
+    change?: "added" | "changed" | "unchanged";
+    /** SimHash fingerprint (hex) when near-duplicate detection is on */
+    simhash?: string;
+    /** Earlier page this one nearly duplicates */
+    near_duplicate_of?: string;
+    similarity?: number;
+    /** True when the page was dropped as a near-duplicate */
+    suppressed?: boolean;
     error?: string;
   }>;
 }
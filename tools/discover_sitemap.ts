@@ -0,0 +1,73 @@
+/**
+ * List a site's URLs from its sitemaps without crawling any pages
+ *
+ * Sitemaps are found through robots.txt or well-known paths. Plain and
+ * gzipped sitemaps and nested sitemap indexes are parsed incrementally.
+ * All URLs are readable from the sitemap://{discovery_id}/urls/{cursor}
+ * resource.
+ *
+ * @category extraction
+ * @returns_resource true
+ */
+export interface DiscoverSitemapParams {
+  /** Site URL (any page) or a direct sitemap URL ending in .xml or .xml.gz */
+  url: string;
+
+  /** Only return URLs whose lastmod is on or after this ISO date/time */
+  modified_since?: string;
+
+  /** Maximum number of URLs to return */
+  max_urls?: number; // 1-50000, default 1000
+
+  /** Only return URLs on the site's domain */
+  same_domain_only?: boolean;
+}
+
+export interface SitemapUrl {
+  /** Page URL */
+  url: string;
+
+  /** lastmod value from the sitemap, if present */
+  lastmod: string | null;
+
+  /** priority value from the sitemap (0.0-1.0), if present */
+  priority: number | null;
+}
+
+export interface DiscoverSitemapResult {
+  /** URL that was analyzed */
+  url: string;
+
+  /** Identifier of this discovery's URL log */
+  discovery_id: string;
+
+  /** Resource URI of the full, paged URL list */
+  urls_uri: string;
+
+  /** Sitemap files that were read (first 20) */
+  sitemaps_read: string[];
+
+  /** Number of sitemap files read */
+  sitemap_count: number;
+
+  /** Total URLs found */
+  urls_found: number;
+
+  /** Entries and child sitemaps skipped by the lastmod cutoff */
+  skipped_by_lastmod: number;
+
+  /** Number of sitemaps that could not be read */
+  error_count: number;
+
+  /** Sitemaps that could not be read (first 10) */
+  errors: Array<{ sitemap: string; error: string }>;
+
+  /** Number of URLs inlined in this response */
+  urls_inlined: number;
+
+  /** Leading URLs */
+  urls: SitemapUrl[];
+
+  /** Present when no sitemap was found or some URLs are only in urls_uri */
+  note?: string;
+}
@@ -0,0 +1,65 @@
+/**
+ * Export every page of a crawl, crawl job or batch job to a local JSONL or Parquet file
+ *
+ * Pages are streamed from the crawl's result log and written incrementally,
+ * so memory does not grow with crawl size. Files are written to the
+ * server's export directory (WEBSCRAPE_EXPORT_DIR).
+ *
+ * @category retrieval
+ * @returns_resource false
+ */
+export interface ExportResultsParams {
+  /** crawl_id from webscrape_crawl_site, or job_id from webscrape_start_crawl_job or webscrape_start_batch_job */
+  crawl_id: string;
+
+  /** File format; parquet requires pyarrow on the server */
+  format?: "jsonl" | "parquet"; // default "jsonl"
+
+  /** JSONL supports none and gzip; Parquet supports all four */
+  compression?: "none" | "gzip" | "snappy" | "zstd"; // default "none"
+
+  /** Include each page's full cached content */
+  include_content?: boolean; // default true
+
+  /** File name inside the export directory (no directory separators) */
+  filename?: string;
+}
+
+/** One exported page (Parquet stores metadata as a JSON string) */
+export interface ExportRow {
+  url: string;
+  depth: number;
+  status_code: number | null;
+  title: string | null;
+  scrape_id: string | null;
+  error: string | null;
+  metadata: Record<string, unknown> | null;
+  content: string | null;
+}
+
+export interface ExportResultsResult {
+  /** Operation success status */
+  success: boolean;
+
+  crawl_id: string;
+  format: "jsonl" | "parquet";
+  compression: "none" | "gzip" | "snappy" | "zstd";
+
+  /** Absolute path of the written file */
+  path: string;
+
+  /** Pages written */
+  rows: number;
+
+  /** Pages whose cached metadata and content had expired */
+  content_missing: number;
+
+  /** Size of the written file */
+  file_bytes: number;
+
+  /** False when the crawl was still running at export time */
+  complete: boolean;
+
+  note?: string;
+  content_note?: string;
+}
@@ -0,0 +1,123 @@
+/**
+ * Report the status and progress counters of a background crawl or batch job
+ *
+ * @category jobs
+ * @returns_resource false
+ */
+export interface GetJobStatusParams {
+  /** Job ID returned by webscrape_start_crawl_job or webscrape_start_batch_job */
+  job_id: string;
+}
+
+export type JobStatus = "running" | "completed" | "stopped" | "cancelled" | "failed";
+
+export interface CrawlJobStatusResult {
+  /** Job identifier */
+  job_id: string;
+
+  /** Current job state; "stopped" means the memory limit was reached */
+  status: JobStatus;
+
+  /** Starting URL of the crawl */
+  start_url: string;
+
+  /** Resource URI of the job's paged results */
+  results_uri: string;
+
+  /** Resource URI of URLs rejected as crawler traps (null when trap detection is off) */
+  traps_uri: string | null;
+
+  /** Resource URI of the job's link graph summary (null when link_graph is off) */
+  graph_uri: string | null;
+
+  /** WARC archive ID (null when warc is off) */
+  warc_id: string | null;
+
+  /** Live progress counters */
+  progress: {
+    pages_crawled: number;
+    pages_failed: number;
+    max_pages: number;
+    frontier_size: number;
+    urls_enqueued: number;
+    cached_mb: number; // UTF-8 size of the content cached so far
+    max_memory_mb: number;
+  };
+
+  /** ISO timestamp when the job started */
+  started_at: string;
+
+  /** ISO timestamp when the job finished, if it has */
+  finished_at?: string;
+
+  /** Seconds the job has been (or was) running */
+  elapsed_seconds: number;
+
+  /** Final frontier statistics, once finished */
+  frontier_stats?: Record<string, unknown>;
+
+  /** Reason the job stopped or failed */
+  error?: string;
+}
+
+export interface BatchJobStatusResult {
+  /** Job identifier */
+  job_id: string;
+
+  kind: "batch";
+
+  /** Current job state; "stopped" means the memory limit was reached */
+  status: JobStatus;
+
+  /** Resource URI of the job's paged results (batch://{job_id}/results/{cursor}) */
+  results_uri: string;
+
+  /** WARC archive ID (null when warc is off) */
+  warc_id: string | null;
+
+  /** Live progress counters */
+  progress: {
+    urls_done: number;
+    urls_succeeded: number;
+    urls_failed: number;
+    /** Failures by type, e.g. { "http_404": 3, "timeout": 1 } */
+    errors_by_type: Record<string, number>;
+    /** URLs read from the source so far */
+    urls_read: number;
+    /** Total URLs in the source; null until a file or resource source is fully read */
+    urls_total: number | null;
+    cached_mb: number; // UTF-8 size of the content cached so far
+    max_memory_mb: number;
+  };
+
+  /** Requests made against connections opened */
+  connections: {
+    requests: number;
+    connections_opened: number;
+    tls_handshakes: number;
+    http2_connections: number;
+    /** null when no connection was opened */
+    requests_per_connection: number | null;
+  };
+
+  throughput: {
+    /** Completed URLs per second since the job started */
+    urls_per_second: number;
+    /** Completed URLs per second over the last 10 seconds (null once finished) */
+    recent_urls_per_second: number | null;
+  };
+
+  /** ISO timestamp when the job started */
+  started_at: string;
+
+  /** ISO timestamp when the job finished, if it has */
+  finished_at?: string;
+
+  /** Seconds the job has been (or was) running */
+  elapsed_seconds: number;
+
+  /** Reason the job stopped or failed */
+  error?: string;
+}
+
+export type GetJobStatusResult = CrawlJobStatusResult | BatchJobStatusResult;
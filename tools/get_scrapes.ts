@@ -0,0 +1,61 @@
+/**
+ * Fetch many cached scrapes in a single call
+ *
+ * Replaces one scrape://{scrape_id}/content round-trip per page when
+ * consuming the output of a batch scrape or crawl.
+ *
+ * @category retrieval
+ * @returns_resource false
+ */
+export interface GetScrapesParams {
+  /** Scrape IDs to fetch */
+  scrape_ids: string[]; // 1-200 IDs
+
+  /** Fields to include for each scrape */
+  fields?: Array<"url" | "metadata" | "content" | "preview" | "links" | "images" | "stats">;
+
+  /** Maximum content characters per scrape */
+  max_chars_per_item?: number; // 1-25000
+}
+
+export interface GetScrapesResult {
+  /** Number of scrape IDs requested */
+  requested: number;
+
+  /** Number of scrapes returned in this response */
+  returned: number;
+
+  /** Requested fields per scrape */
+  results: Array<{
+    scrape_id: string;
+    url?: string;
+    metadata?: Record<string, unknown>;
+    content?: string;
+    encoding?: "base64";
+    next_cursor?: string | null;
+    preview?: string | null;
+    links?: string[];
+    images?: string[];
+    stats?: {
+      content_length: number;
+      link_count: number;
+      image_count: number;
+      mime_type: string;
+    };
+    /** Resource URIs holding what was cut to fit an oversized first item */
+    truncated?: {
+      links?: string; // scrape://{scrape_id}/links/{cursor}
+      images?: string; // scrape://{scrape_id}/images/{cursor}
+      metadata?: string; // scrape://{scrape_id}/metadata
+    };
+  }>;
+
+  /** Scrape IDs that were not found or have expired */
+  missing: Array<{
+    scrape_id: string;
+    error: string;
+  }>;
+
+  /** Scrape IDs left out to stay under the response size limit */
+  deferred: string[];
+}
@@ -11,13 +11,23 @@ export * from './scrape_url';
 export * from './scrape_multiple_urls';
 export * from './crawl_site';
 export * from './extract_links';
+export * from './discover_sitemap';
 export * from './scrape_with_js';
 export * from './screenshot_url';
+export * from './read_content';
+export * from './get_scrapes';
+export * from './start_crawl_job';
+export * from './start_batch_job';
+export * from './get_job_status';
+export * from './cancel_job';
+export * from './resume_crawl';
+export * from './export_results';
+export * from './replay_warc';
 
 /**
  * Tool categories for filtering and search
  */
-export type ToolCategory = "scraping" | "extraction" | "rendering";
+export type ToolCategory = "scraping" | "extraction" | "rendering" | "retrieval" | "jobs";
 
 /**
  * Discovery metadata for all tools
@@ -29,11 +39,25 @@ export const TOOLS = {
     "webscrape_crawl_site"
   ],
   extraction: [
-    "webscrape_extract_links"
+    "webscrape_extract_links",
+    "webscrape_discover_sitemap"
   ],
   rendering: [
     "webscrape_scrape_with_js",
     "webscrape_screenshot_url"
+  ],
+  retrieval: [
+    "webscrape_read_content",
+    "webscrape_get_scrapes",
+    "webscrape_export_results",
+    "webscrape_replay_warc"
+  ],
+  jobs: [
+    "webscrape_start_crawl_job",
+    "webscrape_start_batch_job",
+    "webscrape_get_job_status",
+    "webscrape_cancel_job",
+    "webscrape_resume_crawl"
   ]
 } as const;
 
@@ -0,0 +1,43 @@
+/**
+ * Read a range of previously scraped content by scrape ID
+ *
+ * Large pages can be read in pieces instead of pulling the whole body
+ * through the scrape://{scrape_id}/content resource. Continue from
+ * next_cursor until it is null.
+ *
+ * @category retrieval
+ * @returns_resource false
+ */
+export interface ReadContentParams {
+  /** Scrape ID returned by a scraping tool */
+  scrape_id: string;
+
+  /** Character offset to start reading from */
+  offset?: number; // default 0
+
+  /** Maximum number of characters to return */
+  length?: number; // 1-25000, default 10000
+
+  /** Pull the page end back to a line or markdown heading boundary */
+  align?: "none" | "line" | "heading";
+}
+
+export interface ReadContentResult {
+  /** Scrape ID that was read */
+  scrape_id: string;
+
+  /** Character offset of this page */
+  offset: number;
+
+  /** Number of characters in this page */
+  length: number;
+
+  /** Total length of the cached content */
+  total_length: number;
+
+  /** Offset of the next page, or null when this is the last page */
+  next_cursor: string | null;
+
+  /** Page content */
+  content: string;
+}
@@ -0,0 +1,51 @@
+/**
+ * Re-scrape archived responses from a WARC file without network access
+ *
+ * Crawls, crawl jobs and batches run with warc=true archive every raw
+ * HTTP exchange. Replay decodes each archived response and converts it
+ * exactly as webscrape_scrape_url would.
+ *
+ * @category retrieval
+ * @returns_resource true
+ */
+export interface ReplayWarcParams {
+  /** warc_id returned by a crawl, crawl job or batch run with warc=true */
+  warc_id: string;
+
+  /** Only replay responses for these URLs */
+  urls?: string[];
+
+  /** Output format for the replayed pages */
+  response_format?: "markdown" | "html" | "text" | "json";
+
+  /** Include page metadata */
+  include_metadata?: boolean;
+
+  /** Maximum responses to replay (1-1000) */
+  max_records?: number; // default 100
+}
+
+export interface ReplayWarcResult {
+  warc_id: string;
+
+  /** Responses replayed */
+  records_replayed: number;
+
+  /** When the replay was performed */
+  replayed_at: string;
+
+  /** One scrape result per archived response */
+  results: Array<{
+    url: string;
+    success: boolean;
+    scrape_id?: string;
+    resource_uri?: string;
+    metadata_uri?: string;
+    preview?: string;
+    content_length?: number;
+    status_code?: number;
+    /** WARC-Date of the archived response */
+    archived_at?: string;
+    error?: string;
+  }>;
+}
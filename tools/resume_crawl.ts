@@ -0,0 +1,34 @@
+/**
+ * Resume an interrupted crawl or crawl job from its on-disk checkpoint
+ *
+ * Works after a failure, a cancellation or a server restart. The crawl
+ * continues as a background job under the same ID without refetching
+ * pages that were already completed.
+ *
+ * @category jobs
+ * @returns_resource true
+ */
+export interface ResumeCrawlParams {
+  /** crawl_id from webscrape_crawl_site or job_id from webscrape_start_crawl_job */
+  crawl_id: string;
+}
+
+export interface ResumeCrawlResult {
+  /** Operation success status */
+  success: boolean;
+
+  /** Job identifier (same as the resumed crawl_id) */
+  job_id: string;
+
+  /** Always "running" when the crawl was resumed */
+  status: "running";
+
+  /** Pages completed before the interruption */
+  pages_completed: number;
+
+  /** URLs waiting in the restored frontier */
+  frontier_size: number;
+
+  /** Resource URI of the crawl's paged results */
+  results_uri: string;
+}
@@ -2,7 +2,9 @@
  * Scrape multiple URLs concurrently
  *
  * This tool efficiently scrapes multiple web pages at once, making it ideal
- * for batch operations. Maximum 20 URLs per request.
+ * for batch operations. Maximum 20 URLs per request. Results are appended
+ * in completion order to batch://{batch_id}/results/{cursor} and announced as
+ * progress notifications as they finish; the response lists them in input order.
  *
  * @category scraping
  * @returns_resource true
@@ -16,6 +18,21 @@ export interface ScrapeMultipleUrlsParams {
 
   /** Include page metadata */
   include_metadata?: boolean;
+
+  /** Archive raw requests and responses to a WARC file */
+  warc?: boolean; // default false
+
+  /** Return after this many seconds; unfinished URLs are marked "pending" */
+  deadline_seconds?: number; // up to 600
+
+  /** Give up on a single URL after this many seconds and mark it "timed_out" */
+  url_timeout_seconds?: number; // up to 300
+
+  /** Maximum URLs in flight to one origin (scheme, host and port) */
+  per_host_limit?: number; // 1-20, default 6
+
+  /** Multiplex requests to HTTP/2 origins over one connection each (requires h2) */
+  http2?: boolean; // default false
 }
 
 export interface ScrapeMultipleUrlsResult {
@@ -25,13 +42,57 @@ export interface ScrapeMultipleUrlsResult {
   /** Total number of URLs processed */
   total_urls: number;
 
+  /** Batch identifier; also accepted by webscrape_export_results */
+  batch_id: string;
+
+  /** Resource URI of the results in completion order */
+  results_uri: string;
+
   /** When scraping was performed */
   scraped_at: string;
 
+  /** Seconds until the tool returned */
+  elapsed_seconds: number;
+
+  /** Seconds until the first result finished (null if none did) */
+  first_result_seconds: number | null;
+
+  /** URLs that produced a result, including failures and timeouts */
+  finished: number;
+
+  /** URLs that hit url_timeout_seconds */
+  timed_out: number;
+
+  /** URLs still unfinished when deadline_seconds passed */
+  pending: number;
+
+  /** Whether deadline_seconds cut the batch short */
+  deadline_hit: boolean;
+
+  /** Requests made against connections opened */
+  connections: {
+    requests: number;
+    connections_opened: number;
+    tls_handshakes: number;
+    http2_connections: number;
+    /** null when no connection was opened */
+    requests_per_connection: number | null;
+  };
+
+  /** WARC archive ID for webscrape_replay_warc (when warc is true) */
+  warc_id?: string;
+
+  /** WARC records written */
+  warc_records?: number;
+
   /** Array of individual scrape results */
   results: Array<{
     url: string;
+    /** Position of the URL in the request */
+    index: number;
     success: boolean;
+    /** Set for URLs that did not finish in time */
+    status?: "timed_out" | "pending";
     scrape_id?: string;
     resource_uri?: string;
     preview?: string;
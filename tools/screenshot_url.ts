@@ -37,9 +37,12 @@ export interface ScreenshotUrlResult {
   /** Page title */
   title: string;
 
-  /** Resource URI to fetch screenshot image data */
+  /** Resource URI to fetch the screenshot as a base64 data URI */
   resource_uri: string;
 
+  /** Resource URI to fetch the raw PNG image (image/png blob) */
+  image_uri: string;
+
   /** Viewport dimensions used */
   viewport: {
     width: number;
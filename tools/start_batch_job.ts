@@ -0,0 +1,88 @@
+/**
+ * Scrape a large list of URLs in the background and return a job ID immediately
+ *
+ * Use this instead of webscrape_scrape_multiple_urls for more than 20 URLs.
+ * URLs come from exactly one of urls, url_file or source_uri and are read
+ * lazily. Results stream in completion order to the job's results resource
+ * (batch://{job_id}/results/{cursor}); webscrape_get_job_status reports
+ * throughput and error counts.
+ *
+ * @category jobs
+ * @returns_resource true
+ */
+export interface StartBatchJobParams {
+  /** URLs to scrape (up to 100000) */
+  urls?: string[];
+
+  /** Path of a local text file with one URL per line (blank lines and # comments are skipped) */
+  url_file?: string;
+
+  /**
+   * Resource listing the URLs: sitemap://{discovery_id} for a sitemap
+   * discovery's URLs, or scrape://{scrape_id} for a cached scrape with one
+   * URL per line
+   */
+  source_uri?: string;
+
+  /** Output format for all pages */
+  response_format?: "markdown" | "html" | "text" | "json"; // default "markdown"
+
+  /** Include page metadata */
+  include_metadata?: boolean; // default true
+
+  /** Maximum number of URLs fetched in parallel (at most per_host_limit per origin) */
+  concurrency?: number; // 1-64, default 10
+
+  /** Give up on a single URL after this many seconds and record it as timed out */
+  url_timeout_seconds?: number; // up to 300
+
+  /** Stop the job once the page content it has cached exceeds this many megabytes (UTF-8 bytes) */
+  max_memory_mb?: number; // 1-4096, default 256
+
+  /** Archive every raw HTTP request and response to a WARC file */
+  warc?: boolean; // default false
+
+  /** Maximum URLs in flight to one origin (scheme, host and port) */
+  per_host_limit?: number; // 1-64, default 6
+
+  /** Multiplex requests to HTTP/2 origins over one connection each (requires h2) */
+  http2?: boolean; // default false
+}
+
+export interface StartBatchJobResult {
+  /** Operation success status */
+  success: boolean;
+
+  /** Job identifier for status polling and cancellation */
+  job_id: string;
+
+  /** Always "running" when the job was started */
+  status: "running";
+
+  /** Resource URI of the job's paged results */
+  results_uri: string;
+}
+
+/** One entry of batch://{job_id}/results/{cursor} */
+export interface BatchResultEntry {
+  /** Position of the URL in the job's source */
+  index: number;
+
+  url: string;
+
+  success: boolean;
+
+  /** Present for successful scrapes, as returned by webscrape_scrape_url */
+  scrape_id?: string;
+  resource_uri?: string;
+  metadata_uri?: string;
+  preview?: string;
+  content_length?: number;
+  status_code?: number;
+
+  /** Present for failed scrapes */
+  error?: string;
+
+  /** "timed_out" when url_timeout_seconds was exceeded */
+  status?: "timed_out";
+}
@@ -0,0 +1,44 @@
+/**
+ * Start a website crawl in the background and return a job ID immediately
+ *
+ * Use this instead of webscrape_crawl_site for crawls that may outlast the
+ * client's tool-call timeout. Results stream to the job's results resource
+ * (crawl://{job_id}/results/{cursor}) while it runs.
+ *
+ * @category jobs
+ * @returns_resource true
+ */
+import type { CrawlSiteParams } from './crawl_site';
+
+export interface StartCrawlJobParams extends CrawlSiteParams {
+  /** Stop the job once the page content it has cached exceeds this many megabytes (UTF-8 bytes) */
+  max_memory_mb?: number; // 1-4096, default 256
+
+  /**
+   * Worker processes; above 1 the crawl is distributed over processes sharing
+   * a SQLite frontier. Use at most one worker per free core. per_host_limit
+   * is split across the workers. Distributed jobs cannot be resumed and do
+   * not support near_duplicates, incremental or warc.
+   */
+  workers?: number; // 1-32, default 1
+
+  /** Distributed crawls: seconds a worker holds a URL before another worker may retry it */
+  lease_seconds?: number; // 5-3600, default 120
+}
+
+export interface StartCrawlJobResult {
+  /** Operation success status */
+  success: boolean;
+
+  /** Job identifier for status polling and cancellation */
+  job_id: string;
+
+  /** Always "running" when the job was started */
+  status: "running";
+
+  /** Number of worker processes (distributed jobs only) */
+  workers?: number;
+
+  /** Resource URI of the job's paged results */
+  results_uri: string;
+}
@@ -7,9 +7,9 @@ Provides tools for scraping, crawling, and extracting content from websites
 without requiring external API keys.
 """
 
-from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel, Field, field_validator, ConfigDict, HttpUrl
-from typing import Optional, List, Dict, Any, Literal
+from mcp.server.fastmcp import FastMCP, Context
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict, HttpUrl
+from typing import Optional, List, Dict, Any, Literal, Union, Callable, Iterator
 from enum import Enum
 import asyncio
 import httpx
@@ -17,6 +17,9 @@ from bs4 import BeautifulSoup
 import importlib
 import importlib.util
 
+# numpy speeds up link-graph analysis when installed; a pure-Python path is used otherwise
+numpy = importlib.import_module("numpy") if importlib.util.find_spec("numpy") is not None else None
+
 # Prefer the installed html2text package if available; otherwise provide a lightweight fallback
 if importlib.util.find_spec("html2text") is not None:
     html2text = importlib.import_module("html2text")
@@ -60,13 +63,30 @@ else:
     html2text = type("m", (), {"HTML2Text": _FallbackHTML2Text})()
 
 from urllib.parse import urljoin, urlparse, urlunparse
-from collections import deque
+from array import array
+from collections import Counter, deque
+from contextlib import aclosing, contextmanager
+from dataclasses import dataclass
 import json
 import re
 import base64
-from datetime import datetime, timedelta
+import gzip
+import multiprocessing
+import fnmatch
+import heapq
+from datetime import datetime, timedelta, timezone
 import hashlib
+import itertools
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
 import time
+import uuid
+import zlib
+import xml.etree.ElementTree as ET
 
 # Initialize MCP server
 mcp = FastMCP("webscrape_mcp")
@@ -79,9 +99,343 @@ DEFAULT_TIMEOUT = 30.0
 # Cache constants for progressive disclosure
 CACHE_TTL_SECONDS = 3600  # 1 hour TTL for cached scrapes
 PREVIEW_LENGTH = 500  # Character limit for content previews
+CONTENT_PAGE_SIZE = 10000  # Default characters per ranged content page
+LIST_PAGE_SIZE = 500  # Links/images per page of the list resources
+GET_SCRAPES_SHRINK_SLACK = 64  # Extra characters cut when shortening an oversized first multi-get item
+SHARED_WITH_LIMIT = 20  # Max sibling scrape IDs listed in metadata
+CACHE_SHARD_COUNT = 16  # Independently locked shards per cache
+CACHE_SWEEP_INTERVAL_SECONDS = 5.0  # Min time between expiry sweeps of the caches and result logs
+
+# Near-duplicate detection
+SIMHASH_BITS = 64  # Fingerprint width
+SIMHASH_SHINGLE_SIZE = 3  # Words per shingle fed to SimHash
+
+# Crawl frontier constants
+BLOOM_URLS_PER_PAGE = 100  # Expected distinct links per crawled page when sizing Bloom filters
+BLOOM_MIN_CAPACITY = 10000  # Smallest Bloom filter capacity (distinct URLs)
+
+# Streamed per-page results are spooled here and paged via crawl:// resources
+RESULT_LOG_DIR = os.environ.get("WEBSCRAPE_RESULT_DIR") or os.path.join(tempfile.gettempdir(), "webscrape_mcp")
+RESULTS_PAGE_SIZE = 100  # Max results per page of a result log resource
+
+# Background crawl jobs
+MAX_ACTIVE_JOBS = 4  # Crawl jobs allowed to run at the same time
+JOB_CANCEL_WAIT_SECONDS = 5.0  # How long cancel waits for a job to wind down
+
+# Per-origin scheduling of batches and crawls
+DEFAULT_PER_HOST_LIMIT = 6  # Requests in flight per origin, the usual browser connection cap
+
+# Bulk batch jobs
+MAX_BATCH_URLS = 100000  # URLs read from a batch job's source
+BATCH_SCHEDULER_WINDOW = 1000  # URLs a batch job reads ahead so it can interleave origins
+BATCH_SCHEDULER_MAX_BUFFER = 20000  # Read-ahead cap when every buffered origin is at its limit
+CRAWL_PARKED_URLS = 1000  # Dequeued URLs a crawl holds back while their origin is at its limit
+BATCH_RATE_WINDOW_SECONDS = 10.0  # Window of the recent throughput figure in batch job status
+
+# Distributed crawls: worker processes sharing a SQLite frontier
+MAX_CRAWL_WORKERS = 32  # Worker processes per distributed crawl job
+DISTRIBUTED_POLL_SECONDS = 0.2  # How often idle workers and the result collector poll the frontier
+DISTRIBUTED_MAX_RESTARTS = 3  # Crashed workers replaced per distributed crawl
+
+# Crawl checkpoints (written next to result logs)
+CHECKPOINT_BATCH_PAGES = 25  # Committed pages buffered before a checkpoint write
+CHECKPOINT_INTERVAL_SECONDS = 2.0  # Max age of buffered checkpoint records
+
+# Sitemap discovery
+SITEMAP_WELL_KNOWN_PATHS = ["/sitemap.xml", "/sitemap_index.xml", "/sitemap.xml.gz"]
+MAX_SITEMAP_FILES = 100  # Sitemap and sitemap index files read per discovery
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024  # Uncompressed size limit per sitemap file (protocol maximum)
+SITEMAPS_LISTED_LIMIT = 20  # Max sitemap file URLs listed in discovery output
+SITEMAP_ERRORS_LIMIT = 10  # Max sitemap errors listed in crawl and discovery output
+
+# Per-URL validators and hashes from previous crawls, for incremental recrawls
+RECRAWL_DB_PATH = os.environ.get("WEBSCRAPE_RECRAWL_DB") or os.path.join(RESULT_LOG_DIR, "recrawl.sqlite")
+REMOVED_URLS_LIMIT = 20  # Max removed URLs listed in incremental crawl stats
+
+# Crawl link graphs
+PAGERANK_DAMPING = 0.85  # Probability of following a link rather than jumping to a random page
+PAGERANK_MAX_ITERATIONS = 100  # Power-iteration cap
+PAGERANK_TOLERANCE = 1e-8  # Stop once ranks change by less than this in total (L1)
+GRAPH_TOP_PAGES = 20  # Highest-ranked pages listed in a graph summary
+
+# Crawl exports for offline pipelines
+EXPORT_DIR = os.environ.get("WEBSCRAPE_EXPORT_DIR") or os.path.join(RESULT_LOG_DIR, "exports")
+EXPORT_ROW_GROUP_SIZE = 500  # Pages buffered per Parquet row group
+
+# WARC archives of raw HTTP exchanges, written when a crawl or batch sets warc=True
+WARC_DIR = os.environ.get("WEBSCRAPE_WARC_DIR") or os.path.join(RESULT_LOG_DIR, "warc")
+
+# Optional SQLite file shared by several server processes on one host
+SHARED_CACHE_PATH = os.environ.get("WEBSCRAPE_SHARED_CACHE")
+
+
+class ShardedCache:
+    """
+    Dict-like cache split across independently locked shards.
+
+    Keys are spread over CACHE_SHARD_COUNT plain dicts, each guarded by its
+    own lock, so tools, resources and worker threads touching different keys
+    never contend on a single global lock. Every method holds at most one of
+    its shard locks at a time; compound read-modify-write operations go
+    through update() or get_or_compute() so they are atomic per key.
+    SCRAPE_CACHE callbacks may lock CONTENT_STORE shards, never the reverse.
+    """
+
+    def __init__(self, shard_count: int = CACHE_SHARD_COUNT):
+        self._shards: List[Dict[str, Any]] = [{} for _ in range(shard_count)]
+        self._locks = [threading.RLock() for _ in range(shard_count)]
+
+    def _index(self, key: str) -> int:
+        return hash(key) % len(self._shards)
+
+    def __contains__(self, key: str) -> bool:
+        index = self._index(key)
+        with self._locks[index]:
+            return key in self._shards[index]
+
+    def __getitem__(self, key: str) -> Any:
+        index = self._index(key)
+        with self._locks[index]:
+            return self._shards[index][key]
+
+    def __setitem__(self, key: str, value: Any):
+        index = self._index(key)
+        with self._locks[index]:
+            self._shards[index][key] = value
+
+    def __delitem__(self, key: str):
+        index = self._index(key)
+        with self._locks[index]:
+            del self._shards[index][key]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._index(key)
+        with self._locks[index]:
+            return self._shards[index].get(key, default)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        index = self._index(key)
+        with self._locks[index]:
+            return self._shards[index].pop(key, default)
+
+    def get_or_compute(self, key: str, compute) -> Any:
+        """Return the value for key, computing and storing it if absent."""
+        index = self._index(key)
+        with self._locks[index]:
+            shard = self._shards[index]
+            if key not in shard:
+                shard[key] = compute()
+            return shard[key]
+
+    def update(self, key: str, fn) -> Any:
+        """
+        Atomically replace the value for key with fn(current).
+
+        fn receives the current value (None if absent); returning None
+        removes the key.
+        """
+        index = self._index(key)
+        with self._locks[index]:
+            shard = self._shards[index]
+            value = fn(shard.get(key))
+            if value is None:
+                shard.pop(key, None)
+            else:
+                shard[key] = value
+            return value
+
+    def view(self, key: str, fn, default: Any = None) -> Any:
+        """Return fn(value) computed while the key's shard is locked."""
+        index = self._index(key)
+        with self._locks[index]:
+            shard = self._shards[index]
+            return fn(shard[key]) if key in shard else default
+
+    def items(self) -> List[tuple]:
+        """Snapshot of all items, taken one shard at a time."""
+        snapshot = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                snapshot.extend(shard.items())
+        return snapshot
+
+
+def _utc_timestamp(value: datetime) -> float:
+    """Convert a naive UTC datetime to a POSIX timestamp."""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+class SharedScrapeCache:
+    """
+    Cross-process scrape cache backed by a SQLite database in WAL mode.
+
+    Several server processes pointed at the same file can resolve each
+    other's scrape IDs. Entries carry the same TTL as the in-process cache
+    and are swept by the same expiry pass; bodies are content-addressed and
+    deleted once no entry references them. Each thread gets its own
+    connection, and WAL lets readers proceed while one writer commits.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_expire = 0.0
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    scrape_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    expires_ts REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_ts);
+                CREATE INDEX IF NOT EXISTS entries_hash ON entries (content_hash);
+                CREATE TABLE IF NOT EXISTS bodies (
+                    content_hash TEXT PRIMARY KEY,
+                    content NOT NULL
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, scrape_id: str, entry: Dict[str, Any], content: Union[str, bytes]):
+        """Insert or replace an entry and its body in one transaction."""
+        data = dict(entry)
+        data["created_at"] = entry["created_at"].isoformat()
+        data["expires_at"] = entry["expires_at"].isoformat()
+        del data["content_hash"]
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO bodies (content_hash, content) VALUES (?, ?)",
+                (entry["content_hash"], content)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (scrape_id, content_hash, expires_ts, data) VALUES (?, ?, ?, ?)",
+                (scrape_id, entry["content_hash"], _utc_timestamp(entry["expires_at"]), json.dumps(data))
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, scrape_id: str) -> Optional[Dict[str, Any]]:
+        """Return a live entry, or None if missing or expired."""
+        row = self._connect().execute(
+            "SELECT content_hash, data FROM entries WHERE scrape_id = ? AND expires_ts >= ?",
+            (scrape_id, _utc_timestamp(datetime.utcnow()))
+        ).fetchone()
+        if row is None:
+            return None
+        entry = json.loads(row[1])
+        entry["content_hash"] = row[0]
+        entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+        entry["expires_at"] = datetime.fromisoformat(entry["expires_at"])
+        return entry
+
+    def read_body(self, content_hash: str, offset: int = 0, length: Optional[int] = None) -> Optional[Union[str, bytes]]:
+        """Read a body, or a slice of it, without loading the rest."""
+        if length is None:
+            query, args = "SELECT content FROM bodies WHERE content_hash = ?", (content_hash,)
+        else:
+            query = "SELECT substr(content, ?, ?) FROM bodies WHERE content_hash = ?"
+            args = (offset + 1, length, content_hash)
+        row = self._connect().execute(query, args).fetchone()
+        return row[0] if row else None
+
+    def body_refs(self, content_hash: str, limit: int) -> tuple[int, List[str]]:
+        """Return the reference count of a body and up to limit referencing IDs."""
+        conn = self._connect()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM entries WHERE content_hash = ?", (content_hash,)
+        ).fetchone()[0]
+        scrape_ids = [row[0] for row in conn.execute(
+            "SELECT scrape_id FROM entries WHERE content_hash = ? LIMIT ?", (content_hash, limit)
+        )]
+        return count, scrape_ids
+
+    def evict(self, scrape_id: str):
+        """Remove an entry and any body it was the last reference to."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT content_hash FROM entries WHERE scrape_id = ?", (scrape_id,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE scrape_id = ?", (scrape_id,))
+                conn.execute(
+                    "DELETE FROM bodies WHERE content_hash = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM entries WHERE content_hash = ?)",
+                    (row[0], row[0])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def expire(self, force: bool = False):
+        """
+        Delete expired entries and the bodies only they referenced.
+
+        Runs at most once per CACHE_SWEEP_INTERVAL_SECONDS per instance
+        unless forced. Expired entries are found through the expiry index,
+        and the write lock is only taken when there is something to delete.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_expire < CACHE_SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_expire = now
+
+        cutoff = _utc_timestamp(datetime.utcnow())
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM entries WHERE expires_ts < ? LIMIT 1", (cutoff,)).fetchone() is None:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            hashes = [row[0] for row in conn.execute(
+                "SELECT DISTINCT content_hash FROM entries WHERE expires_ts < ?", (cutoff,)
+            )]
+            conn.execute("DELETE FROM entries WHERE expires_ts < ?", (cutoff,))
+            conn.executemany(
+                "DELETE FROM bodies WHERE content_hash = ? "
+                "AND NOT EXISTS (SELECT 1 FROM entries WHERE content_hash = ?)",
+                [(content_hash, content_hash) for content_hash in hashes]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
 
 # Global cache for scrape results (resource-based pattern)
-SCRAPE_CACHE: Dict[str, Dict[str, Any]] = {}
+SCRAPE_CACHE = ShardedCache()
+
+# Content-addressed body store shared by cache entries (content hash -> body)
+CONTENT_STORE = ShardedCache()
+
+# Expiry heap of (expires_at, scrape_id), one item per store; items for
+# re-scraped or evicted IDs are skipped when they come due
+CACHE_EXPIRY: List[tuple] = []
+CACHE_EXPIRY_LOCK = threading.Lock()
+_last_cache_sweep = 0.0
+
+# Cross-process second-level cache, enabled by WEBSCRAPE_SHARED_CACHE
+SHARED_CACHE: Optional[SharedScrapeCache] = SharedScrapeCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
 
 # Response format enum
 class ResponseFormat(str, Enum):
@@ -157,6 +511,32 @@ class ScrapeMultipleUrlsInput(BaseModel):
         default=True,
         description="Include page metadata"
     )
+    warc: bool = Field(
+        default=False,
+        description="Archive every raw HTTP request and response to a gzipped WARC file that webscrape_replay_warc can re-scrape offline"
+    )
+    deadline_seconds: Optional[float] = Field(
+        default=None,
+        description="Return after this many seconds with the results finished so far; unfinished URLs are marked pending",
+        gt=0,
+        le=600
+    )
+    url_timeout_seconds: Optional[float] = Field(
+        default=None,
+        description="Give up on a single URL after this many seconds and mark it timed out",
+        gt=0,
+        le=300
+    )
+    per_host_limit: int = Field(
+        default=DEFAULT_PER_HOST_LIMIT,
+        description="Maximum URLs in flight to any one origin (scheme, host and port); requests to an origin reuse its few pooled connections",
+        ge=1,
+        le=20
+    )
+    http2: bool = Field(
+        default=False,
+        description="Multiplex requests to HTTP/2 origins over one connection each (requires the h2 package)"
+    )
     
     @field_validator('urls')
     @classmethod
@@ -185,13 +565,13 @@ class CrawlSiteInput(BaseModel):
         default=2,
         description="Maximum crawl depth (0 = only start URL, 1 = start + direct links, etc.)",
         ge=0,
-        le=5
+        le=20
     )
     max_pages: int = Field(
         default=20,
-        description="Maximum number of pages to crawl",
+        description="Maximum number of pages to crawl; all results stream to the crawl's results resource",
         ge=1,
-        le=100
+        le=50000
     )
     same_domain_only: bool = Field(
         default=True,
@@ -201,6 +581,162 @@ class CrawlSiteInput(BaseModel):
         default=ResponseFormat.MARKDOWN,
         description="Output format for crawled pages"
     )
+    concurrency: int = Field(
+        default=5,
+        description="Number of pages fetched in parallel",
+        ge=1,
+        le=20
+    )
+    dedup_filter: Literal["exact", "bloom"] = Field(
+        default="exact",
+        description="Seen-URL filter: 'exact' set, or 'bloom' for bounded memory on very large crawls (may rarely skip a URL)"
+    )
+    bloom_false_positive_rate: float = Field(
+        default=0.001,
+        description="Target false-positive rate when dedup_filter is 'bloom'",
+        gt=0,
+        lt=0.5
+    )
+    discovery: Literal["links", "sitemap", "both"] = Field(
+        default="links",
+        description="How to find pages: follow page links, seed from the site's sitemaps without following links, or both"
+    )
+    sitemap_modified_since: Optional[str] = Field(
+        default=None,
+        description="Only seed sitemap URLs whose lastmod is on or after this ISO date/time (URLs without lastmod are kept)"
+    )
+    incremental: bool = Field(
+        default=False,
+        description="Send conditional requests and skip pages unchanged since the last crawl from this URL; reports added, changed and removed pages"
+    )
+    include_patterns: List[str] = Field(
+        default=[],
+        description="Only enqueue URLs matching at least one pattern: a glob over the full URL (e.g. '*/docs/*'), or a regex prefixed with 're:'",
+        max_items=50
+    )
+    exclude_patterns: List[str] = Field(
+        default=[],
+        description="Never enqueue URLs matching any of these patterns (same syntax as include_patterns, e.g. '*/tag/*', '*.pdf')",
+        max_items=50
+    )
+    priority_scorers: Dict[str, float] = Field(
+        default={},
+        description="Crawl the highest-scoring URLs first, as scorer name -> weight. Scorers: depth, path_prefix, anchor_keywords, sitemap_priority. Empty keeps breadth-first order"
+    )
+    priority_path_prefixes: List[str] = Field(
+        default=[],
+        description="URL path prefixes favoured by the path_prefix scorer (e.g. '/docs/')"
+    )
+    priority_keywords: List[str] = Field(
+        default=[],
+        description="Words favoured by the anchor_keywords scorer when found in link text or URL"
+    )
+    near_duplicates: Literal["off", "flag", "suppress"] = Field(
+        default="off",
+        description="Detect pages whose text nearly matches an earlier page: 'flag' marks them, 'suppress' drops them from the results and does not follow their links"
+    )
+    near_duplicate_threshold: float = Field(
+        default=0.95,
+        description="SimHash similarity (fraction of matching fingerprint bits) at or above which a page counts as a near-duplicate",
+        ge=0.85,
+        le=1.0
+    )
+    trap_detection: bool = Field(
+        default=True,
+        description="Reject likely crawler-trap URLs at enqueue time; each rejected URL is logged with a reason. By default only overly deep paths, repeating segments and URLs with too many query parameters are rejected; set trap_template_budget or trap_max_query_variants to also cap calendars and filter explosions"
+    )
+    trap_max_path_depth: int = Field(
+        default=15,
+        description="Reject URLs with more path segments than this",
+        ge=1,
+        le=100
+    )
+    trap_max_segment_repeats: int = Field(
+        default=3,
+        description="Reject URLs in which one path segment occurs more than this many times (e.g. /a/b/a/b/a/b/a)",
+        ge=1,
+        le=50
+    )
+    trap_template_budget: Optional[int] = Field(
+        default=None,
+        description="Max URLs enqueued per numeric path template, where numeric segments are generalized (e.g. /calendar/2024/05 -> /calendar/*/*). Off by default, since ordinary sites (/product/123, /article/2024/...) share templates too",
+        ge=1,
+        le=1000000
+    )
+    trap_template_budgets: Dict[str, int] = Field(
+        default={},
+        description="Explicit URL budgets for path globs, e.g. {'/calendar/*/*': 50}; matched against the URL path"
+    )
+    trap_max_query_params: int = Field(
+        default=10,
+        description="Reject URLs with more query parameters than this",
+        ge=1,
+        le=100
+    )
+    trap_max_query_variants: Optional[int] = Field(
+        default=None,
+        description="Max distinct query strings enqueued for any one path (stops filter/sort/session parameter explosions). Off by default, since paginated listings (?page=N) vary the query too",
+        ge=1,
+        le=1000000
+    )
+    link_graph: bool = Field(
+        default=True,
+        description="Record the links between crawled pages for the crawl://{crawl_id}/graph resources (degrees, orphans, broken links, PageRank)"
+    )
+    warc: bool = Field(
+        default=False,
+        description="Archive every raw HTTP request and response to a gzipped WARC file that webscrape_replay_warc can re-scrape offline"
+    )
+    per_host_limit: Optional[int] = Field(
+        default=None,
+        description="Maximum pages in flight to any one origin (scheme, host and port); requests to an origin reuse its few pooled connections. Defaults to concurrency, so a single-site crawl uses all of it",
+        ge=1,
+        le=20
+    )
+    http2: bool = Field(
+        default=False,
+        description="Multiplex requests to HTTP/2 origins over one connection each (requires the h2 package)"
+    )
+
+    @field_validator('include_patterns', 'exclude_patterns')
+    @classmethod
+    def validate_patterns(cls, v: List[str]) -> List[str]:
+        """Validate that every 're:' pattern is a valid regular expression."""
+        for pattern in v:
+            if pattern.startswith("re:"):
+                try:
+                    re.compile(pattern[3:])
+                except re.error as e:
+                    raise ValueError(f"Invalid regex in URL pattern '{pattern}': {e}")
+        return v
+
+    @field_validator('priority_scorers')
+    @classmethod
+    def validate_scorers(cls, v: Dict[str, float]) -> Dict[str, float]:
+        """Validate that every scorer name is registered."""
+        unknown = sorted(set(v) - set(URL_SCORERS))
+        if unknown:
+            raise ValueError(f"Unknown priority scorers {unknown}; available: {sorted(URL_SCORERS)}")
+        return v
+
+    @field_validator('sitemap_modified_since')
+    @classmethod
+    def validate_modified_since(cls, v: Optional[str]) -> Optional[str]:
+        """Validate the lastmod cutoff is an ISO date or date-time."""
+        if v is not None and _parse_lastmod(v) is None:
+            raise ValueError(f"sitemap_modified_since must be an ISO date or date-time: {v}")
+        return v
+
+    @field_validator('trap_template_budgets')
+    @classmethod
+    def validate_template_budgets(cls, v: Dict[str, int]) -> Dict[str, int]:
+        """Validate that template globs are paths with positive budgets."""
+        for pattern, budget in v.items():
+            if not pattern.startswith("/"):
+                raise ValueError(f"Trap template '{pattern}' must be a URL path glob starting with '/'")
+            if budget < 1:
+                raise ValueError(f"Trap template budget for '{pattern}' must be at least 1")
+        return v
     
     @field_validator('url')
     @classmethod
@@ -318,129 +854,622 @@ class ScreenshotUrlInput(BaseModel):
         return v
 
 
-# ============================================================================
-# Utility Functions
-# ============================================================================
+class ReadContentInput(BaseModel):
+    """Input for ranged reads of cached scrape content."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
 
-async def _fetch_url(url: str, timeout: float = DEFAULT_TIMEOUT) -> tuple[str, int, dict]:
-    """
-    Fetch URL content with proper error handling.
-    
-    Returns:
-        tuple: (content, status_code, headers)
-    """
-    async with httpx.AsyncClient(
-        follow_redirects=True,
-        timeout=timeout,
-        headers={"User-Agent": DEFAULT_USER_AGENT}
-    ) as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.text, response.status_code, dict(response.headers)
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"HTTP {e.response.status_code}: {url}")
-        except httpx.TimeoutException:
-            raise Exception(f"Request timeout for: {url}")
-        except Exception as e:
-            raise Exception(f"Failed to fetch {url}: {str(e)}")
+    scrape_id: str = Field(
+        ...,
+        description="Scrape ID returned by a scraping tool",
+        min_length=1
+    )
+    offset: int = Field(
+        default=0,
+        description="Character offset to start reading from (use next_cursor from a previous page)",
+        ge=0
+    )
+    length: int = Field(
+        default=CONTENT_PAGE_SIZE,
+        description="Maximum number of characters to return",
+        ge=1,
+        le=CHARACTER_LIMIT
+    )
+    align: Literal["none", "line", "heading"] = Field(
+        default="line",
+        description="Pull the page end back to a line or markdown heading boundary when possible"
+    )
 
 
-def _extract_metadata(soup: BeautifulSoup, url: str) -> dict:
-    """Extract page metadata from HTML."""
-    metadata = {
-        "url": url,
-        "title": None,
-        "description": None,
-        "keywords": None,
-        "author": None,
-        "og_data": {}
-    }
-    
-    # Title
-    if soup.title:
-        metadata["title"] = soup.title.string.strip() if soup.title.string else None
-    
-    # Meta tags
-    for meta in soup.find_all('meta'):
-        name = meta.get('name', '').lower()
-        property_name = meta.get('property', '').lower()
-        content = meta.get('content', '')
-        
-        if name == 'description':
-            metadata["description"] = content
-        elif name == 'keywords':
-            metadata["keywords"] = content
-        elif name == 'author':
-            metadata["author"] = content
-        elif property_name.startswith('og:'):
-            metadata["og_data"][property_name] = content
-    
-    return metadata
+class GetScrapesInput(BaseModel):
+    """Input for fetching many cached scrapes in one call."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
 
+    scrape_ids: List[str] = Field(
+        ...,
+        description="Scrape IDs to fetch (e.g., every scrape_id from a crawl result)",
+        min_items=1,
+        max_items=200
+    )
+    fields: List[Literal["url", "metadata", "content", "preview", "links", "images", "stats"]] = Field(
+        default=["url", "metadata", "content"],
+        description="Fields to include for each scrape"
+    )
+    max_chars_per_item: Optional[int] = Field(
+        default=None,
+        description="Maximum content characters per scrape; longer content returns a next_cursor for webscrape_read_content",
+        ge=1,
+        le=CHARACTER_LIMIT
+    )
 
-def _extract_links(soup: BeautifulSoup, base_url: str, same_domain_only: bool = False, include_anchors: bool = False) -> List[str]:
-    """Extract all links from HTML."""
-    links = set()
-    base_domain = urlparse(base_url).netloc
-    
-    for a_tag in soup.find_all('a', href=True):
-        href = a_tag['href']
-        
-        # Skip empty hrefs
-        if not href or href == '#':
-            continue
-        
-        # Convert relative URLs to absolute
-        absolute_url = urljoin(base_url, href)
-        
-        # Parse URL
-        parsed = urlparse(absolute_url)
-        
-        # Skip non-http(s) protocols
-        if parsed.scheme not in ('http', 'https'):
-            continue
-        
-        # Filter by domain if requested
-        if same_domain_only and parsed.netloc != base_domain:
-            continue
-        
-        # Remove anchor if requested
-        if not include_anchors:
-            absolute_url = urlunparse(parsed._replace(fragment=''))
-        
-        links.add(absolute_url)
-    
-    return sorted(links)
 
+class StartCrawlJobInput(CrawlSiteInput):
+    """Input for starting a background crawl job."""
 
-def _extract_images(soup: BeautifulSoup, base_url: str) -> List[str]:
-    """Extract all image URLs from HTML."""
-    images = set()
-    
-    for img_tag in soup.find_all('img', src=True):
-        src = img_tag['src']
-        absolute_url = urljoin(base_url, src)
-        
-        # Only include http(s) images
-        if urlparse(absolute_url).scheme in ('http', 'https'):
-            images.add(absolute_url)
-    
-    return sorted(images)
+    max_memory_mb: int = Field(
+        default=256,
+        description="Stop the job once the page content it has cached exceeds this many megabytes, counted as UTF-8 bytes",
+        ge=1,
+        le=4096
+    )
+    workers: int = Field(
+        default=1,
+        description="Worker processes; above 1 the crawl is distributed over processes sharing a SQLite frontier, so HTML parsing can use several cores. Use at most one worker per free core; extra workers only add overhead",
+        ge=1,
+        le=MAX_CRAWL_WORKERS
+    )
+    lease_seconds: float = Field(
+        default=120.0,
+        description="Distributed crawls: how long a worker holds a URL before another worker may take it over (crash recovery)",
+        ge=5.0,
+        le=3600.0
+    )
 
 
-def _html_to_markdown(html: str, base_url: str = "") -> str:
-    """Convert HTML to clean markdown."""
-    h = html2text.HTML2Text()
-    h.ignore_links = False
-    h.ignore_images = False
-    h.ignore_emphasis = False
-    h.body_width = 0  # Don't wrap lines
-    h.baseurl = base_url
-    return h.handle(html)
+class StartBatchJobInput(BaseModel):
+    """Input for starting a background batch scrape of many URLs."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
 
+    urls: Optional[List[str]] = Field(
+        default=None,
+        description="URLs to scrape",
+        min_items=1,
+        max_items=MAX_BATCH_URLS
+    )
+    url_file: Optional[str] = Field(
+        default=None,
+        description="Path of a local text file with one URL per line (blank lines and # comments are skipped)"
+    )
+    source_uri: Optional[str] = Field(
+        default=None,
+        description="Resource listing the URLs: sitemap://{discovery_id} for a sitemap discovery's URLs, or scrape://{scrape_id} for a cached scrape with one URL per line"
+    )
+    response_format: ResponseFormat = Field(
+        default=ResponseFormat.MARKDOWN,
+        description="Output format for all URLs"
+    )
+    include_metadata: bool = Field(
+        default=True,
+        description="Include page metadata"
+    )
+    concurrency: int = Field(
+        default=10,
+        description="Maximum number of URLs fetched in parallel; at most per_host_limit of them go to any one origin",
+        ge=1,
+        le=64
+    )
+    url_timeout_seconds: Optional[float] = Field(
+        default=None,
+        description="Give up on a single URL after this many seconds and record it as timed out",
+        gt=0,
+        le=300
+    )
+    per_host_limit: int = Field(
+        default=DEFAULT_PER_HOST_LIMIT,
+        description="Maximum URLs in flight to any one origin (scheme, host and port); requests to an origin reuse its few pooled connections",
+        ge=1,
+        le=64
+    )
+    http2: bool = Field(
+        default=False,
+        description="Multiplex requests to HTTP/2 origins over one connection each (requires the h2 package)"
+    )
+    max_memory_mb: int = Field(
+        default=256,
+        description="Stop the job once the page content it has cached exceeds this many megabytes, counted as UTF-8 bytes",
+        ge=1,
+        le=4096
+    )
+    warc: bool = Field(
+        default=False,
+        description="Archive every raw HTTP request and response to a gzipped WARC file that webscrape_replay_warc can re-scrape offline"
+    )
 
-def _html_to_text(soup: BeautifulSoup) -> str:
+    @model_validator(mode='after')
+    def validate_source(self) -> 'StartBatchJobInput':
+        """Require exactly one URL source."""
+        sources = [name for name in ("urls", "url_file", "source_uri") if getattr(self, name) is not None]
+        if len(sources) != 1:
+            raise ValueError("Provide exactly one of urls, url_file or source_uri")
+        if self.source_uri is not None and not self.source_uri.startswith(("sitemap://", "scrape://")):
+            raise ValueError("source_uri must be a sitemap://{discovery_id} or scrape://{scrape_id} URI")
+        return self
+
+
+class JobIdInput(BaseModel):
+    """Input for looking up or cancelling a background job."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
+
+    job_id: str = Field(
+        ...,
+        description="Job ID returned by webscrape_start_crawl_job or webscrape_start_batch_job",
+        min_length=1
+    )
+
+
+class DiscoverSitemapInput(BaseModel):
+    """Input for discovering a site's URLs from its sitemaps."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
+
+    url: str = Field(
+        ...,
+        description="Site URL (any page) or a direct sitemap URL ending in .xml or .xml.gz",
+        min_length=1
+    )
+    modified_since: Optional[str] = Field(
+        default=None,
+        description="Only return URLs whose lastmod is on or after this ISO date/time (URLs without lastmod are kept)"
+    )
+    max_urls: int = Field(
+        default=1000,
+        description="Maximum number of URLs to return",
+        ge=1,
+        le=50000
+    )
+    same_domain_only: bool = Field(
+        default=True,
+        description="Only return URLs on the site's domain"
+    )
+
+    @field_validator('url')
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        """Validate URL format."""
+        if not v.startswith(('http://', 'https://')):
+            raise ValueError("URL must start with http:// or https://")
+        return v
+
+    @field_validator('modified_since')
+    @classmethod
+    def validate_modified_since(cls, v: Optional[str]) -> Optional[str]:
+        """Validate the lastmod cutoff is an ISO date or date-time."""
+        if v is not None and _parse_lastmod(v) is None:
+            raise ValueError(f"modified_since must be an ISO date or date-time: {v}")
+        return v
+
+
+class ExportResultsInput(BaseModel):
+    """Input for exporting a crawl's or batch job's pages to a local file."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
+
+    crawl_id: str = Field(
+        ...,
+        description="crawl_id from webscrape_crawl_site, or job_id from webscrape_start_crawl_job or webscrape_start_batch_job",
+        min_length=1
+    )
+    format: Literal["jsonl", "parquet"] = Field(
+        default="jsonl",
+        description="File format: 'jsonl' (one JSON object per page) or 'parquet' (columnar, requires pyarrow)"
+    )
+    compression: Literal["none", "gzip", "snappy", "zstd"] = Field(
+        default="none",
+        description="Compression: 'none' or 'gzip' for JSONL; 'none', 'gzip', 'snappy' or 'zstd' for Parquet"
+    )
+    include_content: bool = Field(
+        default=True,
+        description="Include each page's full cached content (pages whose content has expired are exported with content null)"
+    )
+    filename: Optional[str] = Field(
+        default=None,
+        description="File name inside the export directory (default: <crawl_id> plus the format's extension)",
+        max_length=200
+    )
+
+    @field_validator('filename')
+    @classmethod
+    def validate_filename(cls, v: Optional[str]) -> Optional[str]:
+        """Validate the file name cannot escape the export directory."""
+        if v is not None and (not v or v in (".", "..") or "/" in v or "\\" in v):
+            raise ValueError("filename must be a plain file name without directory separators")
+        return v
+
+
+class ReplayWarcInput(BaseModel):
+    """Input for re-scraping pages from a WARC archive without network access."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
+
+    warc_id: str = Field(
+        ...,
+        description="warc_id returned by a crawl or batch run with warc=True",
+        min_length=1,
+        max_length=200
+    )
+    urls: Optional[List[str]] = Field(
+        default=None,
+        description="Only replay responses for these URLs (default: every response in the archive)"
+    )
+    response_format: ResponseFormat = Field(
+        default=ResponseFormat.MARKDOWN,
+        description="Output format for the replayed pages"
+    )
+    include_metadata: bool = Field(
+        default=True,
+        description="Include page metadata"
+    )
+    max_records: int = Field(
+        default=100,
+        description="Maximum responses to replay",
+        ge=1,
+        le=1000
+    )
+
+    @field_validator('warc_id')
+    @classmethod
+    def validate_warc_id(cls, v: str) -> str:
+        """Validate the ID names a file inside the WARC directory."""
+        if v in (".", "..") or "/" in v or "\\" in v:
+            raise ValueError("warc_id must be a plain ID without directory separators")
+        return v
+
+
+class ResumeCrawlInput(BaseModel):
+    """Input for resuming an interrupted crawl from its checkpoint."""
+    model_config = ConfigDict(
+        str_strip_whitespace=True,
+        validate_assignment=True,
+        extra='forbid'
+    )
+
+    crawl_id: str = Field(
+        ...,
+        description="crawl_id from webscrape_crawl_site or job_id from webscrape_start_crawl_job",
+        min_length=1
+    )
+
+
+# ============================================================================
+# Utility Functions
+# ============================================================================
+
+def _create_http_client(
+    timeout: float = DEFAULT_TIMEOUT,
+    warc: Optional["WarcWriter"] = None,
+    http2: bool = False
+) -> httpx.AsyncClient:
+    """
+    Create an HTTP client with the server's default settings, archiving
+    every exchange to warc if given.
+
+    With http2, requests to an HTTP/2 origin are multiplexed over a single
+    connection. This needs the optional h2 package.
+    """
+    if http2 and importlib.util.find_spec("h2") is None:
+        raise Exception("HTTP/2 requires the h2 package. Install with: pip install 'httpx[http2]'")
+    transport = None
+    if warc is not None or http2:
+        transport = httpx.AsyncHTTPTransport(http2=http2)
+        if warc is not None:
+            transport = WarcRecordingTransport(warc, transport)
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=timeout,
+        headers={"User-Agent": DEFAULT_USER_AGENT},
+        transport=transport
+    )
+
+
+async def _fetch_url(
+    url: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    client: Optional[httpx.AsyncClient] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> tuple[str, int, dict]:
+    """
+    Fetch URL content with proper error handling.
+
+    Pass a shared client to reuse its connection pool across requests;
+    otherwise a short-lived client is created for this request. Extra
+    request headers (e.g. conditional request validators) are sent as
+    given; a 304 Not Modified response returns empty content.
+    
+    Returns:
+        tuple: (content, status_code, headers)
+    """
+    if client is None:
+        async with _create_http_client(timeout) as own_client:
+            return await _fetch_url(url, timeout, own_client, headers)
+
+    try:
+        response = await client.get(url, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response.text, response.status_code, dict(response.headers)
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"HTTP {e.response.status_code}: {url}")
+    except httpx.TimeoutException:
+        raise Exception(f"Request timeout for: {url}")
+    except Exception as e:
+        raise Exception(f"Failed to fetch {url}: {str(e)}")
+
+
+def _host_limit(params: "CrawlSiteInput") -> int:
+    """Pages a crawl may fetch from one origin at once: per_host_limit, or concurrency if unset."""
+    return params.per_host_limit if params.per_host_limit is not None else params.concurrency
+
+
+def _url_origin(url: str) -> str:
+    """scheme://host[:port] of a URL, the unit httpx pools connections by."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class ConnectionStats:
+    """
+    Counts an HTTP client's requests against the connections it opened.
+
+    Attached as a request hook that sets httpcore's trace extension on
+    every request, so new TCP connections, TLS handshakes and HTTP/2
+    connection setups are seen as they happen, redirects included.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.http2_connections = 0
+
+    def attach(self, client: httpx.AsyncClient) -> httpx.AsyncClient:
+        client.event_hooks["request"].append(self._on_request)
+        return client
+
+    async def _on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event: str, info: Dict[str, Any]):
+        if event in ("connection.connect_tcp.complete", "connection.connect_unix_socket.complete"):
+            self.connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event == "http2.send_connection_init.complete":
+            self.http2_connections += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections,
+            "tls_handshakes": self.tls_handshakes,
+            "http2_connections": self.http2_connections,
+            "requests_per_connection": round(self.requests / self.connections, 2) if self.connections else None
+        }
+
+
+class HostScheduler:
+    """
+    Hands out URLs grouped by origin, taking origins in turn.
+
+    No origin gets more than limit URLs in flight, so each one's requests
+    queue for a few reused keep-alive (or one HTTP/2) connections instead
+    of opening a socket per URL, while the remaining capacity goes to the
+    other origins. Up to window URLs are read ahead from the source into
+    per-origin queues. When every buffered origin is at its limit (e.g. a
+    source sorted by host), reading continues past the window, up to
+    max_buffer URLs, until a URL for another origin turns up. Callers
+    release() each URL's origin when it finishes.
+    """
+
+    def __init__(
+        self,
+        items: Iterator[tuple[int, str]],
+        limit: int,
+        window: int,
+        max_buffer: Optional[int] = None
+    ):
+        self.items = items
+        self.limit = limit
+        self.window = window
+        self.max_buffer = max(window, max_buffer or window)
+        self.queues: Dict[str, deque] = {}
+        self.rotation: deque = deque()
+        self.active: Dict[str, int] = {}
+        self.buffered = 0
+        self.exhausted = False
+
+    def _read(self) -> Optional[str]:
+        """Buffer the next source URL and return its origin, or None once the source is exhausted."""
+        try:
+            index, url = next(self.items)
+        except StopIteration:
+            self.exhausted = True
+            return None
+        origin = _url_origin(url)
+        if origin not in self.queues:
+            self.queues[origin] = deque()
+            self.rotation.append(origin)
+        self.queues[origin].append((index, url))
+        self.buffered += 1
+        return origin
+
+    def _take(self, origin: str) -> tuple[int, str, str]:
+        queue = self.queues[origin]
+        index, url = queue.popleft()
+        if not queue:
+            del self.queues[origin]
+            self.rotation.remove(origin)
+        self.buffered -= 1
+        self.active[origin] = self.active.get(origin, 0) + 1
+        return index, url, origin
+
+    def next(self) -> Optional[tuple[int, str, str]]:
+        """
+        Take the next URL from the first origin in turn that is below its limit.
+
+        Returns:
+            (index, url, origin), or None if every queued origin is at its
+            limit and max_buffer is reached, or nothing is left
+        """
+        while not self.exhausted and self.buffered < self.window:
+            self._read()
+        for _ in range(len(self.rotation)):
+            origin = self.rotation[0]
+            self.rotation.rotate(-1)
+            if self.active.get(origin, 0) < self.limit:
+                return self._take(origin)
+        while not self.exhausted and self.buffered < self.max_buffer:
+            origin = self._read()
+            if origin is not None and self.active.get(origin, 0) < self.limit:
+                return self._take(origin)
+        return None
+
+    def release(self, origin: str):
+        self.active[origin] -= 1
+        if not self.active[origin]:
+            del self.active[origin]
+
+
+def _extract_metadata(soup: BeautifulSoup, url: str) -> dict:
+    """Extract page metadata from HTML."""
+    metadata = {
+        "url": url,
+        "title": None,
+        "description": None,
+        "keywords": None,
+        "author": None,
+        "og_data": {}
+    }
+    
+    # Title
+    if soup.title:
+        metadata["title"] = soup.title.string.strip() if soup.title.string else None
+    
+    # Meta tags
+    for meta in soup.find_all('meta'):
+        name = meta.get('name', '').lower()
+        property_name = meta.get('property', '').lower()
+        content = meta.get('content', '')
+        
+        if name == 'description':
+            metadata["description"] = content
+        elif name == 'keywords':
+            metadata["keywords"] = content
+        elif name == 'author':
+            metadata["author"] = content
+        elif property_name.startswith('og:'):
+            metadata["og_data"][property_name] = content
+    
+    return metadata
+
+
+def _extract_links(soup: BeautifulSoup, base_url: str, same_domain_only: bool = False, include_anchors: bool = False) -> List[str]:
+    """Extract all links from HTML."""
+    links = set()
+    base_domain = urlparse(base_url).netloc
+    
+    for a_tag in soup.find_all('a', href=True):
+        href = a_tag['href']
+        
+        # Skip empty hrefs
+        if not href or href == '#':
+            continue
+        
+        # Convert relative URLs to absolute
+        absolute_url = urljoin(base_url, href)
+        
+        # Parse URL
+        parsed = urlparse(absolute_url)
+        
+        # Skip non-http(s) protocols
+        if parsed.scheme not in ('http', 'https'):
+            continue
+        
+        # Filter by domain if requested
+        if same_domain_only and parsed.netloc != base_domain:
+            continue
+        
+        # Remove anchor if requested
+        if not include_anchors:
+            absolute_url = urlunparse(parsed._replace(fragment=''))
+        
+        links.add(absolute_url)
+    
+    return sorted(links)
+
+
+def _extract_anchor_texts(soup: BeautifulSoup, base_url: str) -> Dict[str, str]:
+    """Map each absolute link URL (without fragment) to the text of its first anchor."""
+    anchors = {}
+    for a_tag in soup.find_all('a', href=True):
+        parsed = urlparse(urljoin(base_url, a_tag['href']))
+        url = urlunparse(parsed._replace(fragment=''))
+        if url not in anchors:
+            anchors[url] = a_tag.get_text(" ", strip=True)
+    return anchors
+
+
+def _extract_images(soup: BeautifulSoup, base_url: str) -> List[str]:
+    """Extract all image URLs from HTML."""
+    images = set()
+    
+    for img_tag in soup.find_all('img', src=True):
+        src = img_tag['src']
+        absolute_url = urljoin(base_url, src)
+        
+        # Only include http(s) images
+        if urlparse(absolute_url).scheme in ('http', 'https'):
+            images.add(absolute_url)
+    
+    return sorted(images)
+
+
+def _html_to_markdown(html: str, base_url: str = "") -> str:
+    """Convert HTML to clean markdown."""
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.ignore_images = False
+    h.ignore_emphasis = False
+    h.body_width = 0  # Don't wrap lines
+    h.baseurl = base_url
+    return h.handle(html)
+
+
+def _html_to_text(soup: BeautifulSoup) -> str:
     """Extract clean text from HTML."""
     # Remove script and style elements
     for script in soup(["script", "style", "nav", "footer", "header"]):
@@ -486,6 +1515,44 @@ def _truncate_response(content: str, format_type: str = "text") -> tuple[str, bo
     return truncated, True
 
 
+def _dump_inlined(output: Dict[str, Any], list_key: str, count_key: str, total: int, noun: str, uri_key: str) -> str:
+    """
+    Serialize a response, dropping inlined items from the end until it fits.
+
+    Items are measured in the serialized response itself, so their nesting
+    depth and the size of every other field are accounted for. When fewer
+    than total items remain, a note points to the resource with the rest.
+
+    Args:
+        output: Response object; output[list_key] is trimmed in place
+        list_key: Key of the inlined item list
+        count_key: Key that receives the number of items kept
+        total: Number of items available from the resource
+        noun: What the items are, for the note (e.g. "page results")
+        uri_key: Key of the resource URI the rest are read from
+
+    Returns:
+        str: JSON of at most CHARACTER_LIMIT characters, unless the fields
+            other than the list alone exceed it
+    """
+    items = output[list_key]
+    while True:
+        output[count_key] = len(items)
+        if len(items) < total:
+            output["note"] = (
+                f"Showing {len(items)} of {total} {noun}. "
+                f"Read the rest from {uri_key} and follow next_cursor."
+            )
+        serialized = json.dumps(output, indent=2)
+        excess = len(serialized) - CHARACTER_LIMIT
+        if excess <= 0 or not items:
+            return serialized
+        # An item's top-level size understates its nested size, so dropping
+        # until the estimate covers the excess always makes enough room
+        while excess > 0 and items:
+            excess -= len(json.dumps(items.pop(), indent=2)) + 2
+
+
 
 
 # ============================================================================
@@ -507,276 +1574,3278 @@ def _generate_scrape_id(url: str, format_or_suffix: str) -> str:
     return hashlib.md5(unique_string.encode()).hexdigest()
 
 
-def _clean_expired_cache():
-    """Remove expired entries from the scrape cache."""
-    current_time = datetime.utcnow()
-    expired_ids = []
+def _content_hash(content: Union[str, bytes]) -> str:
+    """
+    Compute the content-addressed key for a cached body.
 
-    for scrape_id, entry in SCRAPE_CACHE.items():
-        if current_time > entry.get("expires_at", current_time):
-            expired_ids.append(scrape_id)
+    Args:
+        content: Full scraped content, or raw bytes for binary captures
 
-    for scrape_id in expired_ids:
-        del SCRAPE_CACHE[scrape_id]
+    Returns:
+        SHA-256 hex digest of the content
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
 
 
-def _store_in_cache(
-    scrape_id: str,
-    url: str,
-    content: str,
-    metadata: Optional[Dict[str, Any]] = None,
-    links: Optional[List[str]] = None,
-    images: Optional[List[str]] = None
-):
+def _content_bytes(content: Union[str, bytes]) -> int:
+    """UTF-8 size of a body; content_length counts characters, which undercounts non-ASCII text."""
+    if isinstance(content, bytes) or content.isascii():
+        return len(content)
+    return len(content.encode("utf-8"))
+
+
+def _acquire_content(scrape_id: str, content: Union[str, bytes]) -> str:
     """
-    Store scrape results in cache for resource-based access.
+    Register a reference from a scrape ID to a content body.
+
+    Identical bodies are stored once in CONTENT_STORE; each scrape that
+    produced the body is recorded as a reference to it.
 
     Args:
-        scrape_id: Unique identifier for this scrape
-        url: Original URL
+        scrape_id: Scrape ID taking the reference
         content: Full scraped content
-        metadata: Optional page metadata
-        links: Optional list of links
-        images: Optional list of images
+
+    Returns:
+        Content hash under which the body is stored
     """
-    # Clean expired entries first
-    _clean_expired_cache()
+    content_hash = _content_hash(content)
 
-    # Store the scrape result
-    SCRAPE_CACHE[scrape_id] = {
-        "url": url,
-        "content": content,
-        "metadata": metadata or {},
-        "links": links or [],
-        "images": images or [],
-        "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)
-    }
+    def add_reference(body):
+        if body is None:
+            body = {"content": content, "length": len(content), "scrape_ids": set()}
+        body["scrape_ids"].add(scrape_id)
+        return body
 
+    CONTENT_STORE.update(content_hash, add_reference)
+    return content_hash
 
 
+def _release_content(scrape_id: str, content_hash: str):
+    """Drop a scrape's reference to a body, freeing it once unreferenced."""
+    def drop_reference(body):
+        if body is None:
+            return None
+        body["scrape_ids"].discard(scrape_id)
+        return body if body["scrape_ids"] else None
 
-# ============================================================================
-# Cache Management Functions (Progressive Disclosure Pattern)
-# ============================================================================
+    CONTENT_STORE.update(content_hash, drop_reference)
 
-def _generate_scrape_id(url: str, format_or_suffix: str) -> str:
+
+def _evict_from_cache(scrape_id: str, expired_only: bool = False, local_only: bool = False):
     """
-    Generate a unique ID for a scrape operation.
+    Remove a scrape entry and release its content body.
+
+    With expired_only, the entry is removed only if it is still expired at
+    removal time, so a concurrent re-scrape under the same ID is kept. The
+    body reference is dropped while the entry's shard is locked, which keeps
+    reference changes for one scrape ID strictly ordered. With local_only,
+    the shared cache copy is kept.
+    """
+    now = datetime.utcnow()
+
+    def remove(entry):
+        if entry is None or (expired_only and now <= entry["expires_at"]):
+            return entry
+        _release_content(scrape_id, entry["content_hash"])
+        return None
+
+    SCRAPE_CACHE.update(scrape_id, remove)
+
+    # Explicit evictions also apply to the shared cache; expiry there is
+    # handled by its own sweep
+    if SHARED_CACHE is not None and not expired_only and not local_only:
+        SHARED_CACHE.evict(scrape_id)
+
+
+def _read_cached_slice(entry: Dict[str, Any], start: int = 0, end: Optional[int] = None) -> Union[str, bytes]:
+    """
+    Resolve a cache entry's content pointer and return body[start:end].
+
+    Bodies held in this process are sliced in memory; bodies only present in
+    the shared cache are sliced by SQLite so the rest never leaves the file.
+    """
+    body = CONTENT_STORE.get(entry["content_hash"])
+    if body is not None:
+        return body["content"][start:end]
+
+    if SHARED_CACHE is not None:
+        if start == 0 and end is None:
+            length = None
+        else:
+            length = (entry["content_length"] if end is None else end) - start
+        content = SHARED_CACHE.read_body(entry["content_hash"], start, length)
+        if content is not None:
+            return content
+
+    raise Exception("Cached content has been evicted. Please perform the scrape operation again.")
+
+
+def _get_cached_content(entry: Dict[str, Any]) -> Union[str, bytes]:
+    """Resolve a cache entry's content pointer to the stored body."""
+    return _read_cached_slice(entry)
+
+
+def _content_refs(scrape_id: str, entry: Dict[str, Any]) -> tuple[int, List[str]]:
+    """Return how many scrapes share this entry's body and a sample of the others."""
+    refs, scrape_ids = CONTENT_STORE.view(
+        entry["content_hash"],
+        lambda body: (
+            len(body["scrape_ids"]),
+            list(itertools.islice(body["scrape_ids"], SHARED_WITH_LIMIT + 1))
+        ),
+        default=(0, [])
+    )
+    if not refs and SHARED_CACHE is not None:
+        refs, scrape_ids = SHARED_CACHE.body_refs(entry["content_hash"], SHARED_WITH_LIMIT + 1)
+    return refs, sorted(sid for sid in scrape_ids if sid != scrape_id)[:SHARED_WITH_LIMIT]
+
+
+def _to_data_uri(data: bytes, mime_type: str) -> str:
+    """Encode binary content as a base64 data URI."""
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def _get_cache_entry(scrape_id: str) -> Dict[str, Any]:
+    """
+    Look up a live cache entry, falling back to the shared cache for scrapes
+    made by another server process.
+
+    Raises:
+        Exception: If scrape ID not found or expired
+    """
+    entry = SCRAPE_CACHE.get(scrape_id)
+
+    if entry is None and SHARED_CACHE is not None:
+        entry = SHARED_CACHE.get(scrape_id)
+
+    if entry is None:
+        raise Exception(
+            f"Scrape ID '{scrape_id}' not found in cache. "
+            f"It may have expired (TTL: {CACHE_TTL_SECONDS}s) or never existed. "
+            f"Please perform the scrape operation again."
+        )
+
+    if datetime.utcnow() > entry["expires_at"]:
+        _evict_from_cache(scrape_id, expired_only=True)
+        raise Exception(
+            f"Scrape ID '{scrape_id}' has expired. "
+            f"Cache TTL is {CACHE_TTL_SECONDS} seconds. "
+            f"Please scrape the URL again."
+        )
+
+    return entry
+
+
+def _read_content_range(
+    scrape_id: str,
+    offset: int = 0,
+    length: int = CONTENT_PAGE_SIZE,
+    align: str = "line"
+) -> Dict[str, Any]:
+    """
+    Read one page of cached content without materializing the whole body.
+
+    The page end is pulled back to the last heading or line break inside the
+    window when requested, so pages split on natural boundaries. A window with
+    no such boundary falls back to a hard cut to guarantee progress. Binary
+    entries are paged by byte offset and each slice is returned base64-encoded.
 
     Args:
-        url: The URL being scraped
-        format_or_suffix: Format type or additional suffix for uniqueness
+        scrape_id: Unique identifier from a scrape operation
+        offset: Character offset of the page start
+        length: Maximum characters in the page
+        align: "none", "line", or "heading"
 
     Returns:
-        MD5 hash string as scrape ID
+        dict: Page content with offset, total_length and next_cursor
     """
-    unique_string = f"{url}_{format_or_suffix}_{int(time.time())}"
-    return hashlib.md5(unique_string.encode()).hexdigest()
+    entry = _get_cache_entry(scrape_id)
+    total_length = entry["content_length"]
+    start = min(offset, total_length)
+    end = min(start + length, total_length)
+    window = _read_cached_slice(entry, start, end)
+    is_binary = isinstance(window, bytes)
+
+    if end < total_length and align != "none" and not is_binary:
+        cut = -1
+        if align == "heading":
+            cut = window.rfind("\n#")
+        if cut <= 0:
+            cut = window.rfind("\n")
+        if cut > 0:
+            end = start + cut + 1
+            window = window[:cut + 1]
+
+    page = {
+        "scrape_id": scrape_id,
+        "offset": start,
+        "length": end - start,
+        "total_length": total_length,
+        "next_cursor": str(end) if end < total_length else None,
+        "content": window
+    }
+    if is_binary:
+        page["mime_type"] = entry["mime_type"]
+        page["encoding"] = "base64"
+        page["content"] = base64.b64encode(page["content"]).decode("ascii")
+    return page
+
 
+def _clean_expired_cache(force: bool = False):
+    """
+    Remove expired entries from the scrape cache.
+
+    Runs at most once per CACHE_SWEEP_INTERVAL_SECONDS unless forced, and
+    only pops entries that are due from the expiry heap, so its cost
+    follows the number of expired scrapes rather than the cache size.
+    Reads check expiry themselves, so an entry that expires between sweeps
+    is never served.
+    """
+    global _last_cache_sweep
+    now = time.monotonic()
+    if not force and now - _last_cache_sweep < CACHE_SWEEP_INTERVAL_SECONDS:
+        return
+    _last_cache_sweep = now
 
-def _clean_expired_cache():
-    """Remove expired entries from the scrape cache."""
     current_time = datetime.utcnow()
     expired_ids = []
-
-    for scrape_id, entry in SCRAPE_CACHE.items():
-        if current_time > entry.get("expires_at", current_time):
-            expired_ids.append(scrape_id)
+    with CACHE_EXPIRY_LOCK:
+        while CACHE_EXPIRY and CACHE_EXPIRY[0][0] < current_time:
+            expired_ids.append(heapq.heappop(CACHE_EXPIRY)[1])
 
     for scrape_id in expired_ids:
-        del SCRAPE_CACHE[scrape_id]
+        _evict_from_cache(scrape_id, expired_only=True)
+
+    if SHARED_CACHE is not None:
+        SHARED_CACHE.expire()
+
+    _clean_expired_runs()
 
 
 def _store_in_cache(
     scrape_id: str,
     url: str,
-    content: str,
+    content: Union[str, bytes],
     metadata: Optional[Dict[str, Any]] = None,
     links: Optional[List[str]] = None,
-    images: Optional[List[str]] = None
+    images: Optional[List[str]] = None,
+    mime_type: str = "text/plain"
 ):
     """
     Store scrape results in cache for resource-based access.
 
+    The content body is stored once per unique content hash; the cache entry
+    only keeps a pointer to it, so repeated scrapes of identical pages share
+    a single copy.
+
     Args:
         scrape_id: Unique identifier for this scrape
         url: Original URL
-        content: Full scraped content
+        content: Full scraped content, or raw bytes for binary captures
         metadata: Optional page metadata
         links: Optional list of links
         images: Optional list of images
+        mime_type: MIME type of the content
     """
-    # Clean expired entries first
-    _clean_expired_cache()
+    # Precompute stats so metadata reads never touch the body
+    if isinstance(content, bytes):
+        preview = None
+    else:
+        preview = content[:PREVIEW_LENGTH]
+        if len(content) > PREVIEW_LENGTH:
+            preview += "..."
 
-    # Store the scrape result
-    SCRAPE_CACHE[scrape_id] = {
+    entry = {
         "url": url,
-        "content": content,
         "metadata": metadata or {},
         "links": links or [],
         "images": images or [],
+        "link_count": len(links or []),
+        "image_count": len(images or []),
+        "content_length": len(content),
+        "content_bytes": _content_bytes(content),
+        "preview": preview,
+        "mime_type": mime_type,
         "created_at": datetime.utcnow(),
         "expires_at": datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)
     }
 
+    # Store the scrape result; re-scraping within the same ID window replaces
+    # the previous entry and releases its body under the same shard lock
+    def install(previous):
+        entry["content_hash"] = _acquire_content(scrape_id, content)
+        if previous is not None and previous["content_hash"] != entry["content_hash"]:
+            _release_content(scrape_id, previous["content_hash"])
+        return entry
 
-# ============================================================================
-# Tool Implementations
-# ============================================================================
+    SCRAPE_CACHE.update(scrape_id, install)
+    with CACHE_EXPIRY_LOCK:
+        heapq.heappush(CACHE_EXPIRY, (entry["expires_at"], scrape_id))
 
+    # Write through so other server processes can resolve this scrape ID
+    if SHARED_CACHE is not None:
+        SHARED_CACHE.put(scrape_id, entry, content)
 
 
 # ============================================================================
-# Discovery Tools (Progressive Disclosure)
+# Result Logs (Streamed Crawl Output)
 # ============================================================================
 
-# ============================================================================
-# Resource Access Endpoints (Progressive Disclosure)
-# ============================================================================
+class ResultLog:
+    """
+    Append-only JSONL spool of per-page results on local disk.
+
+    Results are written as they are produced, so a crawl's memory use does
+    not grow with its page count, and readers can page through what has been
+    written so far using byte-offset cursors while the crawl is running.
+    """
+
+    def __init__(self, run_id: str):
+        os.makedirs(RESULT_LOG_DIR, exist_ok=True)
+        self.run_id = run_id
+        self.path = os.path.join(RESULT_LOG_DIR, f"{run_id}.jsonl")
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.count = 0
+        self.complete = False
+
+    def append(self, result: Dict[str, Any]):
+        self._file.write(json.dumps(result, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self.complete = True
+        if not self._file.closed:
+            self._file.close()
+
+    def delete(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def rewind(self, count: int):
+        """Drop every result after the first count, reopening the log for appends."""
+        self._file.close()
+        kept = 0
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if kept == count or not line.endswith(b"\n"):
+                    break
+                kept += 1
+                offset += len(line)
+        with open(self.path, "r+b") as f:
+            f.truncate(offset)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.count = kept
+        self.complete = False
+
+    def read_page(self, cursor: int, limit: int = RESULTS_PAGE_SIZE) -> tuple[List[Dict[str, Any]], int]:
+        """
+        Read up to limit complete results starting at a byte offset.
+
+        Stops early once the page reaches CHARACTER_LIMIT, so a page never
+        has to be truncated mid-result.
+
+        Returns:
+            tuple: (results, byte offset of the next unread result)
+        """
+        items = []
+        size = 0
+        with open(self.path, "rb") as f:
+            f.seek(cursor)
+            while len(items) < limit:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                if items and size + len(line) > CHARACTER_LIMIT:
+                    break
+                items.append(json.loads(line))
+                size += len(line)
+                cursor += len(line)
+        return items, cursor
+
+
+# Result logs of crawls and batches (run ID -> log and summary)
+RESULT_LOGS = ShardedCache()
+
+
+def _register_result_log(kind: str, run_id: Optional[str] = None) -> ResultLog:
+    """Create and register a result log for a new (or resumed) crawl or batch run."""
+    run_id = run_id or uuid.uuid4().hex
+    log = ResultLog(run_id)
+    RESULT_LOGS[run_id] = {
+        "kind": kind,
+        "log": log,
+        "streams": {},
+        "graph": None,
+        "summary": {},
+        "created_at": datetime.utcnow(),
+        "expires_at": None
+    }
+    return log
+
+
+def _attach_result_stream(log: ResultLog, stream: str) -> ResultLog:
+    """Create a secondary log (e.g. suppressed trap URLs) that lives and expires with a run."""
+    side_log = ResultLog(f"{log.run_id}.{stream}")
+
+    def attach(run):
+        if run is not None:
+            run["streams"][stream] = side_log
+        return run
+
+    RESULT_LOGS.update(log.run_id, attach)
+    return side_log
+
+
+def _finish_result_log(log: ResultLog, summary: Dict[str, Any]):
+    """Mark a run complete and start its retention period under the cache TTL."""
+    log.close()
+
+    def finish(run):
+        if run is not None:
+            for side_log in run["streams"].values():
+                side_log.close()
+            run["summary"] = summary
+            run["expires_at"] = datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)
+        return run
+
+    RESULT_LOGS.update(log.run_id, finish)
+
+
+def _clean_expired_runs():
+    """Delete result logs whose retention period has passed."""
+    current_time = datetime.utcnow()
+    for run_id, run in RESULT_LOGS.items():
+        if run["expires_at"] is not None and current_time > run["expires_at"]:
+            RESULT_LOGS.pop(run_id)
+            JOBS.pop(run_id)
+            run["log"].delete()
+            for side_log in run["streams"].values():
+                side_log.delete()
+            CrawlCheckpoint.remove(run_id)
+            SharedFrontier.remove(run_id)
+
+
+def _read_result_log(kind: str, run_id: str, cursor: str, stream: Optional[str] = None) -> str:
+    """Serialize one page of a run's result log (or a named secondary stream) for the results resources."""
+    if not cursor.isdigit():
+        raise Exception(f"Invalid cursor '{cursor}'. Use \"0\" or a next_cursor value.")
+
+    run = RESULT_LOGS.get(run_id)
+    if run is None or run["kind"] != kind:
+        raise Exception(
+            f"{kind.capitalize()} ID '{run_id}' not found. "
+            f"Results are kept for {CACHE_TTL_SECONDS}s after the run finishes."
+        )
+
+    log = run["log"] if stream is None else run["streams"].get(stream)
+    if log is None:
+        raise Exception(f"{kind.capitalize()} '{run_id}' has no {stream} log.")
+    results, next_offset = log.read_page(int(cursor))
+    drained = log.complete and not results
+
+    return json.dumps({
+        f"{kind}_id": run_id,
+        "complete": log.complete,
+        "results_written": log.count,
+        "offset": int(cursor),
+        "next_cursor": None if drained else str(next_offset),
+        "results": results,
+        "summary": run["summary"] if log.complete else None
+    }, separators=(",", ":"))
+
 
 # ============================================================================
-# Discovery Tools (Progressive Disclosure)
+# WARC Archives
 # ============================================================================
 
-@mcp.tool(
-    name="webscrape_list_tools",
-    annotations={
-        "title": "List WebScrape Tools",
-        "readOnlyHint": True,
-        "destructiveHint": False,
-        "idempotentHint": True
-    }
-)
-async def list_tools(
-    detail_level: Literal["minimal", "brief", "full"] = "minimal",
-    category: Optional[str] = None
-) -> str:
-    """
-    List available web scraping tools with configurable detail level.
+def _warc_digest(data: bytes) -> str:
+    return "sha1:" + base64.b32encode(hashlib.sha1(data).digest()).decode("ascii")
 
-    Enables progressive disclosure - agents can discover tools without loading
-    all schemas into context upfront.
 
-    Args:
-        detail_level: Amount of detail to return
-            - "minimal": Just tool names (smallest token usage)
-            - "brief": Names and descriptions
-            - "full": Complete schemas with all parameters
-        category: Optional filter by category ("scraping", "extraction", "rendering")
+class WarcWriter:
+    """
+    Append-only WARC/1.1 file with one gzip member per record.
 
-    Returns:
-        JSON string with tool information based on detail level
+    Per-record compression keeps the file readable by standard WARC tools
+    and lets a reader stop at a torn final record after a crash. Files are
+    opened in append mode, so a resumed crawl keeps adding to its archive.
     """
-    tools = {
-        "webscrape_scrape_url": {
-            "name": "webscrape_scrape_url",
-            "description": "Scrape content from a single URL",
-            "category": "scraping",
-            "best_for": ["Extracting article content", "Getting page information", "Converting web pages to markdown"]
-        },
-        "webscrape_scrape_multiple_urls": {
-            "name": "webscrape_scrape_multiple_urls",
-            "description": "Scrape multiple URLs concurrently (batch operation)",
-            "category": "scraping",
-            "best_for": ["Scraping multiple pages from a sitemap", "Batch processing article URLs", "Comparing content across pages"]
-        },
-        "webscrape_crawl_site": {
-            "name": "webscrape_crawl_site",
-            "description": "Recursively crawl a website following links",
-            "category": "scraping",
-            "best_for": ["Discovering all pages in a section", "Scraping documentation sites", "Building sitemaps"]
-        },
-        "webscrape_extract_links": {
-            "name": "webscrape_extract_links",
-            "description": "Extract all links from a web page",
-            "category": "extraction",
-            "best_for": ["Site mapping", "Finding all subpages", "Link analysis"]
-        },
-        "webscrape_scrape_with_js": {
-            "name": "webscrape_scrape_with_js",
-            "description": "Scrape JavaScript-rendered pages using headless browser",
-            "category": "rendering",
-            "best_for": ["Single Page Applications", "Pages with lazy-loaded content", "JavaScript-heavy websites"]
-        },
-        "webscrape_screenshot_url": {
-            "name": "webscrape_screenshot_url",
-            "description": "Capture a screenshot of a web page",
-            "category": "rendering",
-            "best_for": ["Visual documentation", "Page appearance verification", "Creating thumbnails"]
+
+    def __init__(self, warc_id: str):
+        os.makedirs(WARC_DIR, exist_ok=True)
+        self.warc_id = warc_id
+        self.path = os.path.join(WARC_DIR, f"{warc_id}.warc.gz")
+        self._file = open(self.path, "ab")
+        self.records = 0
+        if self._file.tell() == 0:
+            info = b"software: webscrape-mcp\r\nformat: WARC File Format 1.1\r\n"
+            self._write_record("warcinfo", None, info, "application/warc-fields")
+
+    def _write_record(
+        self,
+        warc_type: str,
+        target_uri: Optional[str],
+        block: bytes,
+        content_type: str,
+        extra: Optional[Dict[str, str]] = None
+    ) -> str:
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        headers = {
+            "WARC-Type": warc_type,
+            "WARC-Record-ID": record_id,
+            "WARC-Date": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
         }
-    }
+        if target_uri is not None:
+            headers["WARC-Target-URI"] = target_uri
+        headers.update(extra or {})
+        headers["WARC-Block-Digest"] = _warc_digest(block)
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(len(block))
+        head = "WARC/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        self._file.write(gzip.compress(head.encode("utf-8") + block + b"\r\n\r\n"))
+        self._file.flush()
+        self.records += 1
+        return record_id
+
+    def write_exchange(self, request: httpx.Request, response: httpx.Response, body: bytes):
+        """
+        Record a request and its response as they crossed the wire.
+
+        Header lines are kept byte for byte and the body is the payload as
+        received, still content-encoded; HTTP/1.1 chunked framing has
+        already been removed by the connection layer.
+        """
+        target = str(request.url)
+        target_path = request.url.raw_path.decode("ascii")
+        request_block = f"{request.method} {target_path} HTTP/1.1\r\n".encode("ascii")
+        request_block += b"".join(k + b": " + v + b"\r\n" for k, v in request.headers.raw) + b"\r\n"
+        request_block += request.content
+
+        http_version = response.extensions.get("http_version", b"HTTP/1.1")
+        reason = response.extensions.get("reason_phrase") or httpx.codes.get_reason_phrase(response.status_code).encode("ascii")
+        response_block = http_version + f" {response.status_code} ".encode("ascii") + reason + b"\r\n"
+        response_block += b"".join(k + b": " + v + b"\r\n" for k, v in response.headers.raw) + b"\r\n"
+        response_block += body
+
+        response_id = self._write_record(
+            "response", target, response_block, "application/http;msgtype=response",
+            {"WARC-Payload-Digest": _warc_digest(body)}
+        )
+        self._write_record(
+            "request", target, request_block, "application/http;msgtype=request",
+            {"WARC-Concurrent-To": response_id}
+        )
 
-    # Filter by category if requested
-    if category:
-        tools = {k: v for k, v in tools.items() if v.get("category") == category}
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
 
-    # Return based on detail level
-    if detail_level == "minimal":
-        return json.dumps(list(tools.keys()), indent=2)
-    elif detail_level == "brief":
-        brief_tools = [
-            {
-                "name": v["name"],
-                "description": v["description"],
-                "category": v["category"]
-            }
-            for v in tools.values()
-        ]
-        return json.dumps(brief_tools, indent=2)
-    else:  # full
-        return json.dumps(tools, indent=2)
 
+class WarcRecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that archives each exchange, redirects included.
 
-@mcp.tool(
-    name="webscrape_search_tools",
-    annotations={
-        "title": "Search WebScrape Tools",
-        "readOnlyHint": True,
-        "destructiveHint": False,
-        "idempotentHint": True
-    }
-)
-async def search_tools(
-    query: str,
-    category: Optional[str] = None
-) -> str:
+    The raw body is read from the wrapped transport before httpx decodes
+    it, written to the WARC, and handed back unchanged in a new response.
     """
-    Search for web scraping tools by keyword or category.
 
-    Args:
-        query: Search term (e.g., "javascript", "crawl", "links", "batch")
-        category: Optional category filter ("scraping", "extraction", "rendering")
+    def __init__(self, warc: WarcWriter, transport: httpx.AsyncBaseTransport):
+        self.warc = warc
+        self.transport = transport
 
-    Returns:
-        JSON array of matching tools with their descriptions
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        try:
+            body = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        self.warc.write_exchange(request, response, body)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(body),
+            extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _open_warc(enabled: bool, warc_id: str) -> Optional[WarcWriter]:
+    """Open the run's WARC writer when archiving is enabled."""
+    return WarcWriter(warc_id) if enabled else None
+
+
+def _iter_warc_records(path: str):
     """
-    tools = {
-        "webscrape_scrape_url": {
-            "name": "webscrape_scrape_url",
-            "description": "Scrape content from a single URL",
-            "category": "scraping",
-            "keywords": ["scrape", "url", "single", "page", "content", "markdown", "html"]
-        },
-        "webscrape_scrape_multiple_urls": {
-            "name": "webscrape_scrape_multiple_urls",
-            "description": "Scrape multiple URLs concurrently (batch operation)",
-            "category": "scraping",
-            "keywords": ["scrape", "multiple", "batch", "concurrent", "urls", "bulk"]
-        },
-        "webscrape_crawl_site": {
-            "name": "webscrape_crawl_site",
-            "description": "Recursively crawl a website following links",
-            "category": "scraping",
-            "keywords": ["crawl", "recursive", "follow", "links", "site", "depth", "sitemap"]
-        },
-        "webscrape_extract_links": {
-            "name": "webscrape_extract_links",
-            "description": "Extract all links from a web page",
-            "category": "extraction",
-            "keywords": ["extract", "links", "urls", "hrefs", "navigation", "mapping"]
-        },
+    Yield (headers, block) for each record of a WARC file, gzipped or not.
+
+    Header names are lower-cased. A torn final record (e.g. after a crash)
+    ends iteration instead of raising.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        try:
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                headers = {}
+                while True:
+                    line = f.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("utf-8", "replace").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                block = f.read(length)
+                if len(block) < length:
+                    return
+                yield headers, block
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            return
+
+
+def _parse_http_response(block: bytes) -> tuple[int, List[tuple[bytes, bytes]], bytes]:
+    """Split an archived HTTP response into status code, raw header pairs and body."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    status_code = int(lines[0].split()[1])
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        headers.append((name.strip(), value.strip()))
+    return status_code, headers, body
+
+
+# ============================================================================
+# Sitemap Discovery
+# ============================================================================
+
+async def _iter_sitemap_entries(client: httpx.AsyncClient, sitemap_url: str):
+    """
+    Stream the entries of one sitemap or sitemap index file.
+
+    The body is fed chunk by chunk through an incremental XML parser (and
+    zlib when the file is gzipped) and each finished entry is discarded, so
+    memory stays constant however many URLs the file lists.
+
+    Yields:
+        tuple: ("url" or "sitemap", loc, lastmod string or None, priority or None)
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    decompressor = None
+    root = None
+    received = 0
+
+    async with client.stream("GET", sitemap_url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            if received == 0 and chunk[:2] == b"\x1f\x8b":
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            received += len(chunk)
+            if received > MAX_SITEMAP_BYTES:
+                break
+            parser.feed(chunk)
+
+            for event, elem in parser.read_events():
+                if root is None:
+                    root = elem
+                if event != "end":
+                    continue
+                tag = elem.tag.rsplit("}", 1)[-1]
+                if tag in ("url", "sitemap"):
+                    fields = {child.tag.rsplit("}", 1)[-1]: (child.text or "").strip() for child in elem}
+                    if fields.get("loc"):
+                        yield (
+                            "url" if tag == "url" else "sitemap",
+                            fields["loc"],
+                            fields.get("lastmod") or None,
+                            _parse_sitemap_priority(fields.get("priority"))
+                        )
+                    root.clear()
+
+
+def _parse_sitemap_priority(value: Optional[str]) -> Optional[float]:
+    """Parse a sitemap <priority> (0.0-1.0), or None if missing or invalid."""
+    try:
+        priority = float(value)
+    except (TypeError, ValueError):
+        return None
+    return priority if 0.0 <= priority <= 1.0 else None
+
+
+def _parse_lastmod(value: str) -> Optional[datetime]:
+    """Parse a W3C datetime (date or date-time) into naive UTC, or None if invalid."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+async def _find_sitemaps(client: httpx.AsyncClient, url: str) -> List[str]:
+    """Find a site's sitemaps from robots.txt, falling back to well-known paths."""
+    parsed = urlparse(url)
+    if parsed.path.endswith((".xml", ".xml.gz")):
+        return [url]
+
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    try:
+        response = await client.get(f"{origin}/robots.txt")
+        if response.status_code == 200:
+            sitemaps = [
+                line.split(":", 1)[1].strip()
+                for line in response.text.splitlines()
+                if line.lower().startswith("sitemap:")
+            ]
+            if sitemaps:
+                return sitemaps
+    except httpx.HTTPError:
+        pass
+
+    for path in SITEMAP_WELL_KNOWN_PATHS:
+        try:
+            response = await client.head(f"{origin}{path}")
+            if response.status_code == 200:
+                return [f"{origin}{path}"]
+        except httpx.HTTPError:
+            continue
+    return []
+
+
+async def _iter_sitemap_urls(
+    client: httpx.AsyncClient,
+    url: str,
+    modified_since: Optional[str] = None,
+    same_domain_only: bool = True,
+    stats: Optional[Dict[str, Any]] = None
+):
+    """
+    Yield page URLs listed in a site's sitemaps, following nested indexes.
+
+    Entries (and child sitemaps) with a lastmod older than modified_since
+    are skipped; entries without a lastmod are kept. Each sitemap file is
+    read at most once, and at most MAX_SITEMAP_FILES files are read.
+
+    Yields:
+        tuple: (page URL, lastmod string or None, priority or None)
+    """
+    stats = stats if stats is not None else {}
+    stats.update({"sitemaps": [], "sitemap_errors": [], "skipped_by_lastmod": 0})
+    cutoff = _parse_lastmod(modified_since) if modified_since else None
+    domain = urlparse(url).netloc
+
+    def is_stale(lastmod):
+        parsed = _parse_lastmod(lastmod) if lastmod else None
+        return cutoff is not None and parsed is not None and parsed < cutoff
+
+    pending = deque(await _find_sitemaps(client, url))
+    seen = set(pending)
+    while pending and len(stats["sitemaps"]) < MAX_SITEMAP_FILES:
+        sitemap_url = pending.popleft()
+        stats["sitemaps"].append(sitemap_url)
+        try:
+            async for kind, loc, lastmod, priority in _iter_sitemap_entries(client, sitemap_url):
+                if is_stale(lastmod):
+                    stats["skipped_by_lastmod"] += 1
+                elif kind == "sitemap":
+                    if loc not in seen:
+                        seen.add(loc)
+                        pending.append(loc)
+                elif not same_domain_only or urlparse(loc).netloc == domain:
+                    yield loc, lastmod, priority
+        except (httpx.HTTPError, ET.ParseError, zlib.error) as e:
+            stats["sitemap_errors"].append({"sitemap": sitemap_url, "error": str(e) or type(e).__name__})
+
+
+# ============================================================================
+# Recrawl Store
+# ============================================================================
+
+class RecrawlStore:
+    """
+    Per-URL crawl history in SQLite, used by incremental crawls.
+
+    For every page reached from a crawl's start URL it keeps the response
+    validators (ETag, Last-Modified), a hash of the raw body, the page's
+    links and when it was last crawled. Incremental crawls use these to
+    send conditional requests, skip re-converting unchanged pages while
+    still following their links, and find pages that have disappeared.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT NOT NULL,
+                    links TEXT NOT NULL,
+                    crawled_ts REAL NOT NULL,
+                    PRIMARY KEY (site, url)
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, site: str, url: str) -> Optional[Dict[str, Any]]:
+        """Return the stored record for a page, or None if it was never crawled."""
+        row = self._connect().execute(
+            "SELECT etag, last_modified, content_hash, links, crawled_ts FROM pages WHERE site = ? AND url = ?",
+            (site, url)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "content_hash": row[2],
+            "links": json.loads(row[3]),
+            "crawled_ts": row[4]
+        }
+
+    def put(
+        self,
+        site: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: str,
+        links: List[str]
+    ):
+        """Insert or replace a page's record, stamping it as crawled now."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO pages (site, url, etag, last_modified, content_hash, links, crawled_ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (site, url, etag, last_modified, content_hash, json.dumps(links), time.time())
+        )
+
+    def touch(self, site: str, url: str, etag: Optional[str], last_modified: Optional[str]):
+        """Stamp an unchanged page as crawled now, refreshing any new validators."""
+        self._connect().execute(
+            "UPDATE pages SET crawled_ts = ?, etag = COALESCE(?, etag), "
+            "last_modified = COALESCE(?, last_modified) WHERE site = ? AND url = ?",
+            (time.time(), etag, last_modified, site, url)
+        )
+
+    def remove_stale(self, site: str, before_ts: float) -> List[str]:
+        """Delete and return the site's pages not crawled since before_ts."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            urls = [row[0] for row in conn.execute(
+                "SELECT url FROM pages WHERE site = ? AND crawled_ts < ? ORDER BY url", (site, before_ts)
+            )]
+            conn.execute("DELETE FROM pages WHERE site = ? AND crawled_ts < ?", (site, before_ts))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return urls
+
+
+# Opened on first use so the database file is only created by incremental crawls
+RECRAWL_STORE: Optional[RecrawlStore] = None
+
+
+def _get_recrawl_store() -> RecrawlStore:
+    """Return the process-wide recrawl store, opening it on first use."""
+    global RECRAWL_STORE
+    if RECRAWL_STORE is None:
+        RECRAWL_STORE = RecrawlStore(RECRAWL_DB_PATH)
+    return RECRAWL_STORE
+
+
+# ============================================================================
+# Crawl Checkpoints
+# ============================================================================
+
+class CrawlCheckpoint:
+    """
+    Append-only JSONL checkpoint of a crawl's frontier, next to its result log.
+
+    The first record holds the crawl parameters, followed by one record per
+    committed page naming the page and listing the entries it added to the
+    frontier (with their priority scores, if any). Replaying the records
+    rebuilds the seen-set and the remaining queue exactly: every enqueued
+    URL that was not committed. Records are buffered and written in
+    batches; a torn final line is ignored on load.
+    """
+
+    def __init__(self, run_id: str, started_at: Optional[float] = None):
+        os.makedirs(RESULT_LOG_DIR, exist_ok=True)
+        self.run_id = run_id
+        self.started_at = started_at or time.time()
+        self.path = self._path(run_id)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _path(run_id: str) -> str:
+        return os.path.join(RESULT_LOG_DIR, f"{run_id}.ckpt.jsonl")
+
+    def record(self, kind: str, **fields):
+        """Buffer a record, writing the batch once it is large or old enough."""
+        self._pending.append(json.dumps({"t": kind, **fields}, separators=(",", ":")))
+        if (len(self._pending) >= CHECKPOINT_BATCH_PAGES or
+                time.monotonic() - self._last_flush >= CHECKPOINT_INTERVAL_SECONDS):
+            self.flush()
+
+    def flush(self):
+        if self._pending and not self._file.closed:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._file.flush()
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        if not self._file.closed:
+            self._file.close()
+
+    @classmethod
+    def remove(cls, run_id: str):
+        try:
+            os.remove(cls._path(run_id))
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, run_id: str) -> Dict[str, Any]:
+        """
+        Read a checkpoint back into the state needed to resume its crawl.
+
+        Returns:
+            dict: params, original start time, enqueued frontier entries in
+                order, committed page URLs and whether the crawl finished
+        """
+        if not re.fullmatch(r"[0-9a-f]{32}", run_id) or not os.path.exists(cls._path(run_id)):
+            raise Exception(f"No checkpoint found for crawl ID '{run_id}'.")
+
+        state = {"params": None, "started_at": None, "enqueued": [], "done_urls": [], "finished": False}
+        with open(cls._path(run_id), "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                if rec["t"] == "params":
+                    state["params"] = rec["params"]
+                    state["started_at"] = rec.get("started_at")
+                elif rec["t"] == "seed":
+                    state["enqueued"].extend(rec["enq"])
+                elif rec["t"] == "page":
+                    state["done_urls"].append(rec["u"])
+                    state["enqueued"].extend(rec["enq"])
+                elif rec["t"] == "end":
+                    state["finished"] = True
+        if state["params"] is None:
+            raise Exception(f"Checkpoint for crawl ID '{run_id}' is incomplete.")
+        return state
+
+
+def _open_checkpoint(run_id: str, params: BaseModel) -> CrawlCheckpoint:
+    """Start a checkpoint for a new crawl, writing its parameters immediately."""
+    checkpoint = CrawlCheckpoint(run_id)
+    checkpoint.record("params", params=params.model_dump(mode="json"), started_at=checkpoint.started_at)
+    checkpoint.flush()
+    return checkpoint
+
+
+# ============================================================================
+# Crawl Engine
+# ============================================================================
+
+def _simhash(text: str) -> int:
+    """
+    64-bit SimHash fingerprint of text, built from overlapping word shingles.
+
+    Texts that share most of their shingles get fingerprints that differ
+    in only a few bits, so Hamming distance approximates dissimilarity.
+    """
+    words = re.findall(r"\w+", text.lower())
+    size = min(SIMHASH_SHINGLE_SIZE, len(words)) or 1
+    shingles: Dict[int, int] = {}
+    for i in range(max(1, len(words) - size + 1)):
+        shingle = " ".join(words[i:i + size]).encode("utf-8")
+        h = int.from_bytes(hashlib.blake2b(shingle, digest_size=SIMHASH_BITS // 8).digest(), "little")
+        shingles[h] = shingles.get(h, 0) + 1
+
+    total = sum(shingles.values())
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        mask = 1 << bit
+        if 2 * sum(w for h, w in shingles.items() if h & mask) > total:
+            fingerprint |= mask
+    return fingerprint
+
+
+class SimHashIndex:
+    """
+    Finds earlier fingerprints within a Hamming distance of a new one.
+
+    The fingerprint is split into max_distance + 1 bit bands. Two
+    fingerprints that differ in at most max_distance bits must agree on at
+    least one whole band (pigeonhole), so only fingerprints sharing a band
+    value are compared.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.max_distance = int((1.0 - threshold) * SIMHASH_BITS + 1e-9)
+        bands = self.max_distance + 1
+        width = SIMHASH_BITS // bands
+        self._bands = [(i * width, SIMHASH_BITS if i == bands - 1 else (i + 1) * width) for i in range(bands)]
+        self._tables: List[Dict[int, List[tuple]]] = [{} for _ in self._bands]
+
+    def _keys(self, fingerprint: int):
+        for start, end in self._bands:
+            yield (fingerprint >> start) & ((1 << (end - start)) - 1)
+
+    def find(self, fingerprint: int) -> Optional[tuple[str, float]]:
+        """Return (url, similarity) of the closest earlier near-duplicate, if any."""
+        best = None
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            for other, url in table.get(key, ()):
+                distance = (fingerprint ^ other).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (url, distance)
+        if best is None:
+            return None
+        return best[0], round(1.0 - best[1] / SIMHASH_BITS, 4)
+
+    def add(self, fingerprint: int, url: str):
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            table.setdefault(key, []).append((fingerprint, url))
+
+
+def _check_near_duplicate(result: Dict[str, Any], index: SimHashIndex, params: CrawlSiteInput) -> bool:
+    """
+    Compare a committed page against earlier pages, marking the result.
+
+    Pages that are not near-duplicates join the index. In suppress mode a
+    near-duplicate's cached content is evicted and its result is reduced
+    to a pointer at the original.
+
+    Returns:
+        bool: True if the page was suppressed (its links should not be followed)
+    """
+    fingerprint = int(result["simhash"], 16)
+    match = index.find(fingerprint)
+    if match is None:
+        index.add(fingerprint, result["url"])
+        return False
+
+    original_url, similarity = match
+    if params.near_duplicates == "flag":
+        result["near_duplicate_of"] = original_url
+        result["similarity"] = similarity
+        return False
+
+    _evict_from_cache(result["scrape_id"])
+    for key in ("scrape_id", "resource_uri", "metadata_uri", "content_length", "preview"):
+        result.pop(key, None)
+    result.update({"suppressed": True, "near_duplicate_of": original_url, "similarity": similarity})
+    return True
+
+
+def _rebuild_simhash_index(log: "ResultLog", params: CrawlSiteInput) -> SimHashIndex:
+    """Rebuild a resumed crawl's near-duplicate index from its result log."""
+    index = SimHashIndex(params.near_duplicate_threshold)
+    cursor = 0
+    while True:
+        results, cursor = log.read_page(cursor)
+        if not results:
+            return index
+        for result in results:
+            if "simhash" in result and "near_duplicate_of" not in result:
+                index.add(int(result["simhash"], 16), result["url"])
+
+
+class LinkGraph:
+    """
+    Link graph of a crawl in compressed sparse row (CSR) form.
+
+    Every crawled page and link target gets an integer ID. Each committed
+    page appends its out-links' target IDs to an unsigned int array and
+    one row (page ID, end offset into the targets) to two more, so a link
+    costs 4 bytes and the CSR index grows with the crawl instead of being
+    rebuilt per analysis. Crawled pages also get a dense position, used
+    as the PageRank vector index. Degrees, orphans, broken links and
+    PageRank are computed from the arrays on demand, with numpy when it
+    is installed, and cached until more pages are added; readers on the
+    event loop use analyze_async so the computation runs in a thread.
+    """
+
+    UNCRAWLED, OK, FAILED = 0, 1, 2
+
+    def __init__(self, start_url: str):
+        self.start_url = start_url
+        self.ids: Dict[str, int] = {}
+        self.urls: List[str] = []
+        self.state = bytearray()
+        self.errors: Dict[int, str] = {}
+        self.targets = array("I")  # Link target IDs, grouped by source page
+        self.row_nodes = array("I")  # Source page ID of each row
+        self.row_ends = array("I")  # End offset of each row in targets
+        self.position = array("i")  # Dense index of each crawled page by ID, -1 if not crawled
+        self.pages = array("I")  # Crawled page IDs by dense index
+        self.resumed_after = 0  # Pages committed before a resume; their edges are not in the graph
+        self.version = 0  # Bumped on every add_page so a threaded analysis knows if it went stale
+        self._analysis: Optional[Dict[str, Any]] = None
+
+    def _node(self, url: str) -> int:
+        node = self.ids.get(url)
+        if node is None:
+            node = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+            self.state.append(self.UNCRAWLED)
+            self.position.append(-1)
+        return node
+
+    def add_page(self, url: str, links: List[str], error: Optional[str] = None):
+        """Record a committed page, whether it failed, and its out-links (self-links are dropped)."""
+        source = self._node(url)
+        self.state[source] = self.FAILED if error else self.OK
+        if error:
+            self.errors[source] = error
+        if self.position[source] < 0:
+            self.position[source] = len(self.pages)
+            self.pages.append(source)
+        self.targets.extend(target for target in map(self._node, links) if target != source)
+        self.row_nodes.append(source)
+        self.row_ends.append(len(self.targets))
+        self.version += 1
+        self._analysis = None
+
+    def snapshot(self) -> "LinkGraph":
+        """Copy of the graph that later add_page calls cannot change."""
+        frozen = LinkGraph(self.start_url)
+        frozen.ids = dict(self.ids)
+        frozen.urls = list(self.urls)
+        frozen.state = bytearray(self.state)
+        frozen.errors = dict(self.errors)
+        for name in ("targets", "row_nodes", "row_ends", "position", "pages"):
+            setattr(frozen, name, array(getattr(self, name).typecode, getattr(self, name)))
+        frozen.resumed_after = self.resumed_after
+        frozen.version = self.version
+        frozen._analysis = self._analysis
+        return frozen
+
+    async def analyze_async(self) -> "LinkGraph":
+        """
+        Analyze the graph in a worker thread instead of on the event loop.
+
+        The crawl may keep committing pages meanwhile, so the analysis runs
+        on a snapshot. The result is cached on this graph only if no page
+        was added in the meantime.
+
+        Returns:
+            LinkGraph: the snapshot that was analyzed (or this graph when
+                its analysis was already cached), consistent with its analysis
+        """
+        if self._analysis is not None:
+            return self
+        frozen = self.snapshot()
+        await asyncio.to_thread(frozen.analyze)
+        if self.version == frozen.version:
+            self._analysis = frozen._analysis
+        return frozen
+
+    def _rows(self) -> Iterator[tuple[int, int, int]]:
+        """Yield (source page ID, start, end) of each row of the targets array."""
+        start = 0
+        for node, end in zip(self.row_nodes, self.row_ends):
+            yield node, start, end
+            start = end
+
+    def _numpy_edges(self) -> tuple[Any, Any]:
+        """Per-edge source and target IDs as numpy arrays, viewing the CSR arrays without copying them."""
+        def view(values: array):
+            return numpy.frombuffer(values, dtype=f"{'u' if values.typecode.isupper() else 'i'}{values.itemsize}")
+
+        lengths = numpy.diff(view(self.row_ends), prepend=0)
+        return numpy.repeat(view(self.row_nodes), lengths), view(self.targets)
+
+    def _pagerank(self) -> List[float]:
+        """PageRank of the crawled pages by dense index, by power iteration over the CSR rows."""
+        count = len(self.pages)
+        if numpy is not None:
+            sources, targets = self._numpy_edges()
+            position = numpy.frombuffer(self.position, dtype=f"i{self.position.itemsize}")
+            sources, targets = position[sources], position[targets]
+            crawled = targets >= 0
+            sources, targets = sources[crawled], targets[crawled]
+            out_links = numpy.bincount(sources, minlength=count)
+            dangling = out_links == 0
+            inverse_out = numpy.zeros(count)
+            inverse_out[~dangling] = 1.0 / out_links[~dangling]
+            rank = numpy.full(count, 1.0 / count)
+            for _ in range(PAGERANK_MAX_ITERATIONS):
+                base = (1 - PAGERANK_DAMPING + PAGERANK_DAMPING * rank[dangling].sum()) / count
+                new_rank = base + PAGERANK_DAMPING * numpy.bincount(
+                    targets, weights=(rank * inverse_out)[sources], minlength=count
+                )
+                delta = numpy.abs(new_rank - rank).sum()
+                rank = new_rank
+                if delta < PAGERANK_TOLERANCE:
+                    break
+            return rank.tolist()
+
+        position = self.position
+        targets = list(map(position.__getitem__, self.targets))
+        incoming: List[List[int]] = [[] for _ in range(count)]
+        out_links = [0] * count
+        for node, start, end in self._rows():
+            source = position[node]
+            for target in targets[start:end]:
+                if target >= 0:
+                    incoming[target].append(source)
+                    out_links[source] += 1
+
+        dangling = [k for k in range(count) if not out_links[k]]
+        rank = [1.0 / count] * count
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            share = [r / n if n else 0.0 for r, n in zip(rank, out_links)]
+            base = (1 - PAGERANK_DAMPING + PAGERANK_DAMPING * sum(map(rank.__getitem__, dangling))) / count
+            new_rank = [base + PAGERANK_DAMPING * sum(map(share.__getitem__, sources)) for sources in incoming]
+            delta = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if delta < PAGERANK_TOLERANCE:
+                break
+        return rank
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        Compute degrees, orphans, broken links and PageRank.
+
+        Orphans are crawled pages (other than the start URL) that no other
+        crawled page links to, such as pages only listed in a sitemap.
+        Broken links are edges into pages whose fetch failed.
+
+        Returns:
+            dict: pages (node IDs by descending rank), rank, in_degree,
+                out_degree, orphans, broken and compute_ms
+        """
+        if self._analysis is not None:
+            return self._analysis
+
+        started = time.perf_counter()
+        if numpy is not None:
+            sources, targets = self._numpy_edges()
+            out_degree = numpy.bincount(sources, minlength=len(self.urls)).tolist()
+            in_degree = numpy.bincount(targets, minlength=len(self.urls)).tolist()
+        else:
+            out_degree = Counter()
+            for node, start, end in self._rows():
+                out_degree[node] += end - start
+            in_degree = Counter(self.targets)
+        pages = list(self.pages)
+        start = self.ids.get(self.start_url)
+        orphans = [node for node in pages if not in_degree[node] and node != start]
+        broken = []
+        if self.errors:
+            broken = [
+                (node, target)
+                for node, first, end in self._rows()
+                for target in self.targets[first:end] if target in self.errors
+            ]
+        rank = dict(zip(pages, self._pagerank())) if pages else {}
+
+        self._analysis = {
+            "pages": sorted(pages, key=rank.__getitem__, reverse=True),
+            "rank": rank,
+            "in_degree": in_degree,
+            "out_degree": out_degree,
+            "orphans": orphans,
+            "broken": broken,
+            "compute_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+        return self._analysis
+
+    def page_entry(self, node: int) -> Dict[str, Any]:
+        analysis = self.analyze()
+        return {
+            "url": self.urls[node],
+            "pagerank": round(analysis["rank"][node], 8),
+            "in_degree": analysis["in_degree"][node],
+            "out_degree": analysis["out_degree"][node],
+            **({"error": self.errors[node]} if node in self.errors else {})
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        analysis = self.analyze()
+        summary = {
+            "nodes": len(self.urls),
+            "edges": len(self.targets),
+            "pages_crawled": len(analysis["pages"]),
+            "uncrawled_targets": len(self.urls) - len(analysis["pages"]),
+            "orphan_pages": len(analysis["orphans"]),
+            "broken_links": len(analysis["broken"]),
+            "edge_bytes": sum(values.itemsize * len(values) for values in (self.targets, self.row_nodes, self.row_ends)),
+            "pagerank_backend": "numpy" if numpy is not None else "python",
+            "compute_ms": analysis["compute_ms"],
+            "top_pages": [self.page_entry(node) for node in analysis["pages"][:GRAPH_TOP_PAGES]]
+        }
+        if self.resumed_after:
+            summary["note"] = (
+                f"Crawl was resumed; links of the {self.resumed_after} pages committed "
+                "before the resume are not in the graph."
+            )
+        return summary
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set for URL deduplication.
+
+    Memory is sized up front from the expected number of items and the
+    target false-positive rate; membership tests never give false negatives
+    but may report an unseen item as present with about that probability.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.bit_count = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bit_count for i in range(self.hash_count))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+def _compile_url_pattern(pattern: str) -> Callable[[str], Any]:
+    """Compile an include/exclude rule: a glob over the full URL, or a regex prefixed with 're:'."""
+    if pattern.startswith("re:"):
+        return re.compile(pattern[3:]).search
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+class UrlRules:
+    """Include/exclude URL rules, compiled once and checked at enqueue time."""
+
+    def __init__(self, include: List[str], exclude: List[str]):
+        self.include = [_compile_url_pattern(p) for p in include]
+        self.exclude = [_compile_url_pattern(p) for p in exclude]
+
+    def allows(self, url: str) -> bool:
+        if any(match(url) for match in self.exclude):
+            return False
+        return not self.include or any(match(url) for match in self.include)
+
+
+# Frontier priority scorers (name -> fn(candidate, params) -> float).
+# A candidate is a dict with url, depth, anchor (link text or None) and
+# sitemap_priority (sitemap <priority> or None).
+URL_SCORERS: Dict[str, Callable[[Dict[str, Any], Any], float]] = {}
+
+
+def url_scorer(name: str):
+    """Register a frontier priority scorer under name."""
+    def register(fn):
+        URL_SCORERS[name] = fn
+        return fn
+    return register
+
+
+@url_scorer("depth")
+def _score_depth(candidate: Dict[str, Any], params) -> float:
+    """Prefer shallower pages."""
+    return -float(candidate["depth"])
+
+
+@url_scorer("path_prefix")
+def _score_path_prefix(candidate: Dict[str, Any], params) -> float:
+    """1 for URLs whose path starts with one of priority_path_prefixes."""
+    path = urlparse(candidate["url"]).path
+    return 1.0 if any(path.startswith(prefix) for prefix in params.priority_path_prefixes) else 0.0
+
+
+@url_scorer("anchor_keywords")
+def _score_anchor_keywords(candidate: Dict[str, Any], params) -> float:
+    """Number of priority_keywords found in the link text or URL."""
+    text = f"{candidate['anchor'] or ''} {candidate['url']}".lower()
+    return float(sum(1 for keyword in params.priority_keywords if keyword.lower() in text))
+
+
+@url_scorer("sitemap_priority")
+def _score_sitemap_priority(candidate: Dict[str, Any], params) -> float:
+    """The sitemap's <priority> for the URL, or the protocol default of 0.5."""
+    priority = candidate["sitemap_priority"]
+    return priority if priority is not None else 0.5
+
+
+class TrapDetector:
+    """
+    Heuristics that reject likely crawler-trap URLs when they are enqueued.
+
+    A URL is rejected when its path is too deep, repeats a segment too
+    often or has too many query parameters. Budgets are opt-in: the URLs
+    per path template (numeric segments generalized) and per explicit glob,
+    and the query variants per path. Counts only include URLs
+    that were accepted, so a trap cannot use up budget it was denied.
+    Each rejection is passed to the optional sink with its reason.
+    """
+
+    def __init__(self, params: CrawlSiteInput):
+        self.params = params
+        self.custom_budgets = [
+            (pattern, re.compile(fnmatch.translate(pattern)).match, budget)
+            for pattern, budget in params.trap_template_budgets.items()
+        ]
+        self.template_counts: Dict[str, int] = {}
+        self.query_variants: Dict[str, int] = {}
+        self.reasons: Dict[str, int] = {}
+        self.sink: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    @staticmethod
+    def _template(path: str) -> str:
+        return "/".join("*" if any(c.isdigit() for c in segment) else segment for segment in path.split("/"))
+
+    def _evaluate(self, url: str) -> tuple[Optional[str], Optional[str], List[str]]:
+        """Return (reason, detail, counter keys to bump if accepted)."""
+        params = self.params
+        parsed = urlparse(url)
+        segments = [segment for segment in parsed.path.split("/") if segment]
+
+        if len(segments) > params.trap_max_path_depth:
+            return "path_depth", f"{len(segments)} path segments (limit {params.trap_max_path_depth})", []
+        if segments:
+            segment, repeats = max(((s, segments.count(s)) for s in set(segments)), key=lambda item: item[1])
+            if repeats > params.trap_max_segment_repeats:
+                return "segment_repeat", f"'{segment}' repeated {repeats} times", []
+
+        keys = []
+        for pattern, match, budget in self.custom_budgets:
+            if match(parsed.path):
+                key = f"glob:{parsed.netloc}:{pattern}"
+                if self.template_counts.get(key, 0) >= budget:
+                    return "template_budget", f"budget of {budget} URLs for {pattern} used up", []
+                keys.append(key)
+        template = self._template(parsed.path) if params.trap_template_budget is not None else ""
+        if "*" in template:
+            key = f"auto:{parsed.netloc}{template}"
+            if self.template_counts.get(key, 0) >= params.trap_template_budget:
+                return "template_budget", f"budget of {params.trap_template_budget} URLs for {template} used up", []
+            keys.append(key)
+
+        if parsed.query:
+            param_count = len(parsed.query.split("&"))
+            if param_count > params.trap_max_query_params:
+                return "query_params", f"{param_count} query parameters (limit {params.trap_max_query_params})", []
+            if params.trap_max_query_variants is not None:
+                path_key = f"query:{parsed.netloc}{parsed.path}"
+                if self.query_variants.get(path_key, 0) >= params.trap_max_query_variants:
+                    return "query_variants", f"{params.trap_max_query_variants} query variants of {parsed.path} already enqueued", []
+                keys.append(path_key)
+
+        return None, None, keys
+
+    def _observe(self, keys: List[str]):
+        for key in keys:
+            counts = self.query_variants if key.startswith("query:") else self.template_counts
+            counts[key] = counts.get(key, 0) + 1
+
+    def check(self, url: str) -> Optional[str]:
+        """Return the rejection reason for url, or None (and count it) if accepted."""
+        reason, detail, keys = self._evaluate(url)
+        if reason is None:
+            self._observe(keys)
+            return None
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        if self.sink is not None:
+            self.sink({"url": url, "reason": reason, "detail": detail})
+        return reason
+
+    def observe(self, url: str):
+        """Count an already-accepted URL, e.g. when restoring from a checkpoint."""
+        self._observe(self._evaluate(url)[2])
+
+
+class CrawlFrontier:
+    """
+    Crawl frontier that filters and deduplicates URLs when they are enqueued.
+
+    Each URL enters the queue at most once, at the first (shallowest) depth
+    it is discovered, so densely linked sites no longer pile up duplicates.
+    The seen-set is either an exact set or a BloomFilter for bounded memory.
+    URLs rejected by the crawl's include/exclude rules or its TrapDetector
+    are never queued.
+
+    Without a scorer the queue is FIFO, i.e. breadth-first. With one, it is
+    a heap that pops the highest-scoring URL first, ties broken by enqueue
+    order.
+    """
+
+    def __init__(
+        self,
+        seen,
+        rules: Optional[UrlRules] = None,
+        scorer: Optional[Callable[[Dict[str, Any]], float]] = None,
+        traps: Optional[TrapDetector] = None
+    ):
+        self.queue = deque() if scorer is None else []
+        self.seen = seen
+        self.rules = rules
+        self.scorer = scorer
+        self.traps = traps
+        self.enqueued = 0
+        self.duplicates = 0
+        self.excluded = 0
+        self.peak_size = 0
+        self._order = itertools.count()
+
+    def _append(self, url: str, depth: int, score: float):
+        if self.scorer is None:
+            self.queue.append((url, depth))
+        else:
+            heapq.heappush(self.queue, (-score, next(self._order), url, depth))
+
+    def push(
+        self,
+        url: str,
+        depth: int,
+        anchor: Optional[str] = None,
+        sitemap_priority: Optional[float] = None,
+        ignore_rules: bool = False
+    ) -> Optional[List[Any]]:
+        """
+        Enqueue url unless it was seen before, is excluded by the rules or
+        looks like a crawler trap. The start URL passes ignore_rules to skip
+        both rules and trap checks.
+
+        Returns:
+            The checkpoint entry ([url, depth] or [url, depth, score]) if
+            the URL was enqueued, otherwise None
+        """
+        if not ignore_rules and self.rules is not None and not self.rules.allows(url):
+            self.excluded += 1
+            return None
+        if url in self.seen:
+            self.duplicates += 1
+            return None
+        self.seen.add(url)
+        if not ignore_rules and self.traps is not None and self.traps.check(url):
+            return None
+        self.enqueued += 1
+
+        entry = [url, depth]
+        score = 0.0
+        if self.scorer is not None:
+            score = self.scorer({"url": url, "depth": depth, "anchor": anchor, "sitemap_priority": sitemap_priority})
+            entry.append(score)
+        self._append(url, depth, score)
+        self.peak_size = max(self.peak_size, len(self.queue))
+        return entry
+
+    def pop(self) -> tuple[str, int]:
+        if self.scorer is None:
+            return self.queue.popleft()
+        _, _, url, depth = heapq.heappop(self.queue)
+        return url, depth
+
+    def restore(self, enqueued: List[List[Any]], done_urls: List[str]):
+        """Rebuild state from a checkpoint's enqueued entries and committed URLs."""
+        done = set(done_urls)
+        for entry in enqueued:
+            url, depth = entry[0], entry[1]
+            self.seen.add(url)
+            if self.traps is not None:
+                self.traps.observe(url)
+            if url not in done:
+                self._append(url, depth, entry[2] if len(entry) > 2 else 0.0)
+        self.enqueued = len(enqueued)
+        self.peak_size = len(self.queue)
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "urls_enqueued": self.enqueued,
+            "duplicates_skipped": self.duplicates,
+            "excluded_by_rules": self.excluded,
+            "peak_frontier_size": self.peak_size,
+            "remaining_frontier_size": len(self.queue),
+            "ordering": "priority" if self.scorer is not None else "breadth_first",
+            "trapped_urls": sum(self.traps.reasons.values()) if self.traps is not None else 0,
+            "trap_reasons": dict(self.traps.reasons) if self.traps is not None else {},
+            "seen_filter": "bloom" if isinstance(self.seen, BloomFilter) else "exact"
+        }
+        if isinstance(self.seen, BloomFilter):
+            stats["bloom_size_bytes"] = self.seen.size_bytes
+            stats["bloom_false_positive_rate"] = self.seen.false_positive_rate
+        return stats
+
+
+def _frontier_filters(params: CrawlSiteInput) -> tuple[Optional[UrlRules], Optional[Callable], Optional[TrapDetector]]:
+    """Build the URL rules, priority scorer and trap detector configured by params."""
+    rules = None
+    if params.include_patterns or params.exclude_patterns:
+        rules = UrlRules(params.include_patterns, params.exclude_patterns)
+
+    scorer = None
+    if params.priority_scorers:
+        weighted = [(URL_SCORERS[name], weight) for name, weight in params.priority_scorers.items()]
+
+        def scorer(candidate):
+            return sum(weight * score(candidate, params) for score, weight in weighted)
+
+    traps = TrapDetector(params) if params.trap_detection else None
+    return rules, scorer, traps
+
+
+def _create_frontier(params: CrawlSiteInput) -> CrawlFrontier:
+    """Create a crawl frontier with the seen-set, URL rules, scoring and trap detection configured by params."""
+    rules, scorer, traps = _frontier_filters(params)
+
+    if params.dedup_filter == "bloom":
+        capacity = max(BLOOM_MIN_CAPACITY, params.max_pages * BLOOM_URLS_PER_PAGE)
+        return CrawlFrontier(BloomFilter(capacity, params.bloom_false_positive_rate), rules, scorer, traps)
+    return CrawlFrontier(set(), rules, scorer, traps)
+
+
+def _follows_links(params: CrawlSiteInput, depth: int) -> bool:
+    """Whether links found on a page at this depth are enqueued."""
+    return depth < params.max_depth and params.discovery != "sitemap"
+
+
+def _process_crawled_page(
+    url: str,
+    depth: int,
+    html_content: str,
+    status_code: int,
+    params: CrawlSiteInput,
+    record: Optional[Dict[str, Any]] = None,
+    response_headers: Optional[Dict[str, str]] = None
+) -> tuple[Dict[str, Any], List[str], Dict[str, str]]:
+    """
+    Parse a fetched page, cache its content and collect links to follow.
+
+    Runs in a worker thread so HTML parsing does not stall in-flight fetches.
+
+    In incremental crawls, a page that answered 304 or whose body hash
+    matches its stored record is reported as unchanged without being parsed
+    or converted; its stored links are followed instead. Other pages are
+    processed normally and their record is replaced.
+
+    Links are extracted whenever they will be followed, recorded for
+    incremental crawls or added to the link graph; the caller decides
+    which of them to enqueue.
+
+    Returns:
+        tuple: (result entry, links found on the page, link text by URL
+            when the anchor_keywords scorer needs it)
+    """
+    follow_links = _follows_links(params, depth)
+
+    if params.incremental:
+        store = _get_recrawl_store()
+        headers = {k.lower(): v for k, v in (response_headers or {}).items()}
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        body_hash = _content_hash(html_content) if status_code != 304 else None
+        if record is not None and (status_code == 304 or body_hash == record["content_hash"]):
+            store.touch(params.url, url, etag, last_modified)
+            return {
+                "url": url,
+                "depth": depth,
+                "change": "unchanged",
+                "status_code": status_code
+            }, record["links"], {}
+
+    soup = BeautifulSoup(html_content, 'lxml')
+
+    # Extract metadata
+    metadata = _extract_metadata(soup, url)
+
+    # Get content
+    if params.response_format == ResponseFormat.MARKDOWN:
+        content = _html_to_markdown(html_content, url)
+    else:
+        content = _html_to_text(soup)
+
+    # Generate scrape ID and store in cache
+    scrape_id = _generate_scrape_id(url, f"crawl_depth{depth}")
+    _store_in_cache(
+        scrape_id=scrape_id,
+        url=url,
+        content=content,
+        metadata=metadata
+    )
+
+    # Store result with resource reference
+    result = {
+        "url": url,
+        "depth": depth,
+        "scrape_id": scrape_id,
+        "resource_uri": f"scrape://{scrape_id}/content",
+        "metadata_uri": f"scrape://{scrape_id}/metadata",
+        "title": metadata.get("title"),
+        "status_code": status_code,
+        "content_length": len(content),
+        "preview": content[:200] + "..." if len(content) > 200 else content
+    }
+    if params.near_duplicates != "off":
+        result["simhash"] = f"{_simhash(content):016x}"
+
+    # Find links to crawl next (only if not at max depth or seeded from sitemaps only).
+    # Incremental crawls always record links so later runs can follow them from unchanged pages,
+    # and the link graph needs the out-links of every page.
+    links = []
+    if follow_links or params.incremental or params.link_graph:
+        links = _extract_links(soup, url, params.same_domain_only)
+
+    if params.incremental:
+        store.put(params.url, url, etag, last_modified, body_hash, links)
+        result["change"] = "changed" if record is not None else "added"
+
+    anchors = {}
+    if follow_links and "anchor_keywords" in params.priority_scorers:
+        anchors = _extract_anchor_texts(soup, url)
+
+    return result, links, anchors
+
+
+async def _crawl_page(
+    client: httpx.AsyncClient,
+    url: str,
+    depth: int,
+    params: CrawlSiteInput
+) -> tuple[Dict[str, Any], List[str], Dict[str, str]]:
+    """
+    Fetch and process one crawl page, turning failures into error results.
+
+    In incremental crawls a failure other than 404 or 410 (a timeout or a
+    5xx, say) does not mean the page is gone: its stored record is kept
+    and stamped as crawled, and its stored links are followed, so neither
+    the page nor the pages below it are reported removed.
+    """
+    record = None
+    try:
+        headers = None
+        if params.incremental:
+            record = _get_recrawl_store().get(params.url, url)
+            if record is not None:
+                headers = {}
+                if record["etag"]:
+                    headers["If-None-Match"] = record["etag"]
+                if record["last_modified"]:
+                    headers["If-Modified-Since"] = record["last_modified"]
+        html_content, status_code, response_headers = await _fetch_url(url, client=client, headers=headers or None)
+        return await asyncio.to_thread(
+            _process_crawled_page, url, depth, html_content, status_code, params, record, response_headers
+        )
+    except Exception as e:
+        result = {"url": url, "depth": depth, "error": str(e)}
+        if record is not None and _classify_error(str(e)) not in ("http_404", "http_410"):
+            await asyncio.to_thread(_get_recrawl_store().touch, params.url, url, None, None)
+            return result, record["links"], {}
+        return result, [], {}
+
+
+async def _seed_frontier(
+    client: httpx.AsyncClient,
+    params: CrawlSiteInput,
+    frontier: CrawlFrontier,
+    checkpoint: Optional[CrawlCheckpoint],
+    sitemap_stats: Dict[str, Any]
+):
+    """
+    Enqueue a new crawl's starting URLs at depth 0.
+
+    That is the start URL (unless it is itself a sitemap file) and, in
+    sitemap discovery modes, the URLs listed in the site's sitemaps, up to
+    max_pages in total.
+    """
+    seeds = []
+    if not urlparse(params.url).path.endswith((".xml", ".xml.gz")):
+        entry = frontier.push(params.url, 0, ignore_rules=True)
+        if entry:
+            seeds.append(entry)
+
+    if params.discovery != "links":
+        sitemap_urls = _iter_sitemap_urls(
+            client, params.url, params.sitemap_modified_since, params.same_domain_only, sitemap_stats
+        )
+        async with aclosing(sitemap_urls):
+            async for loc, _, priority in sitemap_urls:
+                if len(seeds) >= params.max_pages:
+                    break
+                entry = frontier.push(loc, 0, sitemap_priority=priority)
+                if entry:
+                    seeds.append(entry)
+        sitemap_stats["urls_seeded"] = len(seeds)
+
+    if checkpoint is not None:
+        checkpoint.record("seed", enq=seeds)
+
+
+def _attach_link_graph(log: ResultLog, params: CrawlSiteInput) -> Optional[LinkGraph]:
+    """Create the run's link graph (if params.link_graph) for the crawl://{crawl_id}/graph resources."""
+    if not params.link_graph:
+        return None
+    graph = LinkGraph(params.url)
+
+    def attach(run):
+        if run is not None:
+            run["graph"] = graph
+        return run
+
+    RESULT_LOGS.update(log.run_id, attach)
+    return graph
+
+
+def _attach_trap_log(log: ResultLog, frontier: Union[CrawlFrontier, "SharedFrontier"], resume: bool = False):
+    """Log every URL the frontier's trap detector rejects to the run's "traps" stream."""
+    if frontier.traps is None:
+        return
+    trap_log = _attach_result_stream(log, "traps")
+    if resume:
+        trap_log.rewind(math.inf)  # Keep earlier entries, drop a torn last line
+    if isinstance(frontier, SharedFrontier):
+        # Workers record rejections in the shared file; _run_distributed_crawl copies them over
+        frontier.trap_log = trap_log
+    else:
+        frontier.traps.sink = trap_log.append
+
+
+async def _run_crawl(
+    params: CrawlSiteInput,
+    on_result,
+    frontier: Optional[CrawlFrontier] = None,
+    checkpoint: Optional[CrawlCheckpoint] = None,
+    duplicate_index: Optional[SimHashIndex] = None,
+    graph: Optional[LinkGraph] = None,
+    warc: Optional[WarcWriter] = None
+) -> tuple[int, Dict[str, Any]]:
+    """
+    Breadth-first crawl with a pool of concurrent page workers.
+
+    Up to params.concurrency pages are fetched at once from a shared FIFO
+    frontier, but results are committed strictly in the order pages were
+    dequeued, and a page's links are only enqueued when it commits. The
+    frontier therefore evolves exactly as in a one-page-at-a-time BFS: the
+    same pages are visited, max_pages is honoured exactly, and results come
+    out in the same depth-ordered sequence regardless of network timing.
+
+    Each committed result is passed to the async on_result callback instead
+    of being accumulated, so memory does not grow with the number of pages.
+    If on_result returns False the crawl stops: no further pages are
+    dispatched and in-flight pages are discarded. Callers that need live
+    frontier statistics can pass in their own frontier.
+
+    A restored frontier resumes where its checkpoint stopped: pages already
+    committed are not fetched again and count towards max_pages. With a
+    checkpoint, every committed page is recorded along with the URLs it
+    enqueued.
+
+    Incremental crawls count added, changed and unchanged pages. When such
+    a crawl exhausts its frontier, pages recorded by earlier crawls of the
+    same start URL that were not reached this time, or answered 404 or
+    410, are reported as removed and dropped from the recrawl store; pages
+    that failed otherwise keep their record (see _crawl_page).
+
+    With near-duplicate detection on, each committed page is checked
+    against the pages committed before it, so which copy counts as the
+    original is deterministic. A resumed crawl passes in the index rebuilt
+    from its result log.
+
+    With a link graph, every committed page and all of its out-links are
+    added to it, including pages at max_depth whose links are not followed.
+    With a WARC writer, every HTTP exchange of the crawl is archived.
+
+    No more than _host_limit(params) pages are fetched from one origin at
+    once. A dequeued URL whose origin is at its limit is parked in a queue
+    for that origin while URLs for other origins keep being dequeued and
+    fetched (up to CRAWL_PARKED_URLS parked). Parked URLs keep the sequence
+    number they were dequeued with and start as soon as their origin has
+    a free slot, so results still commit in dequeue order and the BFS
+    guarantees above hold. The stats report requests made against
+    connections opened.
+
+    Returns:
+        tuple: (number of pages visited, frontier stats)
+    """
+    if frontier is None:
+        frontier = _create_frontier(params)
+    pages_visited = frontier.enqueued - len(frontier)
+    started_at = checkpoint.started_at if checkpoint is not None else time.time()
+    sitemap_stats: Dict[str, Any] = {}
+    changes = {"added": 0, "changed": 0, "unchanged": 0}
+    if duplicate_index is None and params.near_duplicates != "off":
+        duplicate_index = SimHashIndex(params.near_duplicate_threshold)
+    near_duplicates = {"flagged": 0, "suppressed": 0}
+    in_flight: Dict[int, asyncio.Task] = {}
+    in_flight_origins: Dict[int, str] = {}
+    origin_active: Counter = Counter()
+    parked: Dict[str, deque] = {}
+    parked_count = 0
+    host_limit = _host_limit(params)
+    finished: Dict[int, tuple] = {}
+    next_seq = 0
+    next_commit = 0
+    stopped = False
+    connections = ConnectionStats()
+
+    async with _create_http_client(warc=warc, http2=params.http2) as client:
+        connections.attach(client)
+        if not frontier.enqueued:
+            await _seed_frontier(client, params, frontier, checkpoint, sitemap_stats)
+        try:
+            def start(seq: int, url: str, depth: int, origin: str):
+                origin_active[origin] += 1
+                in_flight_origins[seq] = origin
+                in_flight[seq] = asyncio.create_task(_crawl_page(client, url, depth, params))
+
+            while not stopped:
+                # Start parked URLs whose origin has a free slot, oldest first
+                for origin in list(parked):
+                    queue = parked[origin]
+                    while queue and origin_active[origin] < host_limit and len(in_flight) < params.concurrency:
+                        start(*queue.popleft(), origin)
+                        parked_count -= 1
+                    if not queue:
+                        del parked[origin]
+
+                # Hand frontier URLs to free workers, parking those whose origin is at its limit
+                while (
+                    frontier and len(in_flight) < params.concurrency
+                    and pages_visited < params.max_pages and parked_count < CRAWL_PARKED_URLS
+                ):
+                    current_url, depth = frontier.pop()
+                    pages_visited += 1
+                    origin = _url_origin(current_url)
+                    if origin_active[origin] < host_limit:
+                        start(next_seq, current_url, depth, origin)
+                    else:
+                        parked.setdefault(origin, deque()).append((next_seq, current_url, depth))
+                        parked_count += 1
+                    next_seq += 1
+
+                if not in_flight:
+                    break
+
+                await asyncio.wait(in_flight.values(), return_when=asyncio.FIRST_COMPLETED)
+                for seq in [seq for seq, task in in_flight.items() if task.done()]:
+                    finished[seq] = in_flight.pop(seq).result()
+                    origin_active[in_flight_origins.pop(seq)] -= 1
+
+                # Commit in dequeue order so the frontier matches a sequential crawl
+                while next_commit in finished and not stopped:
+                    result, links, anchors = finished.pop(next_commit)
+                    next_commit += 1
+                    if graph is not None:
+                        graph.add_page(result["url"], links, result.get("error"))
+                    if not _follows_links(params, result["depth"]):
+                        links = []
+                    if duplicate_index is not None and "simhash" in result:
+                        if _check_near_duplicate(result, duplicate_index, params):
+                            near_duplicates["suppressed"] += 1
+                            links = []
+                        elif "near_duplicate_of" in result:
+                            near_duplicates["flagged"] += 1
+                    keep_going = await on_result(result)
+                    if "change" in result:
+                        changes[result["change"]] += 1
+                    depth = result["depth"] + 1
+                    pushed = (frontier.push(link, depth, anchors.get(link)) for link in links)
+                    enqueued = [entry for entry in pushed if entry]
+                    if checkpoint is not None:
+                        checkpoint.record("page", u=result["url"], enq=enqueued)
+                    if keep_going is False:
+                        stopped = True
+                        break
+        finally:
+            for task in in_flight.values():
+                task.cancel()
+
+    stats = frontier.stats()
+    stats["connections"] = connections.summary()
+    if duplicate_index is not None:
+        stats["near_duplicates"] = {
+            "mode": params.near_duplicates,
+            "threshold": params.near_duplicate_threshold,
+            **near_duplicates
+        }
+    if params.incremental:
+        stats["incremental"] = changes
+        if not frontier and not stopped:
+            removed = await asyncio.to_thread(_get_recrawl_store().remove_stale, params.url, started_at)
+            changes["removed"] = len(removed)
+            changes["removed_urls"] = removed[:REMOVED_URLS_LIMIT]
+        else:
+            changes["removed"] = None
+            changes["note"] = "Crawl stopped before its frontier was exhausted; removed pages were not computed."
+    if sitemap_stats:
+        stats["sitemap"] = {
+            "files_read": len(sitemap_stats["sitemaps"]),
+            "urls_seeded": sitemap_stats["urls_seeded"],
+            "skipped_by_lastmod": sitemap_stats["skipped_by_lastmod"],
+            "error_count": len(sitemap_stats["sitemap_errors"]),
+            "errors": sitemap_stats["sitemap_errors"][:SITEMAP_ERRORS_LIMIT]
+        }
+    return pages_visited, stats
+
+
+# ============================================================================
+# Distributed Crawls
+# ============================================================================
+
+def _remove_sqlite_file(path: str):
+    """Delete a SQLite database file and its WAL side files, if present."""
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+class SharedFrontier:
+    """
+    Crawl frontier, seen-set and result queue in one SQLite file shared by
+    the worker processes of a distributed crawl.
+
+    Workers lease batches of pending URLs, fetch and parse them, and commit
+    each page's result together with the URLs it discovered in a single
+    transaction. A lease that is not committed within lease_seconds (e.g.
+    because its worker crashed) returns the URL to the queue, and a late
+    commit from the original holder is discarded, so every page is reported
+    exactly once. max_pages is enforced when URLs are leased.
+
+    URL rules and scoring apply to every enqueued URL as in CrawlFrontier.
+    Trap detection counts are kept per process, so each worker enforces the
+    trap budgets on the URLs it enqueues; rejected URLs are recorded in the
+    file for the parent's trap log. Each connection is per thread, as in
+    SharedScrapeCache.
+    """
+
+    PENDING, LEASED, DONE, TRAPPED = 0, 1, 2, 3
+
+    def __init__(self, path: str, params: CrawlSiteInput, lease_seconds: float = 120.0):
+        self.path = path
+        self.params = params
+        self.lease_seconds = lease_seconds
+        self.rules, self.scorer, self.traps = _frontier_filters(params)
+        if self.traps is not None:
+            self.traps.sink = self._record_trap
+        self.trap_log: Optional[ResultLog] = None
+        self._local = threading.local()
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                depth INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_expires REAL
+            );
+            CREATE INDEX IF NOT EXISTS urls_queue ON urls (state, priority DESC, id);
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                result TEXT NOT NULL,
+                links TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS traps (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                entry TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+
+    @staticmethod
+    def path_for(run_id: str) -> str:
+        return os.path.join(RESULT_LOG_DIR, f"{run_id}.frontier.sqlite")
+
+    @staticmethod
+    def cache_path_for(path: str) -> str:
+        """Path of the scrape cache file a distributed crawl's workers write page content to."""
+        return os.path.splitext(path)[0] + ".cache.sqlite"
+
+    @classmethod
+    def remove(cls, run_id: str):
+        path = cls.path_for(run_id)
+        _remove_sqlite_file(path)
+        _remove_sqlite_file(cls.cache_path_for(path))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int = 1):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    @staticmethod
+    def _counter(conn: sqlite3.Connection, name: str) -> int:
+        row = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _record_trap(self, entry: Dict[str, Any]):
+        # Called by the trap detector from inside _push's transaction
+        conn = self._connect()
+        conn.execute("INSERT INTO traps (entry) VALUES (?)", (json.dumps(entry),))
+        self._bump(conn, f"trap:{entry['reason']}")
+
+    def _push(
+        self,
+        conn: sqlite3.Connection,
+        url: str,
+        depth: int,
+        anchor: Optional[str] = None,
+        sitemap_priority: Optional[float] = None,
+        ignore_rules: bool = False
+    ) -> bool:
+        if not ignore_rules and self.rules is not None and not self.rules.allows(url):
+            self._bump(conn, "excluded")
+            return False
+        if conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone():
+            self._bump(conn, "duplicates")
+            return False
+        if not ignore_rules and self.traps is not None and self.traps.check(url):
+            # Keep trapped URLs in the seen-set so they are rejected only once
+            conn.execute(
+                "INSERT INTO urls (url, depth, priority, state) VALUES (?, ?, 0, ?)", (url, depth, self.TRAPPED)
+            )
+            return False
+
+        # Without a scorer, shallower URLs go first: breadth-first up to lease batching
+        priority = -depth
+        if self.scorer is not None:
+            priority = self.scorer({"url": url, "depth": depth, "anchor": anchor, "sitemap_priority": sitemap_priority})
+        conn.execute("INSERT INTO urls (url, depth, priority) VALUES (?, ?, ?)", (url, depth, priority))
+        return True
+
+    def push(
+        self,
+        url: str,
+        depth: int,
+        anchor: Optional[str] = None,
+        sitemap_priority: Optional[float] = None,
+        ignore_rules: bool = False
+    ) -> Optional[List[Any]]:
+        """Enqueue url like CrawlFrontier.push, returning [url, depth] if it was enqueued."""
+        with self._transaction() as conn:
+            if self._push(conn, url, depth, anchor, sitemap_priority, ignore_rules):
+                return [url, depth]
+        return None
+
+    def lease(self, owner: str, limit: int) -> List[tuple[str, int]]:
+        """
+        Lease up to limit pending URLs, highest priority first.
+
+        Expired leases are returned to the queue first. No URLs are handed
+        out once the crawl is stopped or max_pages URLs are leased or done.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            if self._counter(conn, "stopped"):
+                return []
+            expired = conn.execute(
+                "UPDATE urls SET state = ?, owner = NULL, lease_expires = NULL WHERE state = ? AND lease_expires < ?",
+                (self.PENDING, self.LEASED, now)
+            ).rowcount
+            if expired:
+                self._bump(conn, "claimed", -expired)
+                self._bump(conn, "lease_expiries", expired)
+
+            budget = min(limit, self.params.max_pages - self._counter(conn, "claimed"))
+            if budget <= 0:
+                return []
+            rows = conn.execute(
+                "SELECT id, url, depth FROM urls WHERE state = ? ORDER BY priority DESC, id LIMIT ?",
+                (self.PENDING, budget)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE urls SET state = ?, owner = ?, lease_expires = ? WHERE id = ?",
+                    [(self.LEASED, owner, now + self.lease_seconds, row_id) for row_id, _, _ in rows]
+                )
+                self._bump(conn, "claimed", len(rows))
+        return [(url, depth) for _, url, depth in rows]
+
+    def complete(
+        self,
+        owner: str,
+        result: Dict[str, Any],
+        links: List[str],
+        anchors: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Commit a leased page's result and enqueue the links it leads to.
+
+        Returns:
+            False (and changes nothing) if owner no longer holds the lease
+        """
+        depth = result["depth"]
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE urls SET state = ?, owner = NULL, lease_expires = NULL WHERE url = ? AND state = ? AND owner = ?",
+                (self.DONE, result["url"], self.LEASED, owner)
+            ).rowcount
+            if not updated:
+                return False
+            conn.execute(
+                "INSERT INTO results (result, links) VALUES (?, ?)",
+                (json.dumps(result), json.dumps(links if self.params.link_graph else []))
+            )
+            if _follows_links(self.params, depth):
+                anchors = anchors or {}
+                for link in links:
+                    self._push(conn, link, depth + 1, anchors.get(link))
+        return True
+
+    def read_results(self, after_id: int, limit: int = 500) -> List[tuple[int, Dict[str, Any], List[str]]]:
+        """Committed results with IDs above after_id, in commit order."""
+        rows = self._connect().execute(
+            "SELECT id, result, links FROM results WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+        )
+        return [(row_id, json.loads(result), json.loads(links)) for row_id, result, links in rows]
+
+    def read_traps(self, after_id: int) -> List[tuple[int, Dict[str, Any]]]:
+        rows = self._connect().execute("SELECT id, entry FROM traps WHERE id > ? ORDER BY id", (after_id,))
+        return [(row_id, json.loads(entry)) for row_id, entry in rows]
+
+    def stop(self):
+        """Stop handing out URLs; workers exit once their in-flight pages commit."""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO counters (name, value) VALUES ('stopped', 1)")
+
+    def finished(self) -> bool:
+        """Whether the crawl is stopped, or nothing is leased and nothing more can be leased."""
+        conn = self._connect()
+        if self._counter(conn, "stopped"):
+            return True
+        if conn.execute("SELECT 1 FROM urls WHERE state = ? LIMIT 1", (self.LEASED,)).fetchone():
+            return False
+        if self._counter(conn, "claimed") >= self.params.max_pages:
+            return True
+        return conn.execute("SELECT 1 FROM urls WHERE state = ? LIMIT 1", (self.PENDING,)).fetchone() is None
+
+    @property
+    def enqueued(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM urls WHERE state != ?", (self.TRAPPED,)
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM urls WHERE state = ?", (self.PENDING,)
+        ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        counters = dict(self._connect().execute("SELECT name, value FROM counters"))
+        trap_reasons = {name[5:]: value for name, value in counters.items() if name.startswith("trap:")}
+        return {
+            "urls_enqueued": self.enqueued,
+            "duplicates_skipped": counters.get("duplicates", 0),
+            "excluded_by_rules": counters.get("excluded", 0),
+            "remaining_frontier_size": len(self),
+            "ordering": "priority" if self.scorer is not None else "breadth_first",
+            "trapped_urls": sum(trap_reasons.values()),
+            "trap_reasons": trap_reasons,
+            "seen_filter": "sqlite",
+            "lease_expiries": counters.get("lease_expiries", 0)
+        }
+
+
+def _distributed_worker_main(path: str, params_data: Dict[str, Any], worker_id: int, shared_cache_path: str):
+    """Entry point of a distributed crawl worker process."""
+    global SHARED_CACHE
+    # The parent's stdout may be its MCP stdio transport
+    sys.stdout = sys.stderr
+    SHARED_CACHE = SharedScrapeCache(shared_cache_path)
+    params = StartCrawlJobInput(**params_data)
+    frontier = SharedFrontier(path, params, params.lease_seconds)
+    asyncio.run(_distributed_worker(frontier, params, f"worker{worker_id}-{os.getpid()}"))
+
+
+async def _distributed_worker(frontier: SharedFrontier, params: CrawlSiteInput, owner: str):
+    """
+    Lease, crawl and commit pages until the shared frontier is finished.
+
+    Keeps up to params.concurrency pages in flight, and no more than this
+    worker's share of params.per_host_limit (see _worker_host_limit) from
+    any one origin; leased URLs whose origin is at that limit wait while
+    URLs from other origins go ahead. Page content goes to the job's
+    shared scrape cache only, so the parent process can import it.
+    """
+    host_limit = _worker_host_limit(params)
+    in_flight: Dict[asyncio.Task, str] = {}
+    origin_active: Counter = Counter()
+    waiting: deque = deque()
+    async with _create_http_client(http2=params.http2) as client:
+        while True:
+            free = params.concurrency - len(in_flight) - len(waiting)
+            if free > 0:
+                waiting.extend(frontier.lease(owner, free))
+            for _ in range(len(waiting)):
+                url, depth = waiting.popleft()
+                origin = _url_origin(url)
+                if len(in_flight) >= params.concurrency or origin_active[origin] >= host_limit:
+                    waiting.append((url, depth))
+                    continue
+                origin_active[origin] += 1
+                in_flight[asyncio.create_task(_crawl_page(client, url, depth, params))] = origin
+
+            if not in_flight:
+                if frontier.finished():
+                    return
+                await asyncio.sleep(DISTRIBUTED_POLL_SECONDS)
+                continue
+
+            done, _ = await asyncio.wait(
+                in_flight, timeout=DISTRIBUTED_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                origin_active[in_flight.pop(task)] -= 1
+                result, links, anchors = task.result()
+                frontier.complete(owner, result, links, anchors)
+                if "scrape_id" in result:
+                    _evict_from_cache(result["scrape_id"], local_only=True)
+
+
+def _worker_host_limit(params: StartCrawlJobInput) -> int:
+    """
+    Per-origin limit of each worker of a distributed crawl.
+
+    The crawl's per-origin limit is split evenly across the workers so that
+    together they stay within it; with more workers than the limit, each
+    worker still gets one request per origin.
+    """
+    return max(1, _host_limit(params) // params.workers)
+
+
+def _import_worker_page(cache: SharedScrapeCache, scrape_id: str):
+    """Copy a page a worker stored in the job's shared cache into this process's scrape cache."""
+    entry = cache.get(scrape_id)
+    if entry is None:
+        return
+    content = cache.read_body(entry["content_hash"])
+    if content is None:
+        return
+    _store_in_cache(
+        scrape_id=scrape_id,
+        url=entry["url"],
+        content=content,
+        metadata=entry["metadata"],
+        links=entry["links"],
+        images=entry["images"],
+        mime_type=entry["mime_type"]
+    )
+
+
+async def _run_distributed_crawl(
+    params: StartCrawlJobInput,
+    on_result,
+    frontier: SharedFrontier,
+    graph: Optional[LinkGraph] = None
+) -> tuple[int, Dict[str, Any]]:
+    """
+    Crawl with params.workers processes sharing a SharedFrontier.
+
+    The parent seeds the frontier, starts the workers and passes committed
+    results to on_result in commit order, adding them to the link graph and
+    trapped URLs to the frontier's trap log. Page order is therefore close to, but not
+    exactly, breadth-first. If on_result returns False, workers stop leasing
+    and are terminated. Workers write page content to a scrape cache file
+    of the job's own next to the frontier, and the parent imports each
+    committed page's content into its own cache, so the process-wide
+    SHARED_CACHE setting is left alone. A
+    worker that crashes is replaced up to DISTRIBUTED_MAX_RESTARTS times;
+    the URLs it held are crawled again once their leases expire. Frontier
+    reads, content imports and worker start/stop run in worker threads, so
+    a fast-committing crawl does not stall other requests on the server.
+
+    Returns:
+        tuple: (number of pages committed, frontier stats)
+    """
+    cache = SharedScrapeCache(SharedFrontier.cache_path_for(frontier.path))
+
+    sitemap_stats: Dict[str, Any] = {}
+    if not frontier.enqueued:
+        async with _create_http_client() as client:
+            await _seed_frontier(client, params, frontier, None, sitemap_stats)
+
+    context = multiprocessing.get_context("spawn")
+    params_data = params.model_dump(mode="json")
+
+    def start_worker(worker_id: int):
+        process = context.Process(
+            target=_distributed_worker_main,
+            args=(frontier.path, params_data, worker_id, cache.path),
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def poll(after_result: int, after_trap: int, import_pages: bool):
+        """Read newly committed results and traps, importing the pages' content."""
+        rows = frontier.read_results(after_result)
+        if import_pages:
+            for _, result, _ in rows:
+                if "scrape_id" in result:
+                    _import_worker_page(cache, result["scrape_id"])
+        traps = frontier.read_traps(after_trap) if frontier.trap_log is not None else []
+        return rows, traps
+
+    def shut_down():
+        frontier.stop()
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        _remove_sqlite_file(cache.path)
+
+    # SQLite reads, content imports and process start/join all block, so
+    # they run in worker threads (one per poll) to keep the event loop free
+    workers = []
+    for worker_id in range(params.workers):
+        workers.append(await asyncio.to_thread(start_worker, worker_id))
+    restarts = 0
+    pages = 0
+    last_result = last_trap = 0
+    stopped = False
+    try:
+        while True:
+            rows, traps = await asyncio.to_thread(poll, last_result, last_trap, not stopped)
+            for row_id, result, links in rows:
+                last_result = row_id
+                if stopped:
+                    continue
+                pages += 1
+                if graph is not None:
+                    graph.add_page(result["url"], links, result.get("error"))
+                if await on_result(result) is False:
+                    stopped = True
+                    await asyncio.to_thread(frontier.stop)
+            for last_trap, entry in traps:
+                frontier.trap_log.append(entry)
+            if rows:
+                continue
+
+            for index, process in enumerate(workers):
+                if process.exitcode not in (None, 0) and not stopped and restarts < DISTRIBUTED_MAX_RESTARTS:
+                    restarts += 1
+                    workers[index] = await asyncio.to_thread(start_worker, index)
+            if all(process.exitcode is not None for process in workers):
+                if not await asyncio.to_thread(frontier.read_results, last_result, 1):
+                    break
+                continue
+            await asyncio.sleep(DISTRIBUTED_POLL_SECONDS)
+
+        if not stopped and not await asyncio.to_thread(frontier.finished):
+            raise Exception(
+                f"Crawl workers crashed {restarts + 1} times; stopped with {len(frontier)} URLs left in the frontier."
+            )
+    finally:
+        await asyncio.to_thread(shut_down)
+
+    stats = frontier.stats()
+    stats["workers"] = params.workers
+    stats["worker_restarts"] = restarts
+    if sitemap_stats:
+        stats["sitemap"] = {
+            "files_read": len(sitemap_stats["sitemaps"]),
+            "urls_seeded": sitemap_stats["urls_seeded"],
+            "skipped_by_lastmod": sitemap_stats["skipped_by_lastmod"],
+            "error_count": len(sitemap_stats["sitemap_errors"]),
+            "errors": sitemap_stats["sitemap_errors"][:SITEMAP_ERRORS_LIMIT]
+        }
+    return pages, stats
+
+
+# ============================================================================
+# Background Jobs
+# ============================================================================
+
+# Background crawl jobs (job ID -> state); a job shares its ID with its result log
+JOBS = ShardedCache()
+
+
+def _job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the status report for a job from its live state."""
+    if job["kind"] == "batch":
+        return _batch_status(job)
+    log = job["log"]
+    end = job["finished_at"] or datetime.utcnow()
+    status = {
+        "job_id": log.run_id,
+        "status": job["status"],
+        "start_url": job["params"].url,
+        "results_uri": f"crawl://{log.run_id}/results/0",
+        "traps_uri": f"crawl://{log.run_id}/traps/0" if job["params"].trap_detection else None,
+        "graph_uri": f"crawl://{log.run_id}/graph" if job["graph"] is not None else None,
+        "warc_id": job["warc"].warc_id if job["warc"] is not None else None,
+        "progress": {
+            "pages_crawled": log.count,
+            "pages_failed": job["pages_failed"],
+            "max_pages": job["params"].max_pages,
+            "frontier_size": len(job["frontier"]),
+            "urls_enqueued": job["frontier"].enqueued,
+            "cached_mb": round(job["cached_bytes"] / (1024 * 1024), 3),
+            "max_memory_mb": job["params"].max_memory_mb
+        },
+        "started_at": job["started_at"].isoformat() + "Z",
+        "elapsed_seconds": round((end - job["started_at"]).total_seconds(), 3)
+    }
+    if job["finished_at"] is not None:
+        status["finished_at"] = job["finished_at"].isoformat() + "Z"
+        status["frontier_stats"] = job.get("frontier_stats") or job["frontier"].stats()
+    if job["error"]:
+        status["error"] = job["error"]
+    return status
+
+
+def _cached_bytes(result: Dict[str, Any]) -> int:
+    """Bytes of content a job result left in the scrape cache, for the max_memory_mb limit."""
+    entry = SCRAPE_CACHE.get(result["scrape_id"]) if result.get("scrape_id") else None
+    if entry is None:
+        return 0
+    return entry.get("content_bytes", entry["content_length"])
+
+
+async def _run_crawl_job(job: Dict[str, Any]):
+    """Run a crawl job to completion, recording its outcome on the job state."""
+    params = job["params"]
+    log = job["log"]
+    memory_limit = params.max_memory_mb * 1024 * 1024
+
+    async def on_result(result):
+        log.append(result)
+        if "error" in result:
+            job["pages_failed"] += 1
+        job["cached_bytes"] += _cached_bytes(result)
+        if job["cached_bytes"] > memory_limit:
+            job["status"] = "stopped"
+            job["error"] = f"Memory limit of {params.max_memory_mb} MB reached"
+            return False
+        return True
+
+    checkpoint = job["checkpoint"]
+    try:
+        if isinstance(job["frontier"], SharedFrontier):
+            _, job["frontier_stats"] = await _run_distributed_crawl(params, on_result, job["frontier"], job["graph"])
+        else:
+            _, job["frontier_stats"] = await _run_crawl(
+                params, on_result, job["frontier"], checkpoint, job["duplicate_index"], job["graph"], job["warc"]
+            )
+        if job["status"] == "running":
+            job["status"] = "completed"
+            if checkpoint is not None:
+                checkpoint.record("end")
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if job["warc"] is not None:
+            job["warc"].close()
+        job["finished_at"] = datetime.utcnow()
+        _finish_result_log(log, _job_status(job))
+
+
+def _check_job_slots():
+    """Raise if MAX_ACTIVE_JOBS crawl and batch jobs are already running."""
+    active = sum(1 for _, job in JOBS.items() if job["status"] == "running")
+    if active >= MAX_ACTIVE_JOBS:
+        raise Exception(
+            f"{active} jobs are already running (limit {MAX_ACTIVE_JOBS}). "
+            f"Wait for one to finish or cancel one with webscrape_cancel_job."
+        )
+
+
+def _launch_crawl_job(
+    params: StartCrawlJobInput,
+    log: ResultLog,
+    checkpoint: Optional[CrawlCheckpoint],
+    frontier: Union[CrawlFrontier, SharedFrontier],
+    duplicate_index: Optional[SimHashIndex] = None,
+    graph: Optional[LinkGraph] = None,
+    warc: Optional[WarcWriter] = None
+) -> Dict[str, Any]:
+    """Register a crawl job and start it as a background task."""
+    job = {
+        "kind": "crawl",
+        "params": params,
+        "log": log,
+        "checkpoint": checkpoint,
+        "frontier": frontier,
+        "duplicate_index": duplicate_index,
+        "graph": graph,
+        "warc": warc,
+        "status": "running",
+        "pages_failed": 0,
+        "cached_bytes": 0,
+        "error": None,
+        "started_at": datetime.utcnow(),
+        "finished_at": None
+    }
+    JOBS[log.run_id] = job
+    job["task"] = asyncio.create_task(_run_crawl_job(job))
+    return job
+
+
+def _get_job(job_id: str) -> Dict[str, Any]:
+    """Look up a job, raising if it is unknown or its retention has passed."""
+    job = JOBS.get(job_id)
+    if job is None:
+        raise Exception(
+            f"Job ID '{job_id}' not found. "
+            f"Finished jobs are kept for {CACHE_TTL_SECONDS}s."
+        )
+    return job
+
+
+# ============================================================================
+# Batch Jobs
+# ============================================================================
+
+def _open_batch_source(params: StartBatchJobInput) -> Iterator[str]:
+    """
+    Check a batch job's URL source and return an iterator over its URLs.
+
+    The source is validated up front but read lazily: files line by line
+    and sitemap discoveries a results page at a time, so a batch never
+    holds its whole URL list in memory. Blank lines and # comments are
+    skipped, and at most MAX_BATCH_URLS URLs are read.
+    """
+    if params.urls is not None:
+        lines = iter(params.urls)
+    elif params.url_file is not None:
+        if not os.path.isfile(params.url_file):
+            raise Exception(f"URL file '{params.url_file}' not found.")
+
+        def read_file():
+            with open(params.url_file, encoding="utf-8") as f:
+                yield from f
+
+        lines = read_file()
+    elif params.source_uri.startswith("sitemap://"):
+        discovery_id = params.source_uri[len("sitemap://"):].split("/")[0]
+        run = RESULT_LOGS.get(discovery_id)
+        if run is None or run["kind"] != "discovery":
+            raise Exception(
+                f"Discovery ID '{discovery_id}' not found. "
+                f"Results are kept for {CACHE_TTL_SECONDS}s after the run finishes."
+            )
+
+        def read_discovery(log):
+            cursor = 0
+            while True:
+                entries, cursor = log.read_page(cursor)
+                if not entries:
+                    return
+                for entry in entries:
+                    yield entry["url"]
+
+        lines = read_discovery(run["log"])
+    else:
+        scrape_id = params.source_uri[len("scrape://"):].split("/")[0]
+        content = _get_cached_content(_get_cache_entry(scrape_id))
+        if isinstance(content, bytes):
+            raise Exception(f"Scrape '{scrape_id}' holds binary content, not a URL list.")
+        lines = iter(content.splitlines())
+
+    urls = (line.strip() for line in lines)
+    return itertools.islice((url for url in urls if url and not url.startswith("#")), MAX_BATCH_URLS)
+
+
+def _classify_error(message: str) -> str:
+    """Bucket a scrape error message, e.g. for a batch job's error counts."""
+    match = re.match(r"HTTP (\d{3})", message)
+    if match:
+        return f"http_{match.group(1)}"
+    if message.startswith(("Request timeout", "No result within")):
+        return "timeout"
+    if message.startswith("Failed to fetch"):
+        return "network"
+    if message.startswith("Invalid URL"):
+        return "invalid_url"
+    return "other"
+
+
+async def _run_batch(
+    params: StartBatchJobInput,
+    urls: Iterator[str],
+    on_result,
+    client: httpx.AsyncClient
+):
+    """
+    Scrape urls with up to params.concurrency in flight on one client.
+
+    URLs are handed out by a HostScheduler, origin by origin in turn with
+    at most params.per_host_limit in flight to each, so a batch dominated
+    by one site keeps that site's requests on a few reused connections
+    and still makes progress on the others. A new URL starts as soon as
+    any finishes, so one slow page never holds up the rest. Results are
+    passed to the async on_result callback in completion order, tagged
+    with their position in the source. If on_result returns False, no new
+    URLs are started and the call returns once those in flight are done.
+    """
+    options = ScrapeOptions.from_params(params)
+    scheduler = HostScheduler(enumerate(urls), params.per_host_limit, BATCH_SCHEDULER_WINDOW, BATCH_SCHEDULER_MAX_BUFFER)
+    in_flight: Dict[asyncio.Task, str] = {}
+    stopped = False
+
+    async def scrape(index: int, url: str) -> Dict[str, Any]:
+        if url.startswith(("http://", "https://")):
+            result = await _scrape_within(url, options, client, params.url_timeout_seconds)
+        else:
+            result = {"success": False, "error": f"Invalid URL: {url}", "url": url}
+        result["index"] = index
+        return result
+
+    try:
+        while True:
+            while not stopped and len(in_flight) < params.concurrency:
+                item = scheduler.next()
+                if item is None:
+                    break
+                index, url, origin = item
+                in_flight[asyncio.create_task(scrape(index, url))] = origin
+            if not in_flight:
+                return
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                scheduler.release(in_flight.pop(task))
+                if await on_result(task.result()) is False:
+                    stopped = True
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+def _batch_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the status report for a batch job, with throughput and error counts."""
+    log = job["log"]
+    end = job["finished_at"] or datetime.utcnow()
+    elapsed = (end - job["started_at"]).total_seconds()
+    window_start = time.monotonic() - BATCH_RATE_WINDOW_SECONDS
+    recent = sum(1 for completed in job["completions"] if completed >= window_start)
+    status = {
+        "job_id": log.run_id,
+        "kind": "batch",
+        "status": job["status"],
+        "results_uri": f"batch://{log.run_id}/results/0",
+        "warc_id": job["warc"].warc_id if job["warc"] is not None else None,
+        "progress": {
+            "urls_done": log.count,
+            "urls_succeeded": log.count - job["pages_failed"],
+            "urls_failed": job["pages_failed"],
+            "errors_by_type": dict(job["errors"]),
+            "urls_read": job["urls_read"],
+            "urls_total": job["urls_total"],
+            "cached_mb": round(job["cached_bytes"] / (1024 * 1024), 3),
+            "max_memory_mb": job["params"].max_memory_mb
+        },
+        "connections": job["connections"].summary(),
+        "throughput": {
+            "urls_per_second": round(log.count / elapsed, 2) if elapsed > 0 else 0.0,
+            "recent_urls_per_second": (
+                round(recent / BATCH_RATE_WINDOW_SECONDS, 2) if job["finished_at"] is None else None
+            )
+        },
+        "started_at": job["started_at"].isoformat() + "Z",
+        "elapsed_seconds": round(elapsed, 3)
+    }
+    if job["finished_at"] is not None:
+        status["finished_at"] = job["finished_at"].isoformat() + "Z"
+    if job["error"]:
+        status["error"] = job["error"]
+    return status
+
+
+async def _run_batch_job(job: Dict[str, Any]):
+    """Run a batch job to completion, recording its outcome on the job state."""
+    params = job["params"]
+    log = job["log"]
+    memory_limit = params.max_memory_mb * 1024 * 1024
+
+    def counted(urls):
+        for url in urls:
+            job["urls_read"] += 1
+            yield url
+        job["urls_total"] = job["urls_read"]
+
+    async def on_result(result):
+        log.append(result)
+        now = time.monotonic()
+        completions = job["completions"]
+        completions.append(now)
+        while completions[0] < now - BATCH_RATE_WINDOW_SECONDS:
+            completions.popleft()
+        if not result["success"]:
+            job["pages_failed"] += 1
+            kind = _classify_error(result["error"])
+            job["errors"][kind] = job["errors"].get(kind, 0) + 1
+        job["cached_bytes"] += _cached_bytes(result)
+        if job["cached_bytes"] > memory_limit:
+            job["status"] = "stopped"
+            job["error"] = f"Memory limit of {params.max_memory_mb} MB reached"
+            return False
+        return True
+
+    try:
+        async with _create_http_client(warc=job["warc"], http2=params.http2) as client:
+            job["connections"].attach(client)
+            await _run_batch(params, counted(job["urls"]), on_result, client)
+        if job["status"] == "running":
+            job["status"] = "completed"
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        if job["warc"] is not None:
+            job["warc"].close()
+        job["finished_at"] = datetime.utcnow()
+        _finish_result_log(log, _batch_status(job))
+
+
+def _launch_batch_job(
+    params: StartBatchJobInput,
+    log: ResultLog,
+    urls: Iterator[str],
+    warc: Optional[WarcWriter] = None
+) -> Dict[str, Any]:
+    """Register a batch job and start it as a background task."""
+    job = {
+        "kind": "batch",
+        "params": params,
+        "log": log,
+        "urls": urls,
+        "warc": warc,
+        "status": "running",
+        "urls_read": 0,
+        "urls_total": min(len(params.urls), MAX_BATCH_URLS) if params.urls is not None else None,
+        "pages_failed": 0,
+        "errors": {},
+        "completions": deque(),
+        "cached_bytes": 0,
+        "connections": ConnectionStats(),
+        "error": None,
+        "started_at": datetime.utcnow(),
+        "finished_at": None
+    }
+    JOBS[log.run_id] = job
+    job["task"] = asyncio.create_task(_run_batch_job(job))
+    return job
+
+
+# ============================================================================
+# Result Exports
+# ============================================================================
+
+def _export_rows(log: ResultLog, include_content: bool, stats: Dict[str, int]):
+    """
+    Yield one flat export row per page of a result log.
+
+    The log is read a page at a time and each page's content is resolved
+    from the cache only when its row is produced, so memory stays flat
+    however many pages the crawl has.
+    """
+    cursor = 0
+    while True:
+        results, cursor = log.read_page(cursor)
+        if not results:
+            return
+        for result in results:
+            row = {
+                "url": result.get("url"),
+                "depth": result.get("depth"),
+                "status_code": result.get("status_code"),
+                "title": result.get("title"),
+                "scrape_id": result.get("scrape_id"),
+                "error": result.get("error"),
+                "metadata": None,
+                "content": None
+            }
+            if result.get("scrape_id"):
+                try:
+                    entry = _get_cache_entry(result["scrape_id"])
+                    row["metadata"] = entry["metadata"]
+                    row["title"] = row["title"] or entry["metadata"].get("title")
+                    if include_content:
+                        row["content"] = _get_cached_content(entry)
+                except Exception:
+                    stats["content_missing"] += 1
+            stats["rows"] += 1
+            yield row
+
+
+def _write_jsonl_export(rows, path: str, compression: str):
+    """Write rows as JSON lines, optionally gzip-compressed."""
+    opener = gzip.open if compression == "gzip" else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def _write_parquet_export(rows, path: str, compression: str):
+    """Write rows to Parquet in fixed-size row groups; metadata is stored as a JSON string."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Parquet export requires pyarrow. Install with: pip install pyarrow")
+
+    schema = pa.schema([
+        ("url", pa.string()),
+        ("depth", pa.int32()),
+        ("status_code", pa.int32()),
+        ("title", pa.string()),
+        ("scrape_id", pa.string()),
+        ("error", pa.string()),
+        ("metadata", pa.string()),
+        ("content", pa.string())
+    ])
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        while True:
+            batch = list(itertools.islice(rows, EXPORT_ROW_GROUP_SIZE))
+            if not batch:
+                return
+            for row in batch:
+                if row["metadata"] is not None:
+                    row["metadata"] = json.dumps(row["metadata"], ensure_ascii=False)
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+def _export_result_log(log: ResultLog, params: ExportResultsInput) -> Dict[str, Any]:
+    """
+    Stream a result log to a file in EXPORT_DIR.
+
+    The file is written under a temporary name and renamed when complete,
+    so readers never see a partial export.
+
+    Returns:
+        dict: path, rows, content_missing and file size
+    """
+    if params.format == "jsonl" and params.compression not in ("none", "gzip"):
+        raise Exception(f"JSONL exports support 'none' or 'gzip' compression, not '{params.compression}'.")
+
+    extension = ".jsonl" if params.format == "jsonl" else ".parquet"
+    if params.format == "jsonl" and params.compression == "gzip":
+        extension += ".gz"
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, params.filename or f"{params.crawl_id}{extension}")
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+
+    stats = {"rows": 0, "content_missing": 0}
+    rows = _export_rows(log, params.include_content, stats)
+    try:
+        if params.format == "jsonl":
+            _write_jsonl_export(rows, temp_path, params.compression)
+        else:
+            _write_parquet_export(rows, temp_path, params.compression)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {"path": path, **stats, "file_bytes": os.path.getsize(path)}
+
+
+# ============================================================================
+# Tool Implementations
+# ============================================================================
+
+
+
+# ============================================================================
+# Discovery Tools (Progressive Disclosure)
+# ============================================================================
+
+# ============================================================================
+# Resource Access Endpoints (Progressive Disclosure)
+# ============================================================================
+
+# ============================================================================
+# Discovery Tools (Progressive Disclosure)
+# ============================================================================
+
+@mcp.tool(
+    name="webscrape_list_tools",
+    annotations={
+        "title": "List WebScrape Tools",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True
+    }
+)
+async def list_tools(
+    detail_level: Literal["minimal", "brief", "full"] = "minimal",
+    category: Optional[str] = None
+) -> str:
+    """
+    List available web scraping tools with configurable detail level.
+
+    Enables progressive disclosure - agents can discover tools without loading
+    all schemas into context upfront.
+
+    Args:
+        detail_level: Amount of detail to return
+            - "minimal": Just tool names (smallest token usage)
+            - "brief": Names and descriptions
+            - "full": Complete schemas with all parameters
+        category: Optional filter by category ("scraping", "extraction", "rendering", "retrieval", "jobs")
+
+    Returns:
+        JSON string with tool information based on detail level
+    """
+    tools = {
+        "webscrape_scrape_url": {
+            "name": "webscrape_scrape_url",
+            "description": "Scrape content from a single URL",
+            "category": "scraping",
+            "best_for": ["Extracting article content", "Getting page information", "Converting web pages to markdown"]
+        },
+        "webscrape_scrape_multiple_urls": {
+            "name": "webscrape_scrape_multiple_urls",
+            "description": "Scrape multiple URLs concurrently (batch operation)",
+            "category": "scraping",
+            "best_for": ["Scraping multiple pages from a sitemap", "Batch processing article URLs", "Comparing content across pages"]
+        },
+        "webscrape_crawl_site": {
+            "name": "webscrape_crawl_site",
+            "description": "Recursively crawl a website following links",
+            "category": "scraping",
+            "best_for": ["Discovering all pages in a section", "Scraping documentation sites", "Building sitemaps"]
+        },
+        "webscrape_extract_links": {
+            "name": "webscrape_extract_links",
+            "description": "Extract all links from a web page",
+            "category": "extraction",
+            "best_for": ["Site mapping", "Finding all subpages", "Link analysis"]
+        },
+        "webscrape_discover_sitemap": {
+            "name": "webscrape_discover_sitemap",
+            "description": "List a site's URLs from its sitemaps without crawling",
+            "category": "extraction",
+            "best_for": ["Enumerating all pages cheaply", "Finding recently changed pages", "Seeding batch scrapes"]
+        },
+        "webscrape_scrape_with_js": {
+            "name": "webscrape_scrape_with_js",
+            "description": "Scrape JavaScript-rendered pages using headless browser",
+            "category": "rendering",
+            "best_for": ["Single Page Applications", "Pages with lazy-loaded content", "JavaScript-heavy websites"]
+        },
+        "webscrape_screenshot_url": {
+            "name": "webscrape_screenshot_url",
+            "description": "Capture a screenshot of a web page",
+            "category": "rendering",
+            "best_for": ["Visual documentation", "Page appearance verification", "Creating thumbnails"]
+        },
+        "webscrape_read_content": {
+            "name": "webscrape_read_content",
+            "description": "Read a range of cached scrape content by offset",
+            "category": "retrieval",
+            "best_for": ["Paging through large pages", "Reading part of a long document", "Avoiding huge responses"]
+        },
+        "webscrape_get_scrapes": {
+            "name": "webscrape_get_scrapes",
+            "description": "Fetch many cached scrapes in one call",
+            "category": "retrieval",
+            "best_for": ["Consuming crawl results", "Reading batch scrape output", "Avoiding per-page round-trips"]
+        },
+        "webscrape_start_crawl_job": {
+            "name": "webscrape_start_crawl_job",
+            "description": "Start a website crawl in the background and return a job ID",
+            "category": "jobs",
+            "best_for": ["Large crawls", "Crawls longer than the client timeout", "Consuming results while crawling"]
+        },
+        "webscrape_start_batch_job": {
+            "name": "webscrape_start_batch_job",
+            "description": "Scrape thousands of URLs from a list, file or resource in the background",
+            "category": "jobs",
+            "best_for": ["Batches larger than 20 URLs", "Scraping every URL of a sitemap", "Tracking throughput and errors"]
+        },
+        "webscrape_get_job_status": {
+            "name": "webscrape_get_job_status",
+            "description": "Report status and progress of a background crawl or batch job",
+            "category": "jobs",
+            "best_for": ["Polling crawl progress", "Checking whether a job finished", "Diagnosing stopped jobs"]
+        },
+        "webscrape_cancel_job": {
+            "name": "webscrape_cancel_job",
+            "description": "Cancel a running background crawl or batch job",
+            "category": "jobs",
+            "best_for": ["Stopping runaway crawls", "Freeing job slots", "Keeping partial results"]
+        },
+        "webscrape_resume_crawl": {
+            "name": "webscrape_resume_crawl",
+            "description": "Resume an interrupted crawl from its checkpoint",
+            "category": "jobs",
+            "best_for": ["Recovering after a server restart", "Continuing cancelled or failed crawls", "Avoiding refetching completed pages"]
+        },
+        "webscrape_export_results": {
+            "name": "webscrape_export_results",
+            "description": "Export a crawl's pages to a local JSONL or Parquet file",
+            "category": "retrieval",
+            "best_for": ["Feeding offline indexing pipelines", "Archiving crawl output", "Bulk analysis of crawled content"]
+        },
+        "webscrape_replay_warc": {
+            "name": "webscrape_replay_warc",
+            "description": "Re-scrape pages from a WARC archive without network access",
+            "category": "retrieval",
+            "best_for": ["Trying a different output format without refetching", "Reproducing past scrapes", "Offline extraction"]
+        }
+    }
+
+    # Filter by category if requested
+    if category:
+        tools = {k: v for k, v in tools.items() if v.get("category") == category}
+
+    # Return based on detail level
+    if detail_level == "minimal":
+        return json.dumps(list(tools.keys()), indent=2)
+    elif detail_level == "brief":
+        brief_tools = [
+            {
+                "name": v["name"],
+                "description": v["description"],
+                "category": v["category"]
+            }
+            for v in tools.values()
+        ]
+        return json.dumps(brief_tools, indent=2)
+    else:  # full
+        return json.dumps(tools, indent=2)
+
+
+@mcp.tool(
+    name="webscrape_search_tools",
+    annotations={
+        "title": "Search WebScrape Tools",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True
+    }
+)
+async def search_tools(
+    query: str,
+    category: Optional[str] = None
+) -> str:
+    """
+    Search for web scraping tools by keyword or category.
+
+    Args:
+        query: Search term (e.g., "javascript", "crawl", "links", "batch")
+        category: Optional category filter ("scraping", "extraction", "rendering", "retrieval", "jobs")
+
+    Returns:
+        JSON array of matching tools with their descriptions
+    """
+    tools = {
+        "webscrape_scrape_url": {
+            "name": "webscrape_scrape_url",
+            "description": "Scrape content from a single URL",
+            "category": "scraping",
+            "keywords": ["scrape", "url", "single", "page", "content", "markdown", "html"]
+        },
+        "webscrape_scrape_multiple_urls": {
+            "name": "webscrape_scrape_multiple_urls",
+            "description": "Scrape multiple URLs concurrently (batch operation)",
+            "category": "scraping",
+            "keywords": ["scrape", "multiple", "batch", "concurrent", "urls", "bulk"]
+        },
+        "webscrape_crawl_site": {
+            "name": "webscrape_crawl_site",
+            "description": "Recursively crawl a website following links",
+            "category": "scraping",
+            "keywords": ["crawl", "recursive", "follow", "links", "site", "depth", "sitemap"]
+        },
+        "webscrape_extract_links": {
+            "name": "webscrape_extract_links",
+            "description": "Extract all links from a web page",
+            "category": "extraction",
+            "keywords": ["extract", "links", "urls", "hrefs", "navigation", "mapping"]
+        },
+        "webscrape_discover_sitemap": {
+            "name": "webscrape_discover_sitemap",
+            "description": "List a site's URLs from its sitemaps without crawling",
+            "category": "extraction",
+            "keywords": ["sitemap", "robots", "discover", "urls", "lastmod", "xml", "index", "mapping"]
+        },
         "webscrape_scrape_with_js": {
             "name": "webscrape_scrape_with_js",
             "description": "Scrape JavaScript-rendered pages using headless browser",
@@ -788,483 +4857,1619 @@ async def search_tools(
             "description": "Capture a screenshot of a web page",
             "category": "rendering",
             "keywords": ["screenshot", "capture", "image", "visual", "png", "thumbnail"]
+        },
+        "webscrape_read_content": {
+            "name": "webscrape_read_content",
+            "description": "Read a range of cached scrape content by offset",
+            "category": "retrieval",
+            "keywords": ["read", "range", "offset", "page", "cursor", "cache", "content", "chunk"]
+        },
+        "webscrape_get_scrapes": {
+            "name": "webscrape_get_scrapes",
+            "description": "Fetch many cached scrapes in one call",
+            "category": "retrieval",
+            "keywords": ["get", "multiple", "batch", "multi-get", "cache", "content", "results", "crawl"]
+        },
+        "webscrape_start_crawl_job": {
+            "name": "webscrape_start_crawl_job",
+            "description": "Start a website crawl in the background and return a job ID",
+            "category": "jobs",
+            "keywords": ["job", "background", "async", "crawl", "start", "long", "timeout"]
+        },
+        "webscrape_start_batch_job": {
+            "name": "webscrape_start_batch_job",
+            "description": "Scrape thousands of URLs from a list, file or resource in the background",
+            "category": "jobs",
+            "keywords": ["batch", "bulk", "job", "background", "multiple", "urls", "file", "list", "thousands", "throughput"]
+        },
+        "webscrape_get_job_status": {
+            "name": "webscrape_get_job_status",
+            "description": "Report status and progress of a background crawl or batch job",
+            "category": "jobs",
+            "keywords": ["job", "status", "progress", "poll", "crawl", "batch", "throughput"]
+        },
+        "webscrape_cancel_job": {
+            "name": "webscrape_cancel_job",
+            "description": "Cancel a running background crawl or batch job",
+            "category": "jobs",
+            "keywords": ["job", "cancel", "stop", "abort", "crawl", "batch"]
+        },
+        "webscrape_resume_crawl": {
+            "name": "webscrape_resume_crawl",
+            "description": "Resume an interrupted crawl from its checkpoint",
+            "category": "jobs",
+            "keywords": ["resume", "restart", "checkpoint", "continue", "recover", "crawl", "job"]
+        },
+        "webscrape_export_results": {
+            "name": "webscrape_export_results",
+            "description": "Export a crawl's pages to a local JSONL or Parquet file",
+            "category": "retrieval",
+            "keywords": ["export", "jsonl", "parquet", "file", "dump", "download", "pipeline", "index", "crawl"]
+        },
+        "webscrape_replay_warc": {
+            "name": "webscrape_replay_warc",
+            "description": "Re-scrape pages from a WARC archive without network access",
+            "category": "retrieval",
+            "keywords": ["warc", "archive", "replay", "offline", "raw", "capture", "rescrape", "reprocess"]
+        }
+    }
+
+    query_lower = query.lower()
+    matching_tools = []
+
+    for tool_id, tool_info in tools.items():
+        # Check if query matches name, description, or keywords
+        if (query_lower in tool_info["name"].lower() or
+            query_lower in tool_info["description"].lower() or
+            any(query_lower in keyword for keyword in tool_info.get("keywords", []))):
+
+            # Apply category filter if specified
+            if category is None or tool_info.get("category") == category:
+                matching_tools.append({
+                    "name": tool_info["name"],
+                    "description": tool_info["description"],
+                    "category": tool_info["category"]
+                })
+
+    return json.dumps(matching_tools, indent=2)
+
+
+# ============================================================================
+# Resource Access Endpoints (Progressive Disclosure)
+# ============================================================================
+
+@mcp.resource("scrape://{scrape_id}/content")
+async def get_scrape_content(scrape_id: str) -> str:
+    """
+    Retrieve full scraped content by ID.
+
+    This resource endpoint enables the progressive disclosure pattern - tools return
+    resource URIs instead of full content, then agents can fetch the content only
+    when needed.
+
+    Args:
+        scrape_id: Unique identifier from a scrape operation
+
+    Returns:
+        Full scraped content. Binary captures such as screenshots are returned
+        as a base64 data URI; use scrape://{scrape_id}/screenshot.png to get
+        the raw image instead.
+
+    Raises:
+        Exception: If scrape ID not found or expired
+    """
+    # Clean expired cache entries
+    _clean_expired_cache()
+
+    entry = _get_cache_entry(scrape_id)
+    content = _get_cached_content(entry)
+    if isinstance(content, bytes):
+        return _to_data_uri(content, entry["mime_type"])
+    return content
+
+
+@mcp.resource("scrape://{scrape_id}/screenshot.png", mime_type="image/png")
+async def get_scrape_screenshot(scrape_id: str) -> bytes:
+    """
+    Retrieve a cached screenshot as raw PNG bytes.
+
+    Served as a binary blob resource, so the image is not inflated into a
+    base64 string inside the server.
+
+    Args:
+        scrape_id: Scrape ID returned by webscrape_screenshot_url
+
+    Returns:
+        PNG image bytes
+
+    Raises:
+        Exception: If scrape ID not found, expired, or not a screenshot
+    """
+    _clean_expired_cache()
+
+    entry = _get_cache_entry(scrape_id)
+    if entry["mime_type"] != "image/png":
+        raise Exception(
+            f"Scrape ID '{scrape_id}' is not a screenshot. "
+            f"Use scrape://{scrape_id}/content instead."
+        )
+    return _get_cached_content(entry)
+
+
+@mcp.resource("scrape://{scrape_id}/content/{cursor}")
+async def get_scrape_content_page(scrape_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of scraped content, starting at a cursor.
+
+    Pages are CONTENT_PAGE_SIZE characters at most and end on a line boundary
+    where possible. Start with cursor "0" and follow next_cursor until it is
+    null to read the whole body in transport-friendly pieces.
+
+    Args:
+        scrape_id: Unique identifier from a scrape operation
+        cursor: Character offset to read from (next_cursor of the previous page)
+
+    Returns:
+        JSON string with the page content, total_length and next_cursor
+
+    Raises:
+        Exception: If scrape ID not found, expired, or cursor is invalid
+    """
+    if not cursor.isdigit():
+        raise Exception(f"Invalid cursor '{cursor}'. Use \"0\" or a next_cursor value.")
+
+    page = _read_content_range(scrape_id, int(cursor))
+    return json.dumps(page, indent=2)
+
+
+@mcp.resource("scrape://{scrape_id}/metadata")
+async def get_scrape_metadata(scrape_id: str) -> str:
+    """
+    Retrieve metadata for a scrape without the full content.
+
+    Useful for getting information about a scrape (URL, stats, preview)
+    without loading the entire content payload. Sizes, counts and the preview
+    are computed when the scrape is stored, so this stays cheap regardless of
+    page size; links and images are paged through their own resources.
+    Scrapes whose content is byte-identical share one stored body; their IDs
+    are listed in shared_with.
+
+    Args:
+        scrape_id: Unique identifier from a scrape operation
+
+    Returns:
+        JSON string with metadata
+
+    Raises:
+        Exception: If scrape ID not found or expired
+    """
+    entry = _get_cache_entry(scrape_id)
+    refs, shared_with = _content_refs(scrape_id, entry)
+
+    metadata_response = {
+        "scrape_id": scrape_id,
+        "url": entry["url"],
+        "metadata": entry["metadata"],
+        "link_count": entry["link_count"],
+        "image_count": entry["image_count"],
+        "links_uri": f"scrape://{scrape_id}/links/0",
+        "images_uri": f"scrape://{scrape_id}/images/0",
+        "content_length": entry["content_length"],
+        "mime_type": entry["mime_type"],
+        "preview": entry["preview"],
+        "content_hash": entry["content_hash"],
+        "shared_body_refs": refs,
+        "shared_with": shared_with,
+        "created_at": entry["created_at"].isoformat() + "Z",
+        "expires_at": entry["expires_at"].isoformat() + "Z"
+    }
+
+    return json.dumps(metadata_response, separators=(",", ":"))
+
+
+def _list_page(scrape_id: str, field: str, cursor: str) -> str:
+    """
+    Serialize one page of a cached entry's links or images.
+
+    Args:
+        scrape_id: Unique identifier from a scrape operation
+        field: "links" or "images"
+        cursor: Item offset to start from
+
+    Returns:
+        Compact JSON string with items, total and next_cursor
+    """
+    if not cursor.isdigit():
+        raise Exception(f"Invalid cursor '{cursor}'. Use \"0\" or a next_cursor value.")
+
+    items = _get_cache_entry(scrape_id)[field]
+    start = int(cursor)
+    end = min(start + LIST_PAGE_SIZE, len(items))
+
+    return json.dumps({
+        "scrape_id": scrape_id,
+        "offset": start,
+        "total": len(items),
+        "next_cursor": str(end) if end < len(items) else None,
+        field: items[start:end]
+    }, separators=(",", ":"))
+
+
+@mcp.resource("scrape://{scrape_id}/links/{cursor}")
+async def get_scrape_links(scrape_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of links found on a scraped page.
+
+    Args:
+        scrape_id: Unique identifier from a scrape operation
+        cursor: Item offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with up to LIST_PAGE_SIZE links and next_cursor
+
+    Raises:
+        Exception: If scrape ID not found, expired, or cursor is invalid
+    """
+    return _list_page(scrape_id, "links", cursor)
+
+
+@mcp.resource("scrape://{scrape_id}/images/{cursor}")
+async def get_scrape_images(scrape_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of image URLs found on a scraped page.
+
+    Args:
+        scrape_id: Unique identifier from a scrape operation
+        cursor: Item offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with up to LIST_PAGE_SIZE image URLs and next_cursor
+
+    Raises:
+        Exception: If scrape ID not found, expired, or cursor is invalid
+    """
+    return _list_page(scrape_id, "images", cursor)
+
+
+@mcp.resource("crawl://{crawl_id}/results/{cursor}")
+async def get_crawl_results(crawl_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of a crawl's per-page results.
+
+    Results are appended while the crawl runs, so this can be polled before
+    the crawl finishes: follow next_cursor, and stop once complete is true
+    and next_cursor is null.
+
+    Args:
+        crawl_id: crawl_id returned by webscrape_crawl_site, or a job_id
+            returned by webscrape_start_crawl_job
+        cursor: Byte offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with results, next_cursor and completion status
+
+    Raises:
+        Exception: If crawl ID not found, expired, or cursor is invalid
+    """
+    return _read_result_log("crawl", crawl_id, cursor)
+
+
+@mcp.resource("crawl://{crawl_id}/traps/{cursor}")
+async def get_crawl_traps(crawl_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of the URLs a crawl rejected as likely crawler traps.
+
+    Each entry has the url, the reason (path_depth, segment_repeat,
+    template_budget, query_params or query_variants) and a detail string.
+
+    Args:
+        crawl_id: crawl_id returned by webscrape_crawl_site, or a job_id
+            returned by webscrape_start_crawl_job
+        cursor: Byte offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with trap entries, next_cursor and completion status
+
+    Raises:
+        Exception: If crawl ID not found, expired, ran without trap detection,
+            or cursor is invalid
+    """
+    return _read_result_log("crawl", crawl_id, cursor, stream="traps")
+
+
+def _get_link_graph(crawl_id: str) -> LinkGraph:
+    """Look up a crawl's link graph, raising if the crawl is unknown or ran without one."""
+    run = RESULT_LOGS.get(crawl_id)
+    if run is None or run["kind"] != "crawl":
+        raise Exception(
+            f"Crawl ID '{crawl_id}' not found. "
+            f"Results are kept for {CACHE_TTL_SECONDS}s after the run finishes."
+        )
+    if run["graph"] is None:
+        raise Exception(f"Crawl '{crawl_id}' ran with link_graph disabled.")
+    return run["graph"]
+
+
+@mcp.resource("crawl://{crawl_id}/graph")
+async def get_crawl_graph(crawl_id: str) -> str:
+    """
+    Retrieve a summary of a crawl's link graph.
+
+    Includes node and edge counts, orphan and broken-link counts and the
+    highest-ranked pages with their PageRank and degrees. Can be read while
+    the crawl runs; the analysis covers the pages committed so far.
+
+    Args:
+        crawl_id: crawl_id returned by webscrape_crawl_site, or a job_id
+            returned by webscrape_start_crawl_job
+
+    Returns:
+        Compact JSON string with the graph summary and URIs of the full views
+
+    Raises:
+        Exception: If crawl ID not found, expired, or ran without a link graph
+    """
+    graph = await _get_link_graph(crawl_id).analyze_async()
+    return json.dumps({
+        "crawl_id": crawl_id,
+        **graph.summary(),
+        "views": {view: f"crawl://{crawl_id}/graph/{view}/0" for view in ("pages", "orphans", "broken")}
+    }, separators=(",", ":"))
+
+
+@mcp.resource("crawl://{crawl_id}/graph/{view}/{cursor}")
+async def get_crawl_graph_view(crawl_id: str, view: str, cursor: str) -> str:
+    """
+    Retrieve one page of a link graph view.
+
+    Views:
+        pages: every crawled page with pagerank, in_degree and out_degree,
+            highest rank first
+        orphans: crawled pages no other crawled page links to
+        broken: links (source, target, error) into pages that failed
+
+    Args:
+        crawl_id: crawl_id returned by webscrape_crawl_site, or a job_id
+            returned by webscrape_start_crawl_job
+        view: "pages", "orphans" or "broken"
+        cursor: Item offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with up to LIST_PAGE_SIZE items, total and next_cursor
+
+    Raises:
+        Exception: If crawl ID not found, view is unknown, or cursor is invalid
+    """
+    if view not in ("pages", "orphans", "broken"):
+        raise Exception(f"Unknown graph view '{view}'. Use pages, orphans or broken.")
+    if not cursor.isdigit():
+        raise Exception(f"Invalid cursor '{cursor}'. Use \"0\" or a next_cursor value.")
+
+    graph = await _get_link_graph(crawl_id).analyze_async()
+    nodes = graph.analyze()[view]
+    start = int(cursor)
+    end = min(start + LIST_PAGE_SIZE, len(nodes))
+    if view == "broken":
+        items = [
+            {"source": graph.urls[source], "target": graph.urls[target], "error": graph.errors[target]}
+            for source, target in nodes[start:end]
+        ]
+    else:
+        items = [graph.page_entry(node) for node in nodes[start:end]]
+
+    return json.dumps({
+        "crawl_id": crawl_id,
+        "view": view,
+        "offset": start,
+        "total": len(nodes),
+        "next_cursor": str(end) if end < len(nodes) else None,
+        view: items
+    }, separators=(",", ":"))
+
+
+@mcp.resource("sitemap://{discovery_id}/urls/{cursor}")
+async def get_sitemap_urls(discovery_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of URLs found by a sitemap discovery.
+
+    Args:
+        discovery_id: discovery_id returned by webscrape_discover_sitemap
+        cursor: Byte offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with url/lastmod entries and next_cursor
+
+    Raises:
+        Exception: If discovery ID not found, expired, or cursor is invalid
+    """
+    return _read_result_log("discovery", discovery_id, cursor)
+
+
+@mcp.resource("batch://{batch_id}/results/{cursor}")
+async def get_batch_results(batch_id: str, cursor: str) -> str:
+    """
+    Retrieve one page of a batch scrape's or batch job's per-URL results.
+
+    Results are appended in completion order while the batch runs, each
+    tagged with the URL's index in its source. Follow next_cursor, and
+    stop once complete is true and next_cursor is null.
+
+    Args:
+        batch_id: batch_id returned by webscrape_scrape_multiple_urls, or a
+            job_id returned by webscrape_start_batch_job
+        cursor: Byte offset to read from ("0" for the first page)
+
+    Returns:
+        Compact JSON string with results, next_cursor and completion status
+
+    Raises:
+        Exception: If batch ID not found, expired, or cursor is invalid
+    """
+    return _read_result_log("batch", batch_id, cursor)
+
+
+@mcp.tool(
+    name="webscrape_read_content",
+    annotations={
+        "title": "Read Cached Content Range",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True
+    }
+)
+async def read_content(params: ReadContentInput) -> str:
+    """
+    Read a range of previously scraped content by scrape ID.
+
+    Use this instead of the full scrape://{scrape_id}/content resource when a
+    page is large: fetch only the window you need, then continue from
+    next_cursor.
+
+    Args:
+        params (ReadContentInput): Configuration containing:
+            - scrape_id: Scrape ID returned by a scraping tool
+            - offset: Character offset to start from
+            - length: Maximum characters to return
+            - align: Page boundary alignment ("none", "line", "heading")
+
+    Returns:
+        str: JSON object with content, offset, length, total_length and next_cursor
+    """
+    try:
+        _clean_expired_cache()
+        page = _read_content_range(params.scrape_id, params.offset, params.length, params.align)
+        return json.dumps(page, indent=2)
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "scrape_id": params.scrape_id
+        }, indent=2)
+
+
+def _add_scrape_content(item: Dict[str, Any], scrape_id: str, length: int) -> int:
+    """Put the first length characters of a cached scrape into a multi-get item and return the page length."""
+    page = _read_content_range(scrape_id, 0, length, "none")
+    item["content"] = page["content"]
+    if page.get("encoding"):
+        item["encoding"] = page["encoding"]
+    item["next_cursor"] = page["next_cursor"]
+    return page["length"]
+
+
+def _fit_scrape_item(item: Dict[str, Any], scrape_id: str, entry: Dict[str, Any], length: int, room: int) -> str:
+    """
+    Shrink a multi-get item towards room characters and serialize it.
+
+    Content is shortened first (next_cursor continues it), then links and
+    images are cut and metadata is dropped, each recorded under truncated
+    with the resource URI that holds the rest. The item is returned even if
+    it still does not fit, so every call makes progress.
+    """
+    serialized = json.dumps(item)
+    # Scaled by the overshoot, since escaping can make the JSON several
+    # times longer than the content; this settles in a re-read or two
+    while len(serialized) > room and length:
+        length = max(0, length * room // len(serialized) - GET_SCRAPES_SHRINK_SLACK)
+        _add_scrape_content(item, scrape_id, length)
+        serialized = json.dumps(item)
+
+    truncated = {}
+    for field in ("links", "images"):
+        count = len(item.get(field, ()))
+        while len(serialized) > room and count:
+            count = max(0, min(count - 1, count * room // len(serialized)))
+            item[field] = entry[field][:count]
+            truncated[field] = f"scrape://{scrape_id}/{field}/{count}"
+            item["truncated"] = truncated
+            serialized = json.dumps(item)
+    if len(serialized) > room and "metadata" in item:
+        del item["metadata"]
+        truncated["metadata"] = f"scrape://{scrape_id}/metadata"
+        item["truncated"] = truncated
+        serialized = json.dumps(item)
+    return serialized
+
+
+def _scrapes_response(requested: int, results: List[str], missing: List[str], deferred: List[str]) -> str:
+    """Join pre-serialized multi-get items and missing entries into the response object."""
+    return (
+        f'{{"requested": {requested}, "returned": {len(results)}, '
+        f'"results": [{", ".join(results)}], '
+        f'"missing": [{", ".join(missing)}], "deferred": {json.dumps(deferred)}}}'
+    )
+
+
+@mcp.tool(
+    name="webscrape_get_scrapes",
+    annotations={
+        "title": "Get Multiple Cached Scrapes",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True
+    }
+)
+async def get_scrapes(params: GetScrapesInput) -> str:
+    """
+    Fetch many cached scrapes in a single call.
+
+    Replaces one scrape://{scrape_id}/content round-trip per page after a
+    batch scrape or crawl. Each entry is looked up independently, so missing
+    or expired IDs are reported without failing the rest. Items that would
+    push the response past the character limit are listed under deferred
+    for a follow-up call instead of being cut mid-object. The first item is
+    always returned: if it alone exceeds the limit its content is shortened
+    (continue from next_cursor with webscrape_read_content), then its links,
+    images and metadata are cut, with the resource URIs holding the rest
+    listed under truncated.
+
+    Args:
+        params (GetScrapesInput): Configuration containing:
+            - scrape_ids: Scrape IDs to fetch (1-200)
+            - fields: Fields to include per scrape
+            - max_chars_per_item: Optional content limit per scrape
+
+    Returns:
+        str: JSON object with results, missing and deferred scrape IDs
+    """
+    scrape_ids = params.scrape_ids
+    results: List[str] = []
+    missing: List[str] = []
+    deferred: List[str] = []
+
+    # Everything is charged to one budget: the envelope up front, then each
+    # result and missing entry, always leaving room to defer the IDs after it
+    defer_cost = [0] * (len(scrape_ids) + 1)
+    for index in range(len(scrape_ids) - 1, -1, -1):
+        defer_cost[index] = defer_cost[index + 1] + len(json.dumps(scrape_ids[index])) + 2
+    budget = CHARACTER_LIMIT - len(_scrapes_response(len(scrape_ids), [], [], [])) - 2
+
+    for index, scrape_id in enumerate(scrape_ids):
+        room = budget - defer_cost[index + 1] - 2
+        first = not results and not missing
+        try:
+            entry = _get_cache_entry(scrape_id)
+            item: Dict[str, Any] = {"scrape_id": scrape_id}
+
+            if "url" in params.fields:
+                item["url"] = entry["url"]
+            if "metadata" in params.fields:
+                item["metadata"] = entry["metadata"]
+            if "preview" in params.fields:
+                item["preview"] = entry["preview"]
+            if "links" in params.fields:
+                item["links"] = entry["links"]
+            if "images" in params.fields:
+                item["images"] = entry["images"]
+            if "stats" in params.fields:
+                item["stats"] = {
+                    "content_length": entry["content_length"],
+                    "link_count": entry["link_count"],
+                    "image_count": entry["image_count"],
+                    "mime_type": entry["mime_type"]
+                }
+            length = 0
+            if "content" in params.fields:
+                length = _add_scrape_content(item, scrape_id, params.max_chars_per_item or entry["content_length"])
+            serialized = json.dumps(item)
+            if first and len(serialized) > room:
+                serialized = _fit_scrape_item(item, scrape_id, entry, length, room)
+
+        except Exception as e:
+            serialized = json.dumps({"scrape_id": scrape_id, "error": str(e)})
+            if len(serialized) > room and not first:
+                deferred = scrape_ids[index:]
+                break
+            budget -= len(serialized) + 2
+            missing.append(serialized)
+            continue
+
+        if len(serialized) > room and not first:
+            deferred = scrape_ids[index:]
+            break
+        budget -= len(serialized) + 2
+        results.append(serialized)
+
+    return _scrapes_response(len(scrape_ids), results, missing, deferred)
+
+
+@dataclass(frozen=True)
+class ScrapeOptions:
+    """
+    Output options shared by every page of a scrape, batch or WARC replay.
+
+    Validated tool input is converted once per call, so batches do not
+    build and validate a ScrapeUrlInput for each URL.
+    """
+    response_format: ResponseFormat = ResponseFormat.MARKDOWN
+    include_links: bool = False
+    include_images: bool = False
+    include_metadata: bool = True
+
+    @classmethod
+    def from_params(cls, params: BaseModel) -> "ScrapeOptions":
+        """Take the options from a tool input; batch inputs have no link or image options."""
+        return cls(
+            response_format=params.response_format,
+            include_links=getattr(params, "include_links", False),
+            include_images=getattr(params, "include_images", False),
+            include_metadata=params.include_metadata
+        )
+
+
+def _render_scrape(url: str, options: ScrapeOptions, html_content: str, status_code: int) -> Dict[str, Any]:
+    """
+    Convert a fetched page to the requested format, cache it and build the
+    scrape response (resource references and a preview, not the content).
+    """
+    # Parse HTML
+    soup = BeautifulSoup(html_content, 'lxml')
+    
+    # Extract metadata if requested
+    metadata = None
+    if options.include_metadata:
+        metadata = _extract_metadata(soup, url)
+    
+    # Extract links if requested
+    links = None
+    if options.include_links:
+        links = _extract_links(soup, url)
+    
+    # Extract images if requested
+    images = None
+    if options.include_images:
+        images = _extract_images(soup, url)
+    
+    # Format response based on requested format
+    if options.response_format == ResponseFormat.JSON:
+        full_content = json.dumps({
+            "url": url,
+            "status_code": status_code,
+            "content": _html_to_text(soup),
+            "metadata": metadata if metadata else {},
+            "links": links if links else [],
+            "images": images if images else []
+        }, indent=2)
+
+    elif options.response_format == ResponseFormat.MARKDOWN:
+        # Convert to markdown
+        markdown_content = _html_to_markdown(html_content, url)
+
+        result_parts = []
+
+        if metadata:
+            result_parts.append(f"# {metadata.get('title', 'Untitled Page')}\n")
+            if metadata.get('description'):
+                result_parts.append(f"**Description:** {metadata['description']}\n")
+            result_parts.append(f"**URL:** {url}\n")
+            result_parts.append("---\n")
+
+        result_parts.append(markdown_content)
+
+        if links:
+            result_parts.append(f"\n\n## Found Links ({len(links)})\n")
+            for link in links[:50]:  # Limit to first 50
+                result_parts.append(f"- {link}\n")
+            if len(links) > 50:
+                result_parts.append(f"... and {len(links) - 50} more links\n")
+
+        if images:
+            result_parts.append(f"\n\n## Found Images ({len(images)})\n")
+            for img in images[:20]:  # Limit to first 20
+                result_parts.append(f"- {img}\n")
+            if len(images) > 20:
+                result_parts.append(f"... and {len(images) - 20} more images\n")
+
+        full_content = "".join(result_parts)
+
+    elif options.response_format == ResponseFormat.TEXT:
+        full_content = _html_to_text(soup)
+
+    else:  # HTML
+        full_content = html_content
+
+    # Generate unique scrape ID
+    scrape_id = _generate_scrape_id(url, options.response_format.value)
+
+    # Store in cache
+    _store_in_cache(
+        scrape_id=scrape_id,
+        url=url,
+        content=full_content,
+        metadata=metadata or {},
+        links=links,
+        images=images
+    )
+
+    # Create preview
+    preview = full_content[:PREVIEW_LENGTH]
+    if len(full_content) > PREVIEW_LENGTH:
+        preview += "..."
+
+    # Return resource reference (NOT full content)
+    response = {
+        "success": True,
+        "scrape_id": scrape_id,
+        "url": url,
+        "resource_uri": f"scrape://{scrape_id}/content",
+        "metadata_uri": f"scrape://{scrape_id}/metadata",
+        "preview": preview,
+        "content_length": len(full_content),
+        "format": options.response_format.value,
+        "status_code": status_code,
+        "scraped_at": datetime.utcnow().isoformat() + "Z",
+        "expires_at": (datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)).isoformat() + "Z",
+        "stats": {
+            "total_links": len(links) if links else 0,
+            "total_images": len(images) if images else 0,
+            "has_metadata": bool(metadata)
         }
     }
 
-    query_lower = query.lower()
-    matching_tools = []
+    return response
 
-    for tool_id, tool_info in tools.items():
-        # Check if query matches name, description, or keywords
-        if (query_lower in tool_info["name"].lower() or
-            query_lower in tool_info["description"].lower() or
-            any(query_lower in keyword for keyword in tool_info.get("keywords", []))):
 
-            # Apply category filter if specified
-            if category is None or tool_info.get("category") == category:
-                matching_tools.append({
-                    "name": tool_info["name"],
-                    "description": tool_info["description"],
-                    "category": tool_info["category"]
-                })
+async def _scrape_result(
+    url: str,
+    options: ScrapeOptions,
+    client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """
+    Fetch and render one page, turning failures into an error response.
+
+    This is the scrape core shared by the single, batch and bulk tools. It
+    returns the response as a dict; callers serialize once, at the edge.
+    """
+    try:
+        html_content, status_code, headers = await _fetch_url(url, client=client)
+        return _render_scrape(url, options, html_content, status_code)
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "url": url
+        }
+
+
+async def _scrape_within(
+    url: str,
+    options: ScrapeOptions,
+    client: httpx.AsyncClient,
+    timeout: Optional[float]
+) -> Dict[str, Any]:
+    """Run _scrape_result, giving up after timeout seconds (if set) with a "timed_out" response."""
+    if timeout is None:
+        return await _scrape_result(url, options, client)
+    try:
+        return await asyncio.wait_for(_scrape_result(url, options, client), timeout)
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "status": "timed_out",
+            "error": f"No result within the per-URL deadline of {timeout}s",
+            "url": url
+        }
+
+
+@mcp.tool(
+    name="webscrape_scrape_url",
+    annotations={
+        "title": "Scrape URL",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": True
+    }
+)
+async def scrape_url(params: ScrapeUrlInput) -> str:
+    """
+    Scrape content from a single URL and return it in the specified format.
+    
+    This tool fetches a web page and extracts its content. It supports multiple
+    output formats and can optionally include links, images, and metadata.
+    
+    Best for:
+    - Extracting article content
+    - Getting page information
+    - Converting web pages to markdown
+    - Scraping static websites
+    
+    Args:
+        params (ScrapeUrlInput): Configuration for scraping containing:
+            - url: The web page URL to scrape
+            - response_format: Output format (markdown, html, text, or json)
+            - include_links: Whether to extract all links
+            - include_images: Whether to extract image URLs
+            - include_metadata: Whether to include page metadata
+    
+    Returns:
+        str: Scraped content in the requested format, or error message if scraping fails
+    """
+    return json.dumps(await _scrape_result(params.url, ScrapeOptions.from_params(params)), indent=2)
+
+
+@mcp.tool(
+    name="webscrape_scrape_multiple_urls",
+    annotations={
+        "title": "Scrape Multiple URLs",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": True
+    }
+)
+async def scrape_multiple_urls(params: ScrapeMultipleUrlsInput, ctx: Optional[Context] = None) -> str:
+    """
+    Scrape content from multiple URLs concurrently.
+    
+    This tool efficiently scrapes multiple web pages at once, making it ideal
+    for batch operations. Maximum 20 URLs per request.
+
+    Each result is appended to the batch's results resource
+    (batch://{batch_id}/results/{cursor}) and announced as an MCP progress
+    notification as soon as it finishes, so one slow URL does not hold up
+    the others. With deadline_seconds, the tool returns when the deadline
+    passes and marks unfinished URLs "pending"; with url_timeout_seconds,
+    a URL that takes longer is marked "timed_out". The response lists
+    results in input order.
+
+    URLs are started origin by origin in turn, with at most per_host_limit
+    in flight to each, so requests to one site reuse its pooled
+    connections; "connections" reports requests made against connections
+    opened.
+    
+    Best for:
+    - Scraping multiple pages from a sitemap
+    - Batch processing article URLs
+    - Comparing content across pages
+    
+    Args:
+        params (ScrapeMultipleUrlsInput): Configuration containing:
+            - urls: List of URLs to scrape (1-20 URLs)
+            - response_format: Output format for all pages
+            - include_metadata: Whether to include page metadata
+            - warc: Archive raw requests and responses to a WARC file
+            - deadline_seconds: Optional overall time limit
+            - url_timeout_seconds: Optional time limit per URL
+            - per_host_limit: Maximum URLs in flight to one origin
+            - http2: Multiplex requests over HTTP/2 where the origin supports it
+        ctx: MCP request context used for progress notifications
+    
+    Returns:
+        str: JSON array of scrape results, or error details for failed URLs
+    """
+    try:
+        _clean_expired_cache()
+        options = ScrapeOptions.from_params(params)
+        log = _register_result_log("batch")
+        warc = _open_warc(params.warc, log.run_id)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(params.urls)
+        connections = ConnectionStats()
+        started = time.monotonic()
+        first_result_seconds = None
+        deadline_hit = False
+        try:
+            # One client for the batch, so pages share its connection pool (and WARC)
+            async with _create_http_client(warc=warc, http2=params.http2) as client:
+                connections.attach(client)
+                scheduler = HostScheduler(enumerate(params.urls), params.per_host_limit, len(params.urls))
+                tasks: Dict[asyncio.Task, tuple[int, str]] = {}
+                try:
+                    # Start URLs origin by origin as slots free up and collect results in
+                    # completion order until all finish or the deadline passes
+                    while True:
+                        while (item := scheduler.next()) is not None:
+                            index, url, origin = item
+                            tasks[asyncio.create_task(
+                                _scrape_within(url, options, client, params.url_timeout_seconds)
+                            )] = (index, origin)
+                        if not tasks:
+                            break
+                        timeout = None
+                        if params.deadline_seconds is not None:
+                            timeout = started + params.deadline_seconds - time.monotonic()
+                            if timeout <= 0:
+                                deadline_hit = True
+                                break
+                        done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            index, origin = tasks.pop(task)
+                            scheduler.release(origin)
+                            result = task.result()
+                            result["index"] = index
+                            results[index] = result
+                            log.append(result)
+                            if first_result_seconds is None:
+                                first_result_seconds = round(time.monotonic() - started, 3)
+                            if ctx is not None:
+                                await ctx.report_progress(
+                                    log.count,
+                                    len(params.urls),
+                                    json.dumps({k: result.get(k) for k in ("index", "url", "scrape_id", "status_code", "error")})
+                                )
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            if warc is not None:
+                warc.close()
+            _finish_result_log(log, {"total_urls": len(params.urls), "finished": log.count})
+
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = {
+                    "success": False,
+                    "status": "pending",
+                    "error": f"Not finished within the batch deadline of {params.deadline_seconds}s",
+                    "url": params.urls[index],
+                    "index": index
+                }
+        
+        # Format results
+        output = {
+            "total_urls": len(params.urls),
+            "batch_id": log.run_id,
+            "results_uri": f"batch://{log.run_id}/results/0",
+            "scraped_at": datetime.utcnow().isoformat() + "Z",
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+            "first_result_seconds": first_result_seconds,
+            "finished": log.count,
+            "timed_out": sum(1 for result in results if result.get("status") == "timed_out"),
+            "pending": len(params.urls) - log.count,
+            "deadline_hit": deadline_hit,
+            "connections": connections.summary(),
+            "results": results
+        }
+        if warc is not None:
+            output["warc_id"] = warc.warc_id
+            output["warc_records"] = warc.records
+        
+        content = json.dumps(output, indent=2)
+        
+        # Truncate if necessary
+        content, was_truncated = _truncate_response(content, "json")
+        
+        if was_truncated:
+            content += "\n\n⚠️ Response truncated. Read every result from results_uri, or scrape fewer URLs."
+        
+        return content
+        
+    except Exception as e:
+        return f"Error in batch scraping: {str(e)}"
+
+
+@mcp.tool(
+    name="webscrape_crawl_site",
+    annotations={
+        "title": "Crawl Website",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": True
+    }
+)
+async def crawl_site(params: CrawlSiteInput, ctx: Optional[Context] = None) -> str:
+    """
+    Recursively crawl a website starting from a given URL.
+    
+    This tool discovers and scrapes pages by following links, respecting
+    depth and page limits. Perfect for exploring website structure or
+    scraping multiple related pages.
+
+    Every page result is appended to the crawl's results resource
+    (crawl://{crawl_id}/results/{cursor}) and announced as an MCP progress
+    notification as soon as it is ready, so clients can consume a large
+    crawl while it runs. The response inlines as many results as fit under
+    the character limit; the rest are read from the results resource.
+    
+    Best for:
+    - Discovering all pages in a section
+    - Scraping documentation sites
+    - Building sitemaps
+    - Content auditing
+    
+    Args:
+        params (CrawlSiteInput): Configuration containing:
+            - url: Starting URL to crawl from
+            - max_depth: How many link levels to follow (0-20)
+            - max_pages: Maximum pages to crawl (1-50000)
+            - same_domain_only: Only crawl URLs from the same domain
+            - response_format: Output format for crawled pages
+            - concurrency: Number of pages fetched in parallel (1-20)
+            - per_host_limit: Maximum pages fetched from one origin at once (default: concurrency)
+            - dedup_filter: Seen-URL filter ("exact" or "bloom")
+            - bloom_false_positive_rate: Target Bloom filter false-positive rate
+            - discovery: "links", "sitemap" (seed from sitemaps, follow no links) or "both"
+            - sitemap_modified_since: Optional ISO lastmod cutoff for sitemap seeds
+        ctx: MCP request context used for progress notifications
+    
+    Returns:
+        str: JSON object with crawl summary, results resource URI and inlined page results
+    """
+    try:
+        _clean_expired_cache()
+        log = _register_result_log("crawl")
+        checkpoint = _open_checkpoint(log.run_id, params)
+        frontier = _create_frontier(params)
+        _attach_trap_log(log, frontier)
+        graph = _attach_link_graph(log, params)
+        warc = _open_warc(params.warc, log.run_id)
+        inline_results = []
+        inline_budget = CHARACTER_LIMIT  # Collect up to this much; _dump_inlined trims to the exact limit
+
+        async def on_result(result):
+            nonlocal inline_budget
+            log.append(result)
+
+            size = len(json.dumps(result, indent=2))
+            if size <= inline_budget and len(inline_results) == log.count - 1:
+                inline_results.append(result)
+                inline_budget -= size
+
+            if ctx is not None:
+                await ctx.report_progress(
+                    log.count,
+                    params.max_pages,
+                    json.dumps({k: result.get(k) for k in ("url", "depth", "scrape_id", "status_code", "error")})
+                )
+
+        pages_crawled, frontier_stats = 0, {}
+        try:
+            pages_crawled, frontier_stats = await _run_crawl(params, on_result, frontier, checkpoint, graph=graph, warc=warc)
+            checkpoint.record("end")
+        finally:
+            checkpoint.close()
+            if warc is not None:
+                warc.close()
+            _finish_result_log(log, {
+                "start_url": params.url,
+                "pages_crawled": log.count,
+                "frontier_stats": frontier_stats
+            })
+
+        output = {
+            "start_url": params.url,
+            "crawl_id": log.run_id,
+            "results_uri": f"crawl://{log.run_id}/results/0",
+            "traps_uri": f"crawl://{log.run_id}/traps/0" if params.trap_detection else None,
+            "graph_uri": f"crawl://{log.run_id}/graph" if graph is not None else None,
+            "warc_id": warc.warc_id if warc is not None else None,
+            "pages_crawled": pages_crawled,
+            "max_depth": params.max_depth,
+            "max_pages": params.max_pages,
+            "concurrency": params.concurrency,
+            "frontier_stats": frontier_stats,
+            "crawled_at": datetime.utcnow().isoformat() + "Z",
+            "results_inlined": len(inline_results),
+            "results": inline_results
+        }
+
+        return _dump_inlined(output, "results", "results_inlined", log.count, "page results", "results_uri")
+        
+    except Exception as e:
+        return f"Error crawling {params.url}: {str(e)}"
+
+
+@mcp.tool(
+    name="webscrape_discover_sitemap",
+    annotations={
+        "title": "Discover URLs from Sitemaps",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": True
+    }
+)
+async def discover_sitemap(params: DiscoverSitemapInput) -> str:
+    """
+    List a site's URLs from its sitemaps without crawling any pages.
+
+    Sitemaps are found through robots.txt Sitemap: lines or well-known
+    paths such as /sitemap.xml. Plain and gzipped sitemaps and nested
+    sitemap indexes are parsed incrementally, so very large sitemaps are
+    handled in constant memory.
+
+    Best for:
+    - Enumerating every page of a site cheaply
+    - Finding pages changed since a date (via modified_since)
+    - Picking URLs for webscrape_scrape_multiple_urls
+
+    Args:
+        params (DiscoverSitemapInput): Configuration containing:
+            - url: Site URL or direct sitemap URL
+            - modified_since: Optional ISO date/time lastmod cutoff
+            - max_urls: Maximum URLs to return (1-50000)
+            - same_domain_only: Only return URLs on the site's domain
+
+    Returns:
+        str: JSON object with sitemaps read, URL count, urls_uri and inlined URLs
+    """
+    try:
+        _clean_expired_cache()
+        log = _register_result_log("discovery")
+        stats: Dict[str, Any] = {}
+        inline_urls = []
+        inline_budget = CHARACTER_LIMIT  # Collect up to this much; _dump_inlined trims to the exact limit
+
+        try:
+            async with _create_http_client() as client:
+                sitemap_urls = _iter_sitemap_urls(
+                    client, params.url, params.modified_since, params.same_domain_only, stats
+                )
+                async with aclosing(sitemap_urls):
+                    async for loc, lastmod, priority in sitemap_urls:
+                        entry = {"url": loc, "lastmod": lastmod, "priority": priority}
+                        log.append(entry)
+                        size = len(json.dumps(entry, indent=2))
+                        if size <= inline_budget and len(inline_urls) == log.count - 1:
+                            inline_urls.append(entry)
+                            inline_budget -= size
+                        if log.count >= params.max_urls:
+                            break
+        finally:
+            _finish_result_log(log, {"url": params.url, "urls_found": log.count})
+
+        output = {
+            "url": params.url,
+            "discovery_id": log.run_id,
+            "urls_uri": f"sitemap://{log.run_id}/urls/0",
+            "sitemaps_read": stats.get("sitemaps", [])[:SITEMAPS_LISTED_LIMIT],
+            "sitemap_count": len(stats.get("sitemaps", [])),
+            "urls_found": log.count,
+            "skipped_by_lastmod": stats.get("skipped_by_lastmod", 0),
+            "error_count": len(stats.get("sitemap_errors", [])),
+            "errors": stats.get("sitemap_errors", [])[:SITEMAP_ERRORS_LIMIT],
+            "urls_inlined": len(inline_urls),
+            "urls": inline_urls
+        }
+        if not stats.get("sitemaps"):
+            output["note"] = "No sitemap found via robots.txt or well-known paths. Use webscrape_crawl_site to discover pages by links."
+
+        return _dump_inlined(output, "urls", "urls_inlined", log.count, "URLs", "urls_uri")
+
+    except Exception as e:
+        return f"Error discovering sitemaps for {params.url}: {str(e)}"
+
+
+@mcp.tool(
+    name="webscrape_start_crawl_job",
+    annotations={
+        "title": "Start Background Crawl Job",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": True
+    }
+)
+async def start_crawl_job(params: StartCrawlJobInput) -> str:
+    """
+    Start a website crawl in the background and return a job ID immediately.
+
+    Use this instead of webscrape_crawl_site for crawls that may outlast the
+    client's tool-call timeout. Poll webscrape_get_job_status for progress,
+    read results from the job's results resource while it runs, and stop it
+    early with webscrape_cancel_job.
+
+    With workers above 1 the crawl runs in that many processes sharing a
+    SQLite frontier. Such jobs cannot be resumed and do not support
+    near-duplicate detection, incremental crawls or WARC archiving.
+
+    Args:
+        params (StartCrawlJobInput): Same fields as webscrape_crawl_site, plus:
+            - max_memory_mb: Stop once the job's cached page content exceeds this many MB (UTF-8)
+            - workers: Number of crawl processes
+            - lease_seconds: How long a distributed worker holds a URL before it is retried
+
+    Returns:
+        str: JSON object with job_id, status and results_uri
+    """
+    try:
+        _clean_expired_cache()
+        _check_job_slots()
+
+        if params.workers > 1:
+            unsupported = [
+                name for name, enabled in (
+                    ("near_duplicates", params.near_duplicates != "off"),
+                    ("incremental", params.incremental),
+                    ("warc", params.warc)
+                ) if enabled
+            ]
+            if unsupported:
+                raise Exception(f"Distributed crawls (workers > 1) do not support: {', '.join(unsupported)}")
+            log = _register_result_log("crawl")
+            frontier = SharedFrontier(SharedFrontier.path_for(log.run_id), params, params.lease_seconds)
+            _attach_trap_log(log, frontier)
+            _launch_crawl_job(params, log, None, frontier, graph=_attach_link_graph(log, params))
+            return json.dumps({
+                "success": True,
+                "job_id": log.run_id,
+                "status": "running",
+                "workers": params.workers,
+                "results_uri": f"crawl://{log.run_id}/results/0",
+                "note": "Poll webscrape_get_job_status for progress; results stream to results_uri."
+            }, indent=2)
 
-    return json.dumps(matching_tools, indent=2)
+        log = _register_result_log("crawl")
+        checkpoint = _open_checkpoint(log.run_id, params)
+        frontier = _create_frontier(params)
+        _attach_trap_log(log, frontier)
+        _launch_crawl_job(
+            params, log, checkpoint, frontier,
+            graph=_attach_link_graph(log, params), warc=_open_warc(params.warc, log.run_id)
+        )
 
+        return json.dumps({
+            "success": True,
+            "job_id": log.run_id,
+            "status": "running",
+            "results_uri": f"crawl://{log.run_id}/results/0",
+            "note": "Poll webscrape_get_job_status for progress; results stream to results_uri."
+        }, indent=2)
 
-# ============================================================================
-# Resource Access Endpoints (Progressive Disclosure)
-# ============================================================================
+    except Exception as e:
+        return f"Error starting crawl job for {params.url}: {str(e)}"
 
-@mcp.resource("scrape://{scrape_id}/content")
-async def get_scrape_content(scrape_id: str) -> str:
+
+@mcp.tool(
+    name="webscrape_start_batch_job",
+    annotations={
+        "title": "Start Background Batch Scrape",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": True
+    }
+)
+async def start_batch_job(params: StartBatchJobInput) -> str:
     """
-    Retrieve full scraped content by ID.
+    Scrape a large list of URLs in the background and return a job ID immediately.
 
-    This resource endpoint enables the progressive disclosure pattern - tools return
-    resource URIs instead of full content, then agents can fetch the content only
-    when needed.
+    Use this instead of webscrape_scrape_multiple_urls for more than 20 URLs.
+    URLs come from a list, a local file or a resource, and are fetched with
+    bounded concurrency through one shared HTTP client. Each page is cached
+    as it completes and its result appended to the job's results resource;
+    webscrape_get_job_status reports throughput and error counts by type.
 
     Args:
-        scrape_id: Unique identifier from a scrape operation
+        params (StartBatchJobInput): Configuration containing:
+            - urls, url_file or source_uri: Where the URLs come from (exactly one)
+            - response_format: Output format for all pages
+            - include_metadata: Whether to include page metadata
+            - concurrency: Maximum parallel fetches
+            - max_memory_mb: Stop once the job's cached page content exceeds this many MB (UTF-8)
+            - warc: Archive raw requests and responses to a WARC file
+            - per_host_limit: Maximum URLs in flight to one origin
+            - http2: Multiplex requests over HTTP/2 where the origin supports it
 
     Returns:
-        Full scraped content
-
-    Raises:
-        Exception: If scrape ID not found or expired
+        str: JSON object with job_id, status and results_uri
     """
-    # Clean expired cache entries
-    _clean_expired_cache()
-
-    if scrape_id not in SCRAPE_CACHE:
-        raise Exception(
-            f"Scrape ID '{scrape_id}' not found in cache. "
-            f"It may have expired (TTL: {CACHE_TTL_SECONDS}s) or never existed. "
-            f"Please perform the scrape operation again."
-        )
+    try:
+        _clean_expired_cache()
+        _check_job_slots()
 
-    entry = SCRAPE_CACHE[scrape_id]
+        urls = _open_batch_source(params)
+        log = _register_result_log("batch")
+        _launch_batch_job(params, log, urls, _open_warc(params.warc, log.run_id))
 
-    # Check if expired
-    if datetime.utcnow() > entry["expires_at"]:
-        del SCRAPE_CACHE[scrape_id]
-        raise Exception(
-            f"Scrape ID '{scrape_id}' has expired. "
-            f"Cache TTL is {CACHE_TTL_SECONDS} seconds. "
-            f"Please scrape the URL again."
-        )
+        return json.dumps({
+            "success": True,
+            "job_id": log.run_id,
+            "status": "running",
+            "results_uri": f"batch://{log.run_id}/results/0",
+            "note": "Poll webscrape_get_job_status for throughput and errors; results stream to results_uri in completion order."
+        }, indent=2)
 
-    return entry["content"]
+    except Exception as e:
+        return f"Error starting batch job: {str(e)}"
 
 
-@mcp.resource("scrape://{scrape_id}/metadata")
-async def get_scrape_metadata(scrape_id: str) -> str:
+@mcp.tool(
+    name="webscrape_get_job_status",
+    annotations={
+        "title": "Get Crawl Job Status",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True
+    }
+)
+async def get_job_status(params: JobIdInput) -> str:
     """
-    Retrieve metadata for a scrape without the full content.
+    Report the status and progress counters of a background crawl or batch job.
 
-    Useful for getting information about a scrape (URL, links, images, stats)
-    without loading the entire content payload.
+    Batch jobs also report throughput (overall and over the last few
+    seconds) and their errors counted by type.
 
     Args:
-        scrape_id: Unique identifier from a scrape operation
+        params (JobIdInput): Configuration containing:
+            - job_id: Job ID returned by webscrape_start_crawl_job or webscrape_start_batch_job
 
     Returns:
-        JSON string with metadata
-
-    Raises:
-        Exception: If scrape ID not found or expired
+        str: JSON object with status ("running", "completed", "stopped",
+            "cancelled" or "failed"), progress counters and results_uri
     """
-    # Clean expired cache entries
-    _clean_expired_cache()
+    try:
+        _clean_expired_cache()
+        return json.dumps(_job_status(_get_job(params.job_id)), indent=2)
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "job_id": params.job_id
+        }, indent=2)
 
-    if scrape_id not in SCRAPE_CACHE:
-        raise Exception(f"Scrape ID '{scrape_id}' not found in cache")
 
-    entry = SCRAPE_CACHE[scrape_id]
+@mcp.tool(
+    name="webscrape_cancel_job",
+    annotations={
+        "title": "Cancel Crawl Job",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True
+    }
+)
+async def cancel_job(params: JobIdInput) -> str:
+    """
+    Cancel a running background crawl or batch job.
 
-    # Check if expired
-    if datetime.utcnow() > entry["expires_at"]:
-        del SCRAPE_CACHE[scrape_id]
-        raise Exception(f"Scrape ID '{scrape_id}' has expired")
+    Results written before cancellation stay readable from the job's
+    results resource. Cancelling a finished job has no effect.
 
-    metadata_response = {
-        "scrape_id": scrape_id,
-        "url": entry["url"],
-        "metadata": entry["metadata"],
-        "links": entry["links"],
-        "images": entry["images"],
-        "link_count": len(entry["links"]),
-        "image_count": len(entry["images"]),
-        "content_length": len(entry["content"]),
-        "created_at": entry["created_at"].isoformat() + "Z",
-        "expires_at": entry["expires_at"].isoformat() + "Z"
-    }
+    Args:
+        params (JobIdInput): Configuration containing:
+            - job_id: Job ID returned by webscrape_start_crawl_job or webscrape_start_batch_job
 
-    return json.dumps(metadata_response, indent=2)
+    Returns:
+        str: JSON object with the job's final status
+    """
+    try:
+        job = _get_job(params.job_id)
+        task = job["task"]
+        if not task.done():
+            task.cancel()
+            await asyncio.wait([task], timeout=JOB_CANCEL_WAIT_SECONDS)
+        return json.dumps(_job_status(job), indent=2)
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "job_id": params.job_id
+        }, indent=2)
 
 
 @mcp.tool(
-    name="webscrape_scrape_url",
+    name="webscrape_resume_crawl",
     annotations={
-        "title": "Scrape URL",
+        "title": "Resume Interrupted Crawl",
         "readOnlyHint": True,
         "destructiveHint": False,
-        "idempotentHint": True,
+        "idempotentHint": False,
         "openWorldHint": True
     }
 )
-async def scrape_url(params: ScrapeUrlInput) -> str:
+async def resume_crawl(params: ResumeCrawlInput) -> str:
     """
-    Scrape content from a single URL and return it in the specified format.
-    
-    This tool fetches a web page and extracts its content. It supports multiple
-    output formats and can optionally include links, images, and metadata.
-    
-    Best for:
-    - Extracting article content
-    - Getting page information
-    - Converting web pages to markdown
-    - Scraping static websites
-    
+    Resume an interrupted crawl or crawl job from its on-disk checkpoint.
+
+    Works after a failure, a cancellation or a server restart. The crawl
+    continues as a background job under the same ID: pages that were
+    already completed are not fetched again, and new results are appended
+    to the same results resource.
+
     Args:
-        params (ScrapeUrlInput): Configuration for scraping containing:
-            - url: The web page URL to scrape
-            - response_format: Output format (markdown, html, text, or json)
-            - include_links: Whether to extract all links
-            - include_images: Whether to extract image URLs
-            - include_metadata: Whether to include page metadata
-    
+        params (ResumeCrawlInput): Configuration containing:
+            - crawl_id: crawl_id or job_id of the interrupted crawl
+
     Returns:
-        str: Scraped content in the requested format, or error message if scraping fails
+        str: JSON object with job_id, status, pages already completed and results_uri
     """
     try:
-        # Fetch the page
-        html_content, status_code, headers = await _fetch_url(params.url)
-        
-        # Parse HTML
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # Extract metadata if requested
-        metadata = None
-        if params.include_metadata:
-            metadata = _extract_metadata(soup, params.url)
-        
-        # Extract links if requested
-        links = None
-        if params.include_links:
-            links = _extract_links(soup, params.url)
-        
-        # Extract images if requested
-        images = None
-        if params.include_images:
-            images = _extract_images(soup, params.url)
-        
-        # Format response based on requested format
-        if params.response_format == ResponseFormat.JSON:
-            full_content = json.dumps({
-                "url": params.url,
-                "status_code": status_code,
-                "content": _html_to_text(soup),
-                "metadata": metadata if metadata else {},
-                "links": links if links else [],
-                "images": images if images else []
-            }, indent=2)
-
-        elif params.response_format == ResponseFormat.MARKDOWN:
-            # Convert to markdown
-            markdown_content = _html_to_markdown(html_content, params.url)
-
-            result_parts = []
-
-            if metadata:
-                result_parts.append(f"# {metadata.get('title', 'Untitled Page')}\n")
-                if metadata.get('description'):
-                    result_parts.append(f"**Description:** {metadata['description']}\n")
-                result_parts.append(f"**URL:** {params.url}\n")
-                result_parts.append("---\n")
-
-            result_parts.append(markdown_content)
-
-            if links:
-                result_parts.append(f"\n\n## Found Links ({len(links)})\n")
-                for link in links[:50]:  # Limit to first 50
-                    result_parts.append(f"- {link}\n")
-                if len(links) > 50:
-                    result_parts.append(f"... and {len(links) - 50} more links\n")
-
-            if images:
-                result_parts.append(f"\n\n## Found Images ({len(images)})\n")
-                for img in images[:20]:  # Limit to first 20
-                    result_parts.append(f"- {img}\n")
-                if len(images) > 20:
-                    result_parts.append(f"... and {len(images) - 20} more images\n")
-
-            full_content = "".join(result_parts)
-
-        elif params.response_format == ResponseFormat.TEXT:
-            full_content = _html_to_text(soup)
-
-        else:  # HTML
-            full_content = html_content
-
-        # Generate unique scrape ID
-        scrape_id = _generate_scrape_id(params.url, params.response_format.value)
-
-        # Store in cache
-        _store_in_cache(
-            scrape_id=scrape_id,
-            url=params.url,
-            content=full_content,
-            metadata=metadata or {},
-            links=links,
-            images=images
+        _clean_expired_cache()
+        job = JOBS.get(params.crawl_id)
+        if job is not None and job["status"] == "running":
+            raise Exception(f"Crawl '{params.crawl_id}' is still running.")
+        _check_job_slots()
+
+        state = CrawlCheckpoint.load(params.crawl_id)
+        if state["finished"]:
+            raise Exception(f"Crawl '{params.crawl_id}' already completed; nothing to resume.")
+
+        crawl_params = StartCrawlJobInput(**state["params"])
+        frontier = _create_frontier(crawl_params)
+        frontier.restore(state["enqueued"], state["done_urls"])
+
+        log = _register_result_log("crawl", params.crawl_id)
+        log.rewind(len(state["done_urls"]))
+        _attach_trap_log(log, frontier, resume=True)
+        graph = _attach_link_graph(log, crawl_params)
+        if graph is not None:
+            graph.resumed_after = len(state["done_urls"])
+        duplicate_index = None
+        if crawl_params.near_duplicates != "off":
+            duplicate_index = _rebuild_simhash_index(log, crawl_params)
+        _launch_crawl_job(
+            crawl_params, log, CrawlCheckpoint(params.crawl_id, state["started_at"]), frontier, duplicate_index, graph,
+            _open_warc(crawl_params.warc, params.crawl_id)
         )
 
-        # Create preview
-        preview = full_content[:PREVIEW_LENGTH]
-        if len(full_content) > PREVIEW_LENGTH:
-            preview += "..."
-
-        # Return resource reference (NOT full content)
-        response = {
+        return json.dumps({
             "success": True,
-            "scrape_id": scrape_id,
-            "url": params.url,
-            "resource_uri": f"scrape://{scrape_id}/content",
-            "metadata_uri": f"scrape://{scrape_id}/metadata",
-            "preview": preview,
-            "content_length": len(full_content),
-            "format": params.response_format.value,
-            "status_code": status_code,
-            "scraped_at": datetime.utcnow().isoformat() + "Z",
-            "expires_at": (datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)).isoformat() + "Z",
-            "stats": {
-                "total_links": len(links) if links else 0,
-                "total_images": len(images) if images else 0,
-                "has_metadata": bool(metadata)
-            }
-        }
+            "job_id": params.crawl_id,
+            "status": "running",
+            "pages_completed": len(state["done_urls"]),
+            "frontier_size": len(frontier),
+            "results_uri": f"crawl://{params.crawl_id}/results/0",
+            "note": "Poll webscrape_get_job_status for progress; results stream to results_uri."
+        }, indent=2)
 
-        return json.dumps(response, indent=2)
-        
     except Exception as e:
         return json.dumps({
             "success": False,
             "error": str(e),
-            "url": params.url
+            "crawl_id": params.crawl_id
         }, indent=2)
 
 
 @mcp.tool(
-    name="webscrape_scrape_multiple_urls",
+    name="webscrape_export_results",
     annotations={
-        "title": "Scrape Multiple URLs",
-        "readOnlyHint": True,
+        "title": "Export Crawl Results to a File",
+        "readOnlyHint": False,
         "destructiveHint": False,
         "idempotentHint": True,
-        "openWorldHint": True
+        "openWorldHint": False
     }
 )
-async def scrape_multiple_urls(params: ScrapeMultipleUrlsInput) -> str:
+async def export_results(params: ExportResultsInput) -> str:
     """
-    Scrape content from multiple URLs concurrently.
-    
-    This tool efficiently scrapes multiple web pages at once, making it ideal
-    for batch operations. Maximum 20 URLs per request.
-    
+    Export every page of a crawl, crawl job or batch job to a local JSONL or Parquet file.
+
+    Each row holds url, depth, status_code, title, scrape_id, error, metadata
+    and (optionally) the full cached content. Pages are streamed from the
+    crawl's result log and written incrementally, so memory does not grow
+    with crawl size. A running crawl exports the pages completed so far.
+
     Best for:
-    - Scraping multiple pages from a sitemap
-    - Batch processing article URLs
-    - Comparing content across pages
-    
+    - Feeding crawl output into offline indexing pipelines
+    - Avoiding one scrape:// read per page
+
     Args:
-        params (ScrapeMultipleUrlsInput): Configuration containing:
-            - urls: List of URLs to scrape (1-20 URLs)
-            - response_format: Output format for all pages
-            - include_metadata: Whether to include page metadata
-    
+        params (ExportResultsInput): Configuration containing:
+            - crawl_id: crawl_id, or job_id of a crawl or batch job, to export
+            - format: "jsonl" or "parquet" (requires pyarrow)
+            - compression: "none", "gzip", "snappy" or "zstd" (JSONL: none/gzip)
+            - include_content: Include full page content
+            - filename: Optional file name inside the export directory
+
     Returns:
-        str: JSON array of scrape results, or error details for failed URLs
+        str: JSON object with the file path, rows written and file size
     """
     try:
-        # Create scrape tasks for all URLs
-        tasks = []
-        for url in params.urls:
-            scrape_params = ScrapeUrlInput(
-                url=url,
-                response_format=params.response_format,
-                include_links=False,
-                include_images=False,
-                include_metadata=params.include_metadata
+        run = RESULT_LOGS.get(params.crawl_id)
+        if run is None or run["kind"] not in ("crawl", "batch"):
+            raise Exception(
+                f"Crawl ID '{params.crawl_id}' not found. "
+                f"Results are kept for {CACHE_TTL_SECONDS}s after the run finishes."
             )
-            tasks.append(scrape_url(scrape_params))
-        
-        # Execute all scrapes concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Format results
+        complete = run["log"].complete
+        export = await asyncio.to_thread(_export_result_log, run["log"], params)
+
         output = {
-            "total_urls": len(params.urls),
-            "scraped_at": datetime.utcnow().isoformat() + "Z",
-            "results": []
+            "success": True,
+            "crawl_id": params.crawl_id,
+            "format": params.format,
+            "compression": params.compression,
+            **export,
+            "complete": complete
         }
-        
-        for url, result in zip(params.urls, results):
-            if isinstance(result, Exception):
-                output["results"].append({
-                    "url": url,
-                    "success": False,
-                    "error": str(result)
-                })
-            else:
-                # result is already a JSON string with resource URIs from scrape_url
-                try:
-                    result_data = json.loads(result)
-                    output["results"].append(result_data)
-                except:
-                    # Fallback if result isn't JSON
-                    output["results"].append({
-                        "url": url,
-                        "success": True,
-                        "content": result
-                    })
-        
-        content = json.dumps(output, indent=2)
-        
-        # Truncate if necessary
-        content, was_truncated = _truncate_response(content, "json")
-        
-        if was_truncated:
-            content += "\n\n⚠️ Response truncated. Consider scraping fewer URLs or use pagination."
-        
-        return content
-        
+        if not complete:
+            output["note"] = "Crawl is still running; the export contains the pages completed so far."
+        if export["content_missing"]:
+            output["content_note"] = (
+                f"{export['content_missing']} pages had expired from the cache and were exported without "
+                "metadata or content."
+            )
+        return json.dumps(output, indent=2)
+
     except Exception as e:
-        return f"Error in batch scraping: {str(e)}"
+        return f"Error exporting crawl {params.crawl_id}: {str(e)}"
 
 
 @mcp.tool(
-    name="webscrape_crawl_site",
+    name="webscrape_replay_warc",
     annotations={
-        "title": "Crawl Website",
+        "title": "Replay Scrapes from a WARC Archive",
         "readOnlyHint": True,
         "destructiveHint": False,
         "idempotentHint": True,
-        "openWorldHint": True
+        "openWorldHint": False
     }
 )
-async def crawl_site(params: CrawlSiteInput) -> str:
+async def replay_warc(params: ReplayWarcInput) -> str:
     """
-    Recursively crawl a website starting from a given URL.
-    
-    This tool discovers and scrapes pages by following links, respecting
-    depth and page limits. Perfect for exploring website structure or
-    scraping multiple related pages.
-    
-    Best for:
-    - Discovering all pages in a section
-    - Scraping documentation sites
-    - Building sitemaps
-    - Content auditing
-    
+    Re-scrape archived responses from a WARC file without any network access.
+
+    Each archived response is decoded from its raw bytes and converted
+    exactly as webscrape_scrape_url would, so a crawl or batch run with
+    warc=True can be re-extracted in another format later without
+    refetching. Error responses are reported like failed scrapes.
+
     Args:
-        params (CrawlSiteInput): Configuration containing:
-            - url: Starting URL to crawl from
-            - max_depth: How many link levels to follow (0-5)
-            - max_pages: Maximum pages to crawl (1-100)
-            - same_domain_only: Only crawl URLs from the same domain
-            - response_format: Output format for crawled pages
-    
+        params (ReplayWarcInput): Configuration containing:
+            - warc_id: warc_id of a crawl or batch run with warc=True
+            - urls: Optional list of URLs to replay
+            - response_format: Output format for the replayed pages
+            - include_metadata: Whether to include page metadata
+            - max_records: Maximum responses to replay (1-1000)
+
     Returns:
-        str: JSON object with crawl results including all discovered pages and their content
+        str: JSON object with replayed scrape results (resource URIs and previews)
     """
     try:
-        base_domain = urlparse(params.url).netloc
-        visited = set()
-        to_visit = deque([(params.url, 0)])  # (url, depth)
-        results = []
-        
-        while to_visit and len(visited) < params.max_pages:
-            current_url, depth = to_visit.popleft()
-            
-            # Skip if already visited or depth exceeded
-            if current_url in visited or depth > params.max_depth:
-                continue
-            
-            visited.add(current_url)
-            
-            try:
-                # Scrape the current page
-                html_content, status_code, _ = await _fetch_url(current_url)
-                soup = BeautifulSoup(html_content, 'lxml')
-                
-                # Extract metadata
-                metadata = _extract_metadata(soup, current_url)
-                
-                # Get content
-                if params.response_format == ResponseFormat.MARKDOWN:
-                    content = _html_to_markdown(html_content, current_url)
+        path = os.path.join(WARC_DIR, f"{params.warc_id}.warc.gz")
+        if not os.path.exists(path):
+            raise Exception(f"WARC '{params.warc_id}' not found in {WARC_DIR}.")
+        wanted = set(params.urls) if params.urls else None
+        options = ScrapeOptions.from_params(params)
+
+        def replay():
+            results = []
+            for headers, block in _iter_warc_records(path):
+                url = headers.get("warc-target-uri")
+                if headers.get("warc-type") != "response" or (wanted is not None and url not in wanted):
+                    continue
+                status_code, http_headers, body = _parse_http_response(block)
+                if 300 <= status_code < 400:
+                    continue  # Redirect hops and 304s carry no page of their own
+                if status_code >= 400:
+                    results.append({"success": False, "error": f"HTTP {status_code}: {url}", "url": url})
                 else:
-                    content = _html_to_text(soup)
-                
-                # Generate scrape ID and store in cache
-                scrape_id = _generate_scrape_id(current_url, f"crawl_depth{depth}")
-                _store_in_cache(
-                    scrape_id=scrape_id,
-                    url=current_url,
-                    content=content,
-                    metadata=metadata
-                )
-
-                # Store result with resource reference
-                results.append({
-                    "url": current_url,
-                    "depth": depth,
-                    "scrape_id": scrape_id,
-                    "resource_uri": f"scrape://{scrape_id}/content",
-                    "metadata_uri": f"scrape://{scrape_id}/metadata",
-                    "title": metadata.get("title"),
-                    "status_code": status_code,
-                    "content_length": len(content),
-                    "preview": content[:200] + "..." if len(content) > 200 else content
-                })
-                
-                # Find links to crawl next (only if not at max depth)
-                if depth < params.max_depth:
-                    links = _extract_links(soup, current_url, params.same_domain_only)
-                    
-                    for link in links:
-                        if link not in visited:
-                            to_visit.append((link, depth + 1))
-                
-            except Exception as e:
-                results.append({
-                    "url": current_url,
-                    "depth": depth,
-                    "error": str(e)
-                })
-        
+                    html_content = httpx.Response(status_code, headers=http_headers, content=body).text
+                    result = _render_scrape(url, options, html_content, status_code)
+                    result["archived_at"] = headers.get("warc-date")
+                    results.append(result)
+                if len(results) >= params.max_records:
+                    break
+            return results
+
+        results = await asyncio.to_thread(replay)
         output = {
-            "start_url": params.url,
-            "pages_crawled": len(visited),
-            "max_depth": params.max_depth,
-            "max_pages": params.max_pages,
-            "crawled_at": datetime.utcnow().isoformat() + "Z",
+            "warc_id": params.warc_id,
+            "records_replayed": len(results),
+            "replayed_at": datetime.utcnow().isoformat() + "Z",
             "results": results
         }
-        
-        content = json.dumps(output, indent=2)
-        
-        # Truncate if necessary
-        content, was_truncated = _truncate_response(content, "json")
-        
+
+        content, was_truncated = _truncate_response(json.dumps(output, indent=2), "json")
         if was_truncated:
-            content += f"\n\n⚠️ Response truncated. Crawled {len(visited)} pages but showing partial results. Reduce max_depth or max_pages for full content."
-        
+            content += "\n\n⚠️ Response truncated. Use urls or max_records to replay fewer pages."
         return content
-        
+
     except Exception as e:
-        return f"Error crawling {params.url}: {str(e)}"
+        return f"Error replaying WARC {params.warc_id}: {str(e)}"
 
 
 @mcp.tool(
@@ -1509,7 +6714,7 @@ async def screenshot_url(params: ScreenshotUrlInput) -> str:
             - height: Browser viewport height (240-2160px)
     
     Returns:
-        str: Base64-encoded PNG image data with metadata
+        str: JSON object with screenshot metadata and resource URIs for the PNG image
     """
     try:
         from playwright.async_api import async_playwright
@@ -1536,21 +6741,18 @@ async def screenshot_url(params: ScreenshotUrlInput) -> str:
                     type="png"
                 )
                 
-                # Encode to base64
-                screenshot_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                
                 # Get page title
                 title = await page.title()
 
-                # Store screenshot in cache
+                # Store raw PNG bytes in cache (base64 only on request)
                 scrape_id = _generate_scrape_id(params.url, "screenshot")
-                screenshot_data = f"data:image/png;base64,{screenshot_b64}"
 
                 _store_in_cache(
                     scrape_id=scrape_id,
                     url=params.url,
-                    content=screenshot_data,
-                    metadata={"title": title, "type": "screenshot"}
+                    content=screenshot_bytes,
+                    metadata={"title": title, "type": "screenshot"},
+                    mime_type="image/png"
                 )
 
                 # Return resource reference (not full image data)
@@ -1560,6 +6762,7 @@ async def screenshot_url(params: ScreenshotUrlInput) -> str:
                     "url": params.url,
                     "title": title,
                     "resource_uri": f"scrape://{scrape_id}/content",
+                    "image_uri": f"scrape://{scrape_id}/screenshot.png",
                     "viewport": {
                         "width": params.width,
                         "height": params.height
@@ -1568,7 +6771,7 @@ async def screenshot_url(params: ScreenshotUrlInput) -> str:
                     "screenshot_size_bytes": len(screenshot_bytes),
                     "captured_at": datetime.utcnow().isoformat() + "Z",
                     "expires_at": (datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)).isoformat() + "Z",
-                    "note": "Use resource_uri to retrieve full image data"
+                    "note": "Use image_uri to retrieve the PNG image, or resource_uri for a base64 data URI"
                 }
 
                 content = json.dumps(result, indent=2)